@@ -1,13 +1,46 @@
-import json, pathlib
+"""
+Preferencias: config/prefs.json (defaults versionados) + workspace/prefs.json
+(overrides locales), fusionadas por PrefsService.
+
+- Recarga en caliente: como mucho cada check_s se mira el mtime de ambos
+  ficheros; si cambió se carga y fusiona todo en una instantánea nueva que se
+  publica de una vez (una sola asignación). Un JSON a medio escribir no se
+  publica: se sigue con la instantánea anterior hasta el siguiente cambio.
+- Reglas por dominio (domain_overrides) compiladas en un trie de sufijos
+  (etiquetas al revés: com -> ejemplo -> ...):
+    "ejemplo.com"    el dominio exacto ("www." no cuenta)
+    "*.ejemplo.com"  cualquier subdominio (no el propio ejemplo.com)
+    "*"              cualquier dominio
+  Si casan varias, se fusionan de la menos a la más específica (la exacta
+  manda). El resultado se memoiza por dominio en cada instantánea.
+
+API de siempre: PREFS (instantánea actual), domain_limit(), domain_budget().
+"""
+import json, os, pathlib, threading, time
 
 ROOT = pathlib.Path(__file__).resolve().parent.parent
+PATHS = (ROOT / "config" / "prefs.json", ROOT / "workspace" / "prefs.json")
+
+# Presupuesto de descarga por dominio (winners/_lib/ratelimit.py):
+#   max_concurrency : peticiones en vuelo a la vez
+#   rps / burst     : cubo de tokens (rps=0: sin límite de ritmo)
+#   timeout_s       : timeout de conexión y lectura
+DEFAULT_BUDGET = {"max_concurrency": 8, "rps": 0, "burst": 0, "timeout_s": 15}
+
+_MEMO_MAX = 4096
+_END = "$"   # regla del nodo exacto
+_WILD = "*"  # regla para los subdominios del nodo
 
 def _load(path):
+    """dict del JSON; {} si no existe; ValueError si existe pero no se puede leer."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
+        with open(path, "r", encoding="utf-8-sig") as f:  # config/prefs.json lleva BOM
+            data = json.load(f)
+    except FileNotFoundError:
         return {}
+    except Exception as e:
+        raise ValueError(f"{path}: {e}") from e
+    return data if isinstance(data, dict) else {}
 
 def _merge(base, override):
     if not isinstance(base, dict) or not isinstance(override, dict):
@@ -20,20 +53,142 @@ def _merge(base, override):
             out[k] = v
     return out
 
-# Defaults versionados
-cfg_defaults = _load(ROOT / "config" / "prefs.json")
-# Overrides locales (opcional)
-ws_overrides = _load(ROOT / "workspace" / "prefs.json")
-PREFS = _merge(cfg_defaults, ws_overrides)
+def normalize(domain: str) -> str:
+    domain = (domain or "").lower().strip().strip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+def compile_rules(overrides) -> dict:
+    """domain_overrides -> trie de sufijos {etiqueta: nodo, "$": regla, "*": regla}."""
+    root = {}
+    for pattern, rule in (overrides or {}).items():
+        if not isinstance(rule, dict):
+            continue
+        pattern = normalize(pattern)
+        wild = pattern == _WILD or pattern.startswith(_WILD + ".")
+        labels = pattern.split(".")[1:] if wild else pattern.split(".")
+        node = root
+        for label in reversed([l for l in labels if l and l != _WILD]):
+            node = node.setdefault(label, {})
+        node[_WILD if wild else _END] = rule
+    return root
+
+def match_rules(trie: dict, domain: str) -> list:
+    """Reglas que casan con `domain`, de la menos a la más específica."""
+    out = []
+    node = trie
+    labels = normalize(domain).split(".")[::-1]
+    for label in labels:
+        if _WILD in node:
+            out.append(node[_WILD])  # quedan etiquetas por debajo: subdominio de este nodo
+        node = node.get(label)
+        if node is None:
+            return out
+    if _END in node:
+        out.append(node[_END])
+    return out
+
+class _Snapshot:
+    """Estado inmutable publicado de una vez: prefs fusionadas, trie y memo."""
+    def __init__(self, prefs: dict, stamp):
+        self.prefs = prefs
+        self.stamp = stamp
+        self.trie = compile_rules(prefs.get("domain_overrides", {}))
+        self.memo = {}
+
+class PrefsService:
+    def __init__(self, paths=PATHS, check_s: float = 1.0):
+        self.paths = tuple(pathlib.Path(p) for p in paths)
+        self.check_s = check_s
+        self.reloads = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._snap = _Snapshot({}, None)
+        self.reload()
+
+    def _stamp(self):
+        out = []
+        for p in self.paths:
+            try:
+                st = os.stat(p)
+                out.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def reload(self, force: bool = False) -> bool:
+        """Carga y publica una instantánea nueva si los ficheros cambiaron."""
+        with self._lock:
+            stamp = self._stamp()
+            if not force and stamp == self._snap.stamp:
+                return False
+            try:
+                prefs = {}
+                for p in self.paths:
+                    prefs = _merge(prefs, _load(p))
+            except ValueError as e:
+                self.error = str(e)  # fichero a medio escribir: se reintenta en el próximo cambio
+                return False
+            self.error = None
+            self._snap = _Snapshot(prefs, stamp)
+            self.reloads += 1
+            return True
+
+    def snapshot(self) -> _Snapshot:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_s
+            self.reload()
+        return self._snap
+
+    @property
+    def prefs(self) -> dict:
+        return self.snapshot().prefs
+
+    def rule(self, domain: str, snap: _Snapshot = None) -> dict:
+        """Override efectivo del dominio (reglas que casan fusionadas; {} si ninguna)."""
+        snap = snap or self.snapshot()
+        hit = snap.memo.get(domain)  # clave tal cual llega: un acierto ni normaliza
+        if hit is None:
+            hit = {}
+            for r in match_rules(snap.trie, domain):
+                hit.update(r)
+            if len(snap.memo) >= _MEMO_MAX:
+                snap.memo.clear()
+            snap.memo[domain] = hit
+        return hit
+
+    def domain_limit(self, domain: str, global_limit):
+        r = self.rule(domain)
+        return int(r["limit"]) if "limit" in r else global_limit
+
+    def domain_budget(self, domain: str) -> dict:
+        snap = self.snapshot()  # defaults y reglas de la misma instantánea
+        out = dict(DEFAULT_BUDGET)
+        defaults = snap.prefs.get("fetch_defaults", {})
+        for src in (defaults if isinstance(defaults, dict) else {}, self.rule(domain, snap)):
+            out.update({k: src[k] for k in DEFAULT_BUDGET if k in src})
+        return out
+
+SERVICE = PrefsService()
+
+def __getattr__(name):
+    # PREFS siempre es la instantánea vigente (prefs.PREFS tras una recarga ve los cambios)
+    if name == "PREFS":
+        return SERVICE.prefs
+    raise AttributeError(name)
 
 def domain_limit(domain: str, global_limit: int | None) -> int | None:
     """
     Devuelve el límite efectivo para un dominio:
-      - Si hay override en PREFS, usa ese valor.
+      - Si hay override en PREFS (exacto o comodín), usa ese valor.
       - Si no, usa global_limit (puede ser None).
     """
-    domain = (domain or "").lower().lstrip(".")
-    d = PREFS.get("domain_overrides", {})
-    if domain in d and isinstance(d[domain], dict) and "limit" in d[domain]:
-        return int(d[domain]["limit"])
-    return global_limit
\ No newline at end of file
+    return SERVICE.domain_limit(domain, global_limit)
+
+def domain_budget(domain: str) -> dict:
+    """
+    DEFAULT_BUDGET <- PREFS["fetch_defaults"] <- reglas del dominio
+    (solo las claves de DEFAULT_BUDGET).
+    """
+    return SERVICE.domain_budget(domain)
@@ -1,4 +1,4 @@
-import sys, os, re, csv, json, datetime, subprocess, pathlib
+import sys, os, re, io, csv, json, datetime, pathlib, queue, threading
 from urllib.parse import urlparse
 
 try:
@@ -19,101 +19,135 @@ def _extract(prompt: str):
     return urls, limit
 
 def _write_inputs(task_dir: pathlib.Path, urls, _global_limit_ignored):
-    """Escribimos siempre limit.txt vacío para que la skill NO recorte.
-    El recorte se hará en post-proceso por dominio."""
+    """Entrada de la orden (como la de la skill); limit.txt vacío: la skill NO
+    recorta, el recorte se hace por dominio en la última etapa del pipeline."""
     inp = task_dir / "input"
     inp.mkdir(parents=True, exist_ok=True)
     (inp / "urls.txt").write_text("\n".join(urls) + "\n", encoding="utf-8")
     (inp / "limit.txt").write_text("", encoding="utf-8")
     return inp
 
-def _ensure_results_from_stdout(skill_dir: pathlib.Path):
-    results = skill_dir / "results.csv"
-    if results.exists():
-        return results
-    stdout_log = skill_dir / "logs" / "stdout.txt"
-    if not stdout_log.exists():
-        return results
-    lines = stdout_log.read_text(encoding="utf-8", errors="replace").splitlines()
-    if not lines:
-        return results
-    first = lines[0].strip().lower()
-    if first.startswith("url,title,h1,meta_description,texto"):
-        results.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    elif first.startswith("url,texto"):
-        out = ["url,title,h1,meta_description,texto"]
-        for ln in lines[1:]:
-            if not ln.strip():
-                continue
-            url, rest = (ln.split(",", 1) + [""])[:2]
-            out.append(f"{url},,,,{rest}")
-        results.write_text("\n".join(out) + "\n", encoding="utf-8")
-    else:
-        out = ["url,title,h1,meta_description,texto"] + lines
-        results.write_text("\n".join(out) + "\n", encoding="utf-8")
-    return results
-
-def _postprocess_domain_limits(results_csv: pathlib.Path, global_limit: int|None):
-    if not results_csv.exists():
-        return
-    rows = []
-    with results_csv.open("r", encoding="utf-8", newline="") as f:
-        rdr = csv.DictReader(f)
-        fieldnames = rdr.fieldnames or []
-        fieldnames = ["url","title","h1","meta_description","texto"]
-        for r in rdr:
-            url = (r.get("url") or "").strip()
-            dom = urlparse(url).netloc.lower().lstrip("www.")
-            eff = domain_limit(dom, global_limit)
-            texto = r.get("texto") or ""
-            if eff and eff > 0:
-                texto = texto[:eff]
-            rows.append({
-                "url": r.get("url",""),
-                "title": r.get("title",""),
-                "h1": r.get("h1",""),
-                "meta_description": r.get("meta_description",""),
-                "texto": texto,
-            })
-    with results_csv.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=["url","title","h1","meta_description","texto"])
-        w.writeheader()
-        w.writerows(rows)
-
-def run_clean_direct(prompt: str):
+FIELDS = ["url", "title", "h1", "meta_description", "texto"]
+FETCH_WORKERS = 16   # descargas en vuelo (la orden tarda ~ la URL más lenta, no la suma)
+QUEUE_DEPTH = 32     # filas como mucho entre etapas (backpressure: nunca está todo en memoria)
+_END = object()
+
+def _load_skill():
+    """Carga winners/web_fetch_text_clean/main.py como módulo (sus etapas fetch/clean)."""
+    import importlib.util
+    entry = ROOT / "winners" / "web_fetch_text_clean" / "main.py"
+    spec = importlib.util.spec_from_file_location("web_fetch_text_clean", entry)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def _domain_of(url: str) -> str:
+    dom = urlparse(url).netloc.lower()
+    return dom[4:] if dom.startswith("www.") else dom
+
+def _truncate(row, global_limit: int|None):
+    eff = domain_limit(_domain_of((row[0] or "").strip()), global_limit)
+    if eff and eff > 0:
+        row[4] = row[4][:eff]
+    return row
+
+def _put(q, item, cancel) -> bool:
+    """put() que se rinde si la etapa siguiente ya no lee (cancel); False si no entró."""
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _stage(name, work, q_out, err, cancel, upstream=None):
+    """
+    Hilo de etapa: pone en q_out lo que produzca work() y siempre cierra con _END.
+    cancel: la etapa siguiente dejó de leer, así que esta deja de producir.
+    upstream: se marca si esta etapa deja de leer antes de tiempo (falla o la
+    cancelan), para que la anterior no se quede bloqueada en un put.
+    """
+    def run():
+        done = False
+        try:
+            for item in work():
+                if not _put(q_out, item, cancel):
+                    break
+            else:
+                done = True
+        except Exception as e:
+            err.write(f"[{name}] {type(e).__name__}: {e}\n")
+        finally:
+            if not done and upstream is not None:
+                upstream.set()
+            _put(q_out, _END, cancel)
+    t = threading.Thread(target=run, name=f"clean-{name}", daemon=True)
+    t.start()
+    return t
+
+def _drain(q):
+    while True:
+        item = q.get()
+        if item is _END:
+            return
+        yield item
+
+def _pipeline(urls, limit: int|None, results: pathlib.Path, err):
+    """
+    fetch (FETCH_WORKERS hilos, orden de entrada) -> cola -> limpieza -> cola
+    -> recorte por dominio + escritura de results.csv fila a fila (este hilo).
+    Las colas acotadas frenan a la etapa anterior si la siguiente va detrás; si
+    una etapa (o la escritura) falla, se cancelan las anteriores.
+    Devuelve las primeras líneas escritas (para la muestra).
+    """
+    skill = _load_skill()
+    fetched = queue.Queue(maxsize=QUEUE_DEPTH)
+    cleaned = queue.Queue(maxsize=QUEUE_DEPTH)
+    stop_fetch, stop_clean = threading.Event(), threading.Event()
+    _stage("fetch", lambda: skill.fetch_pages(urls, workers=FETCH_WORKERS), fetched, err, stop_fetch)
+    # sin recorte en la skill: el límite efectivo es por dominio y va en la última etapa
+    _stage("clean", lambda: (skill.clean_row(u, html, e) for u, html, e in _drain(fetched)),
+           cleaned, err, stop_clean, upstream=stop_fetch)
+
+    head = []
+    try:
+        with results.open("w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f, lineterminator="\n")
+            w.writerow(FIELDS)
+            for row in _drain(cleaned):
+                w.writerow(_truncate(row, limit))
+                f.flush()
+                if len(head) < 2:
+                    line = io.StringIO()
+                    csv.writer(line, lineterminator="").writerow(row)
+                    head.append(line.getvalue())
+    finally:
+        stop_clean.set()  # escritura fallida o terminada: nadie lee ya de cleaned
+    return head
+
+def run_clean_direct(prompt: str, order_root: pathlib.Path | None = None):
+    """order_root: carpeta de la orden (por defecto workspace/orders/<timestamp>)."""
     urls, limit = _extract(prompt)
     if not urls:
         return {"ok": False, "learned": ["(nota) No se detectaron URLs."], "skill_dir": None}
 
-    orders   = ROOT / "workspace" / "orders"
-    orders.mkdir(parents=True, exist_ok=True)
-    order_root = orders / _ts()
+    if order_root is None:
+        orders   = ROOT / "workspace" / "orders"
+        orders.mkdir(parents=True, exist_ok=True)
+        order_root = orders / _ts()
     skill_dir  = order_root / "web_fetch_text_clean"
     (skill_dir / "logs").mkdir(parents=True, exist_ok=True)
 
-    inp = _write_inputs(skill_dir, urls, limit)
-
-    entry = ROOT / "winners" / "web_fetch_text_clean" / "main.py"
-    cmd   = [sys.executable, str(entry), str(inp)]
+    _write_inputs(skill_dir, urls, limit)
 
-    stdout_log = skill_dir / "logs" / "stdout.txt"
+    results = skill_dir / "results.csv"
     stderr_log = skill_dir / "logs" / "stderr.txt"
-    with stdout_log.open("w", encoding="utf-8", newline="") as out, \
-         stderr_log.open("w", encoding="utf-8", newline="") as err:
-        subprocess.run(cmd, cwd=str(ROOT), stdout=out, stderr=err, check=False)
-
-    results = _ensure_results_from_stdout(skill_dir)
-    _postprocess_domain_limits(results, limit)
-
-    head = []
     try:
-        with results.open("r", encoding="utf-8", errors="replace") as f:
-            for i, line in enumerate(f):
-                head.append(line.rstrip("\n"))
-                if i >= 2:
-                    break
+        with stderr_log.open("w", encoding="utf-8", newline="") as err:
+            head = [",".join(FIELDS)] + _pipeline(urls, limit, results, err)
     except Exception as e:
-        head = [f"(nota) No pude leer resultados: {e}"]
+        head = [f"(nota) No pude generar resultados: {e}"]
 
     learned = [f"He generado un CSV con texto limpio. Muestra (fuente: {results.name}):"] + head
-    return {"ok": True, "learned": learned, "skill_dir": str(skill_dir)}
\ No newline at end of file
+    return {"ok": True, "learned": learned, "skill_dir": str(skill_dir)}
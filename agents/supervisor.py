@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
-import argparse, os, sys, subprocess, datetime, json, re, pathlib
-from agents.runner_clean import run_clean_direct
+import argparse, os, sys, datetime, json, re, pathlib
+from agents.supervisor_service import connect, route_prompt
 
 # Memoria / diario
 try:
@@ -12,14 +12,8 @@ except Exception:
 ROOT = pathlib.Path(__file__).resolve().parent.parent
 
 def router_skill(prompt: str) -> str:
-    """Pregunta al router oficial cuál skill usar; fallback si falla."""
-    try:
-        cmd = [sys.executable, str(ROOT / "tools" / "router.py"), prompt]
-        out = subprocess.check_output(cmd, text=True, encoding="utf-8", errors="replace")
-        data = json.loads(out.strip())
-        return data.get("skill") or "web_titles_hard"
-    except Exception:
-        return "web_titles_hard"
+    """Pregunta al router oficial (en proceso) cuál skill usar; fallback si falla."""
+    return route_prompt(prompt)
 
 def write_chat(session_root: pathlib.Path, role: str, text: str) -> None:
     session_root.mkdir(parents=True, exist_ok=True)
@@ -28,18 +22,6 @@ def write_chat(session_root: pathlib.Path, role: str, text: str) -> None:
     with open(path, "a", encoding="utf-8") as f:
         f.write(f"[{ts}] {role}: {text}\n")
 
-def run_order(prompt: str) -> dict:
-    """Llama al orquestador (order.ps1). Devuelve {rc, stdout, stderr} o raw."""
-    try:
-        cmd = ["powershell", "-ExecutionPolicy", "Bypass", "-File", str(ROOT / "order.ps1"), prompt, "-Yes"]
-        out = subprocess.check_output(cmd, text=True, encoding="utf-8", errors="replace")
-        m = re.search(r'^\{.*\}', out, re.MULTILINE)
-        if m:
-            return json.loads(m.group(0))
-        return {"rc": -1, "stdout": "", "stderr": "", "raw": out}
-    except subprocess.CalledProcessError as e:
-        return {"rc": e.returncode, "stdout": "", "stderr": str(e), "raw": getattr(e, "output", "")}
-
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("prompt", help="Instrucción en lenguaje natural")
@@ -61,8 +43,8 @@ def main():
         f"Skill sugerida: {skill}",
         "Acciones:",
         "  1) Extraer URLs del prompt.",
-        "  2) Preparar inputs efímeros (order.ps1 ya lo hace).",
-        "  3) Ejecutar en sandbox con límites.",
+        "  2) Preparar inputs efímeros de la orden.",
+        "  3) Ejecutar la skill (en proceso, con timeout por orden).",
         "  4) Guardar resultados y hacer resumen corto."
     ]
     urls = re.findall(r'(https?://[^\s,;]+)', prompt, flags=re.I)
@@ -79,35 +61,14 @@ def main():
     log_event("run", "Supervisor ejecuta plan (aprobado)", {"skill": skill})
     write_chat(session_root, "supervisor", "Ejecutando plan con aprobación…")
 
-    res = run_clean_direct(prompt) if skill == "web_fetch_text_clean" else run_order(prompt)
+    # Daemon residente si está escuchando (agents/supervisor_service.py); si no, en proceso.
+    # El resultado vuelve directamente: no hay que buscar la última orden en workspace/orders.
     learned = []
-
-    # Vista previa: preferir results.csv (5 columnas) y si no, logs/stdout.txt
     try:
-        orders_dir = ROOT / "workspace" / "orders"
-        last_order = max([p for p in orders_dir.iterdir() if p.is_dir()],
-                         key=lambda p: p.stat().st_mtime, default=None)
-        if last_order:
-            skill_dir  = max([p for p in last_order.iterdir() if p.is_dir()],
-                             key=lambda p: p.stat().st_mtime, default=None)
-            if skill_dir:
-                stdout_log = skill_dir / "logs" / "stdout.txt"
-                results    = skill_dir / "results.csv"
-                head = []
-                src  = None
-                if results.exists():
-                    src = results
-                elif stdout_log.exists():
-                    src = stdout_log
-                if src:
-                    with open(src, "r", encoding="utf-8", errors="replace") as f:
-                        for i, line in enumerate(f):
-                            head.append(line.rstrip("\n"))
-                            if i >= 2:
-                                break
-                    learned.append("He generado un CSV con texto limpio. Muestra (fuente: %s):\n%s" % (src.name, "\n".join(head)))
+        res = connect().run(prompt)
+        learned = list(res.get("learned") or [])
     except Exception as e:
-        learned.append("(nota) No pude previsualizar resultados: %s" % e)
+        learned.append("(nota) No pude ejecutar la orden: %s" % e)
 
     if not learned:
         learned.append("Ejecución completada. Revisa los logs de la orden para más detalles.")
@@ -0,0 +1,310 @@
+# agents/supervisor_service.py
+"""
+Supervisor residente: router en proceso, cola de trabajos con prioridad y pool
+acotado de workers. Cada orden es una llamada a función (las skills de
+winners/ se cargan una vez como módulos) y el resultado se devuelve
+directamente, sin buscar la última carpeta de workspace/orders por mtime.
+
+- submit(prompt, priority) -> Future; run() espera el resultado. Prioridad
+  menor = antes; a igual prioridad, orden de llegada. La cola es acotada
+  (max_queue): submit bloquea si está llena.
+- web_fetch_text_clean va por agents/runner_clean (pipeline en streaming); el
+  resto de skills por su run(input_dir, out) en proceso, o como subproceso si
+  la skill no lo tiene. Cada orden tiene su carpeta
+  workspace/orders/<timestamp>_<n>/<skill>/ (input/, results.csv).
+- Las skills corren en proceso, sin sandbox: el límite es un timeout por
+  orden (order_timeout_s). Al vencer, la orden falla con TimeoutError y el
+  worker vuelve a la cola; la llamada colgada se abandona en su hilo (las
+  descargas tienen sus propios timeouts de socket) y el subproceso de una
+  skill sin run() se mata.
+- Daemon local con el mismo transporte que el pool de sandboxes
+  (engine/daemon.py: JSON, secreto en workspace/.daemon/supervisor.key):
+
+      python -m agents.supervisor_service serve --workers 4
+
+  connect() usa el daemon si está escuchando y si no un servicio en proceso;
+  agents/supervisor.py pasa por ahí.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import importlib.util
+import itertools
+import json
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from engine import daemon
+
+WINNERS = ROOT / "winners"
+DEFAULT_ADDRESS = ("127.0.0.1", 47322)
+DEFAULT_SKILL = "web_titles_hard"
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 5, 9
+ORDER_TIMEOUT_S = 120.0
+_URL_RE = re.compile(r'(https?://[^\s,;]+)', re.I)
+
+
+def _authkey(create: bool = False) -> bytes:
+    return daemon.authkey("supervisor", "GLADOS_SUPERVISOR_KEY", create=create)
+
+
+def _address() -> Tuple[str, int]:
+    return daemon.address("GLADOS_SUPERVISOR_ADDR", DEFAULT_ADDRESS)
+
+
+def route_prompt(prompt: str) -> str:
+    """Router en proceso (tools/router.py); fallback a títulos si falla."""
+    try:
+        from tools.router import route
+        return route(prompt) or DEFAULT_SKILL
+    except Exception:
+        return DEFAULT_SKILL
+
+
+_SKILLS: Dict[str, Any] = {}
+_SKILLS_LOCK = threading.Lock()
+
+
+def load_skill(skill: str):
+    """winners/<skill>/main.py como módulo (una vez por proceso)."""
+    with _SKILLS_LOCK:
+        mod = _SKILLS.get(skill)
+        if mod is None:
+            entry = WINNERS / skill / "main.py"
+            spec = importlib.util.spec_from_file_location(f"winners_{skill}", entry)
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)
+            _SKILLS[skill] = mod
+        return mod
+
+
+def _head(path: Path, n: int = 3) -> list:
+    out = []
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            out.append(line.rstrip("\n"))
+            if len(out) >= n:
+                break
+    return out
+
+
+def run_skill(skill: str, prompt: str, order_root: Path,
+              timeout_s: float = ORDER_TIMEOUT_S) -> Dict[str, Any]:
+    """Orden genérica: urls.txt del prompt -> skill -> results.csv (salida tal cual)."""
+    entry = WINNERS / skill / "main.py"
+    if not entry.is_file():
+        return {"ok": False, "learned": [f"(nota) No hay skill {skill} en winners/."], "skill_dir": None}
+    urls = _URL_RE.findall(prompt)
+    if not urls:
+        return {"ok": False, "learned": ["(nota) No se detectaron URLs."], "skill_dir": None}
+
+    skill_dir = order_root / skill
+    inp = skill_dir / "input"
+    inp.mkdir(parents=True, exist_ok=True)
+    (inp / "urls.txt").write_text("\n".join(urls) + "\n", encoding="utf-8")
+    results = skill_dir / "results.csv"
+
+    mod = load_skill(skill)
+    with results.open("w", encoding="utf-8", newline="") as out:
+        if hasattr(mod, "run"):
+            mod.run(inp, out)
+        else:
+            (skill_dir / "logs").mkdir(exist_ok=True)
+            with (skill_dir / "logs" / "stderr.txt").open("w", encoding="utf-8") as err:
+                try:
+                    subprocess.run([sys.executable, str(entry), str(inp)], cwd=str(ROOT),
+                                   stdout=out, stderr=err, check=False, timeout=timeout_s)
+                except subprocess.TimeoutExpired:
+                    return {"ok": False, "learned": [f"(nota) {skill} superó {timeout_s:g}s."],
+                            "skill_dir": str(skill_dir)}
+    learned = [f"Resultados de {skill} (fuente: {results.name}):"] + _head(results)
+    return {"ok": True, "learned": learned, "skill_dir": str(skill_dir), "results": str(results)}
+
+
+class SupervisorService:
+    def __init__(self, workers: int = 4, max_queue: int = 64,
+                 order_timeout_s: float = ORDER_TIMEOUT_S) -> None:
+        self.workers = max(1, workers)
+        self.order_timeout_s = order_timeout_s
+        self._q: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=max(1, max_queue))
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._counts = {"submitted": 0, "done": 0, "failed": 0, "timed_out": 0, "running": 0}
+        self._threads = [threading.Thread(target=self._worker, name=f"supervisor-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for t in self._threads:
+            t.start()
+
+    def _order_root(self) -> Path:
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        root = ROOT / "workspace" / "orders" / f"{ts}_{next(self._seq):04d}"
+        root.mkdir(parents=True, exist_ok=True)
+        return root
+
+    def execute(self, prompt: str) -> Dict[str, Any]:
+        """Una orden completa en este hilo: router -> skill -> resultado."""
+        skill = route_prompt(prompt)
+        if skill == "web_fetch_text_clean":
+            from agents.runner_clean import run_clean_direct
+            res = run_clean_direct(prompt, order_root=self._order_root())
+        else:
+            res = run_skill(skill, prompt, self._order_root(), self.order_timeout_s)
+        res["skill"] = skill
+        return res
+
+    def _execute_bounded(self, prompt: str) -> Dict[str, Any]:
+        """execute() con timeout: TimeoutError si no termina en order_timeout_s."""
+        box: Dict[str, Any] = {}
+
+        def target() -> None:
+            try:
+                box["res"] = self.execute(prompt)
+            except BaseException as e:
+                box["exc"] = e
+
+        t = threading.Thread(target=target, name="supervisor-order", daemon=True)
+        t.start()
+        t.join(self.order_timeout_s)
+        if t.is_alive():
+            raise TimeoutError(f"la orden superó {self.order_timeout_s:g}s")
+        if "exc" in box:
+            raise box["exc"]
+        return box["res"]
+
+    def submit(self, prompt: str, priority: int = PRIORITY_NORMAL) -> Future:
+        fut: Future = Future()
+        self._q.put((priority, next(self._seq), prompt, fut, time.monotonic()))
+        self._count("submitted")
+        return fut
+
+    def run(self, prompt: str, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return self.submit(prompt, priority).result(timeout)
+
+    def _worker(self) -> None:
+        while True:
+            _prio, _seq, prompt, fut, t_in = self._q.get()
+            if fut is None:
+                return  # centinela de close()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            t0 = time.monotonic()
+            self._count("running")
+            try:
+                res = self._execute_bounded(prompt)
+                res["queued_s"] = round(t0 - t_in, 4)
+                res["elapsed_s"] = round(time.monotonic() - t0, 4)
+                fut.set_result(res)
+                self._count("done")
+            except Exception as e:
+                fut.set_exception(e)
+                self._count("timed_out" if isinstance(e, TimeoutError) else "failed")
+            finally:
+                self._count("running", -1)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += n
+
+    def warm(self) -> None:
+        """Precarga router y skills (el primer trabajo no paga los imports)."""
+        route_prompt("")
+        for entry in sorted(WINNERS.glob("web_*/main.py")):
+            try:
+                load_skill(entry.parent.name)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "queued": self._q.qsize(), **self._counts}
+
+    def close(self) -> None:
+        # los centinelas van detrás de todo lo encolado
+        for _ in self._threads:
+            self._q.put((float("inf"), next(self._seq), None, None, 0.0))
+        for t in self._threads:
+            t.join()
+
+
+# ============================================================
+# Daemon local
+# ============================================================
+
+class ServiceClient:
+    """Cliente del daemon: misma interfaz run()/stats() que SupervisorService."""
+
+    def __init__(self, address: Optional[Tuple[str, int]] = None) -> None:
+        self._client = daemon.DaemonClient(address or _address(), _authkey(), "supervisor daemon")
+
+    def run(self, prompt: str, priority: int = PRIORITY_NORMAL) -> Dict[str, Any]:
+        return self._client.call("run", prompt, priority)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._client.call("stats")
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def connect(workers: int = 1):
+    """Usa el daemon si está escuchando; si no, un servicio en proceso."""
+    try:
+        return ServiceClient()
+    except OSError:
+        return SupervisorService(workers=workers)
+
+
+class _ServiceSession:
+    """Una conexión al daemon; todas comparten la cola y los workers."""
+
+    def __init__(self, service: SupervisorService) -> None:
+        self.service = service
+
+    def handle(self, op: str, *args):
+        if op == "run":
+            return self.service.run(str(args[0]), int(args[1]))
+        if op == "stats":
+            return self.service.stats()
+        raise ValueError(f"unknown op {op!r}")
+
+
+def serve(address: Optional[Tuple[str, int]] = None, *, workers: int = 4, max_queue: int = 64,
+          order_timeout_s: float = ORDER_TIMEOUT_S) -> None:
+    service = SupervisorService(workers=workers, max_queue=max_queue, order_timeout_s=order_timeout_s)
+    service.warm()
+    daemon.serve(address or _address(), _authkey(create=True),
+                 lambda: _ServiceSession(service), f"supervisor ({workers} workers)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Supervisor residente con cola de órdenes.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("serve")
+    sp.add_argument("--workers", type=int, default=4, help="Órdenes en paralelo")
+    sp.add_argument("--max-queue", type=int, default=64, help="Órdenes en cola como mucho")
+    sp.add_argument("--order-timeout", type=float, default=ORDER_TIMEOUT_S,
+                    help="Segundos como mucho por orden (las skills corren en proceso)")
+    rp = sub.add_parser("run")
+    rp.add_argument("prompt")
+    rp.add_argument("--priority", type=int, default=PRIORITY_NORMAL, help="Menor = antes")
+    sub.add_parser("stats")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        serve(workers=args.workers, max_queue=args.max_queue, order_timeout_s=args.order_timeout)
+    elif args.cmd == "run":
+        print(json.dumps(connect().run(args.prompt, args.priority), ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(ServiceClient().stats(), indent=2))
@@ -39,6 +39,100 @@ if __name__ == "__main__":
         help="Timeout por ejecución (segundos) para cada trial dentro del sandbox.",
     )
 
+    ap.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Candidatos evaluados a la vez en workdirs aislados (cada uno fijado a CPUs distintas).",
+    )
+    ap.add_argument(
+        "--pool",
+        action="store_true",
+        help="Usa contenedores calientes (daemon `python -m engine.sandbox_pool serve` o pool en proceso).",
+    )
+    ap.add_argument("--pool-size", type=int, default=2, help="Contenedores calientes por perfil.")
+    ap.add_argument(
+        "--worker",
+        action="store_true",
+        help="Runner residente en el contenedor persistente (sin arrancar intérprete por trial).",
+    )
+    ap.add_argument(
+        "--measure",
+        choices=["auto", "poll", "rusage"],
+        default="auto",
+        help="Medición del backend local: psutil cada 50 ms (poll) o wait4/cgroup del árbol (rusage).",
+    )
+    ap.add_argument(
+        "--robust",
+        action="store_true",
+        help="Warmup + repeticiones adaptativas hasta IC y aceptar solo victorias significativas.",
+    )
+    ap.add_argument("--warmup", type=int, default=1,
+                    help="Ejecuciones de calentamiento descartadas antes de medir el baseline y cada "
+                         "candidato no servido desde la caché (1 = una ejecución extra por candidato; "
+                         "0 = sin calentamiento, más rápido pero con arranque en frío).")
+    ap.add_argument("--rebaseline-every", type=int, default=0,
+                    help="Re-mide el baseline cada N candidatos para detectar deriva del host (0 = nunca).")
+    ap.add_argument("--max-repeats", type=int, default=15, help="(robust) Tope de repeticiones.")
+    ap.add_argument("--target-ci", type=float, default=0.05,
+                    help="(robust) Semi-anchura del IC de la mediana relativa a la mediana.")
+    ap.add_argument("--confidence", type=float, default=0.95, help="(robust) Nivel de confianza.")
+    ap.add_argument("--cache", action="store_true",
+                    help="Reutiliza trials idénticos (código+input+expected+perfil) de ejecuciones previas.")
+    ap.add_argument("--cache-dir", default="workspace/.trial_cache")
+    ap.add_argument("--cache-ttl", type=float, default=168.0, help="Caducidad de la caché (horas).")
+    ap.add_argument("--cache-max", type=int, default=512, help="Entradas máximas de la caché (LRU).")
+    ap.add_argument(
+        "--search",
+        choices=["greedy", "beam"],
+        default="greedy",
+        help="greedy: hill climbing receta a receta; beam: población que compone recetas.",
+    )
+    ap.add_argument("--beam-width", type=int, default=4, help="(beam) Supervivientes por generación.")
+    ap.add_argument("--max-trials", type=int, default=None, help="(beam) Presupuesto de candidatos evaluados.")
+    ap.add_argument("--budget", type=float, default=None, help="(beam) Presupuesto de tiempo (segundos).")
+    ap.add_argument(
+        "--race",
+        action="store_true",
+        help="Corta las repeticiones (y mata el run en curso) de candidatos que ya no pueden ganar.",
+    )
+    ap.add_argument(
+        "--compare",
+        choices=["ordered", "unordered", "numeric"],
+        default="ordered",
+        help="Comparación con el expected: exacta en orden, sin orden, o con tolerancia numérica.",
+    )
+    ap.add_argument(
+        "--fitness",
+        default=None,
+        help="Fitness multiobjetivo: preset (default, throughput, latency) o ruta a JSON. "
+             "Por defecto <tarea>/fitness.json si existe.",
+    )
+    ap.add_argument("--race-factor", type=float, default=3.0,
+                    help="(race) Abandona si un run supera factor × la mediana del incumbente.")
+
+    ap.add_argument(
+        "--fixtures",
+        nargs="?",
+        const="default",
+        default=None,
+        help="Sirve las páginas grabadas (engine/fixtures/web o la carpeta indicada) con un servidor "
+             "local y dirige a él las descargas de las skills web (sin internet).",
+    )
+    ap.add_argument(
+        "--fixture-opts",
+        default="",
+        help="(fixtures) Fallos deterministas, p.ej. latency_ms=50,jitter_ms=20,error_rate=0.1,"
+             "redirect_rate=0.2,chunked=1,slowloris_rate=0.1,seed=1",
+    )
+
+    ap.add_argument(
+        "--ladder",
+        default="",
+        help="Tareas separadas por comas (p.ej. de tools/scale_task.py) a evolucionar en orden "
+             "de tamaño; ignora --task-dir/--expected y escribe la curva en <workdir>/scaling.jsonl.",
+    )
+
     args = ap.parse_args()
 
     # Render de plantilla (las web no necesitan contexto)
@@ -55,15 +149,14 @@ if __name__ == "__main__":
     if args.recipes.strip():
         recipes_cli = [r.strip() for r in args.recipes.split(",") if r.strip()]
 
-    # Llama a evolve
-    from engine.evolve import evolve
+    # Llama a evolve (o a evolve_ladder con --ladder)
+    from engine.evolve import evolve, evolve_ladder
+    from engine.fixture_server import parse_opts as parse_fixture_opts
 
-    score = evolve(
+    opts = dict(
         seed_code=out_seed.read_text(encoding="utf-8"),
         workdir=args.workdir,
-        expected_stdout_file=expected_abs,
         rounds=args.rounds,
-        root_dir=root_abs,
         verbose=True,
         backend=args.backend,
         cpus=args.cpus,
@@ -73,5 +166,34 @@ if __name__ == "__main__":
         repeats=args.repeats,
         recipes=recipes_cli,     # override si se pasa
         timeout_s=args.timeout,  # <-- NUEVO: timeout parametrizable
+        parallel=args.parallel,
+        pool=args.pool,
+        pool_size=args.pool_size,
+        worker=args.worker,
+        measure=args.measure,
+        robust=args.robust,
+        warmup=args.warmup,
+        max_repeats=args.max_repeats,
+        target_rel_ci=args.target_ci,
+        confidence=args.confidence,
+        cache_dir=args.cache_dir if args.cache else None,
+        cache_ttl_s=args.cache_ttl * 3600,
+        cache_max=args.cache_max,
+        search=args.search,
+        beam_width=args.beam_width,
+        max_trials=args.max_trials,
+        budget_s=args.budget,
+        race=args.race,
+        race_factor=args.race_factor,
+        compare=args.compare,
+        fitness=args.fitness,
+        rebaseline_every=args.rebaseline_every,
+        fixtures=args.fixtures,
+        fixture_opts=parse_fixture_opts(args.fixture_opts),
     )
-    print(f"Fitness final: {score}")
+    ladder = [t.strip() for t in args.ladder.split(",") if t.strip()]
+    if ladder:
+        evolve_ladder(task_dirs=ladder, **opts)
+    else:
+        score = evolve(expected_stdout_file=expected_abs, root_dir=root_abs, **opts)
+        print(f"Fitness final: {score}")
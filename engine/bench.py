@@ -0,0 +1,129 @@
+# engine/bench.py
+"""
+Benchmarking estadísticamente robusto para comparar candidatos en hosts ruidosos.
+
+- collect(): descarta `warmup` ejecuciones y repite hasta que el intervalo de
+  confianza (bootstrap) de la mediana sea más estrecho que `rel_ci` relativo a
+  la mediana, o hasta `max_reps`. Corta antes si el candidato es incorrecto.
+  `stop(samples)` permite abortar antes (racing contra el incumbente).
+- reject_outliers(): filtra muestras a más de k·MAD de la mediana.
+- compare(): IC bootstrap del cociente de medianas candidato/incumbente;
+  veredicto "win" solo si todo el IC queda por debajo de 1 (significativo),
+  "loss" si queda por encima, "tie" en otro caso. Con menos de MIN_SAMPLES
+  muestras en algún lado siempre es "tie" (un IC de 1 muestra no mide ruido).
+
+Todo determinista (Random con semilla fija) y solo stdlib.
+"""
+from __future__ import annotations
+
+import random
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MIN_SAMPLES = 3  # mínimo por lado para dar un veredicto y para collect()
+
+
+def reject_outliers(xs: List[float], k: float = 3.0) -> List[float]:
+    """Quita valores a más de k·MAD (escalado a sigma) de la mediana."""
+    if len(xs) < 4:
+        return list(xs)
+    med = median(xs)
+    mad = median(abs(x - med) for x in xs) * 1.4826
+    if mad <= 0:
+        return list(xs)
+    return [x for x in xs if abs(x - med) <= k * mad]
+
+
+def _boot_medians(xs: List[float], n_boot: int, rng: random.Random) -> List[float]:
+    n = len(xs)
+    return sorted(median(rng.choices(xs, k=n)) for _ in range(n_boot))
+
+
+def median_ci(xs: List[float], confidence: float = 0.95, n_boot: int = 1000,
+              seed: int = 0) -> Tuple[float, float]:
+    """IC percentil bootstrap de la mediana."""
+    if not xs:
+        return (0.0, 0.0)
+    if len(xs) == 1:
+        return (xs[0], xs[0])
+    meds = _boot_medians(xs, n_boot, random.Random(seed))
+    a = (1.0 - confidence) / 2.0
+    return (meds[int(a * (n_boot - 1))], meds[int((1.0 - a) * (n_boot - 1))])
+
+
+def collect(
+    run_once: Callable[[], Dict[str, Any]],
+    *,
+    key: str = "time_s",
+    warmup: int = 1,
+    min_reps: int = MIN_SAMPLES,
+    max_reps: int = 15,
+    rel_ci: float = 0.05,
+    confidence: float = 0.95,
+    stop: Optional[Callable[[List[Dict[str, Any]]], bool]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ejecuta run_once() (devuelve un dict de métricas) con calentamiento y
+    repetición adaptativa. Devuelve las métricas de las ejecuciones medidas.
+    Si stop(muestras) devuelve True se deja de repetir.
+    """
+    for _ in range(max(0, warmup)):
+        m = run_once()
+        if m.get("correct", 0.0) < 1.0:
+            return [m]  # incorrecto: no merece más ejecuciones
+
+    samples: List[Dict[str, Any]] = []
+    while len(samples) < max(1, max_reps):
+        m = run_once()
+        samples.append(m)
+        if m.get("correct", 0.0) < 1.0:
+            break
+        if stop is not None and stop(samples):
+            break
+        if len(samples) >= max(1, min_reps):
+            xs = reject_outliers([s.get(key, 0.0) for s in samples])
+            med = median(xs)
+            lo, hi = median_ci(xs, confidence)
+            if med > 0 and (hi - lo) / 2.0 <= rel_ci * med:
+                break
+    return samples
+
+
+def compare(
+    incumbent: List[float],
+    candidate: List[float],
+    *,
+    confidence: float = 0.95,
+    n_boot: int = 2000,
+    seed: int = 0,
+    lower_is_better: bool = True,
+) -> Dict[str, Any]:
+    """
+    Compara dos distribuciones (tras quitar outliers). Devuelve
+    {"verdict": "win"|"loss"|"tie", "ratio": r, "ci": [lo, hi], "n": [ni, nc]}
+    donde ratio = mediana(candidato)/mediana(incumbente).
+    """
+    inc = reject_outliers([x for x in incumbent if x is not None])
+    cand = reject_outliers([x for x in candidate if x is not None])
+    if not inc or not cand or median(inc) <= 0:
+        return {"verdict": "tie", "ratio": None, "ci": None, "n": [len(inc), len(cand)]}
+    if len(inc) < MIN_SAMPLES or len(cand) < MIN_SAMPLES:
+        return {"verdict": "tie", "ratio": median(cand) / median(inc), "ci": None,
+                "n": [len(inc), len(cand)]}
+
+    rng = random.Random(seed)
+    ratios = []
+    for _ in range(n_boot):
+        mi = median(rng.choices(inc, k=len(inc)))
+        mc = median(rng.choices(cand, k=len(cand)))
+        if mi > 0:
+            ratios.append(mc / mi)
+    ratios.sort()
+    a = (1.0 - confidence) / 2.0
+    lo = ratios[int(a * (len(ratios) - 1))]
+    hi = ratios[int((1.0 - a) * (len(ratios) - 1))]
+    ratio = median(cand) / median(inc)
+
+    better, worse = (hi < 1.0, lo > 1.0) if lower_is_better else (lo > 1.0, hi < 1.0)
+    verdict = "win" if better else ("loss" if worse else "tie")
+    return {"verdict": verdict, "ratio": ratio, "ci": [lo, hi], "n": [len(inc), len(cand)]}
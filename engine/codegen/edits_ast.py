@@ -15,6 +15,8 @@ Para la plantilla web (web_titles.py.j2):
     # === END_FETCH_LOOP ===
 - La función fetch_one(url) existe.
 - DEFAULT_HEADERS está definido.
+- Las recetas aiohttp_fetch* reutilizan extract_title(html) y, si existe,
+  _via_fixture(url) (servidor de fixtures).
 
 Puedes añadir o quitar recetas en RECIPES. El entrypoint es ast_mutate(code, recipe).
 """
@@ -381,6 +383,11 @@ def _replace_block_between(mark_start: str, mark_end: str, new_block: str, src:
 # Requieren que la plantilla tenga los anchors BEGIN_FETCH_LOOP / END_FETCH_LOOP.
 # ============================================================
 
+def _fetch_target(code: str, var: str = "url") -> str:
+    """Expresión de URL a descargar: pasa por _via_fixture() si la plantilla lo define."""
+    return f"_via_fixture({var})" if "def _via_fixture(" in code else var
+
+
 def recipe_threaded_fetch(code: str) -> str:
     """
     Paraleliza el bucle de descargas usando ThreadPoolExecutor
@@ -438,10 +445,11 @@ def _build_session() -> requests.Session:
     if "_SESSION = None" not in code:
         code = code.replace("DEFAULT_HEADERS = {", "_SESSION = None\n\nDEFAULT_HEADERS = {", 1)
 
-    # parchear fetch_one a usar _SESSION
+    # parchear fetch_one a usar _SESSION (conserva la redirección a fixtures)
+    target = _fetch_target(code)
     code = re.sub(
         r"def fetch_one\(url: str, \*, timeout: float = 10\.0\) -> tuple\[str, str\]:\s*\n\s*try:\s*\n\s*"
-        r"r = requests\.get\(url, headers=DEFAULT_HEADERS, timeout=timeout\)\s*\n\s*"
+        r"r = requests\.get\((?:_via_fixture\()?url\)?, headers=DEFAULT_HEADERS, timeout=timeout\)\s*\n\s*"
         r"r\.raise_for_status\(\)\s*\n\s*return url, extract_title\(r\.text\)\s*\n\s*except Exception:\s*\n\s*"
         r"return url, \"\".*?\n",
         (
@@ -450,7 +458,7 @@ def _build_session() -> requests.Session:
             "    try:\n"
             "        if _SESSION is None:\n"
             "            _SESSION = _build_session()\n"
-            "        r = _SESSION.get(url, timeout=timeout)\n"
+            f"        r = _SESSION.get({target}, timeout=timeout)\n"
             "        r.raise_for_status()\n"
             "        return url, extract_title(r.text)\n"
             "    except Exception:\n"
@@ -486,7 +494,8 @@ def _cache_path_for(url: str) -> Path:
             1
         )
 
-    # parchear fetch_one con cache
+    # parchear fetch_one con cache (la clave es la URL original, no la de fixtures)
+    target = _fetch_target(code)
     code = re.sub(
         r"def fetch_one\(url: str, \*, timeout: float = 10\.0\) -> tuple\[str, str\]:\s*\n\s*try:\s*\n\s*"
         r"(.*?)\n\s*except Exception:\s*\n\s*return url, \"\"",
@@ -499,9 +508,9 @@ def _cache_path_for(url: str) -> Path:
             "            return url, extract_title(html)\n"
             "        sess = globals().get('_SESSION', None)\n"
             "        if sess is not None:\n"
-            "            r = sess.get(url, timeout=timeout)\n"
+            f"            r = sess.get({target}, timeout=timeout)\n"
             "        else:\n"
-            "            r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)\n"
+            f"            r = requests.get({target}, headers=DEFAULT_HEADERS, timeout=timeout)\n"
             "        r.raise_for_status()\n"
             "        html = r.text\n"
             "        try:\n"
@@ -520,56 +529,81 @@ def _cache_path_for(url: str) -> Path:
 
 
 # ============================================================
-# Registro de recetas y entrypoint
-# ============================================================
-
-RECIPES = [
-    "pandas_to_polars",
-    "add_lru_cache",
-    "turbo_inline_print_flush",
-    "use_scandir",
-    "threaded_stat",
-    "multiprocessing_sizes",
-    "async_glob",
-
-    # WEB
-    "threaded_fetch",
-    "add_retry_headers",
-    "disk_cache",
-    "aiohttp_fetch",
-]
-# ============================================================
-# Receta WEB: aiohttp_fetch (asyncio + aiohttp)
-# Reemplaza el bucle de fetch por una versión asíncrona concurrente
-# usando un ClientSession compartido y un pool de conexiones.
+# Recetas WEB async: familia aiohttp_fetch (asyncio + aiohttp)
+# Reemplazan el bucle de fetch por descargas concurrentes con un ClientSession
+# compartido. La salida sale en el orden de entrada (se espera a las tareas en
+# orden, imprimiendo cada línea en cuanto su URL y las anteriores terminan) y
+# un BoundedSemaphore acota las peticiones en vuelo. Cada variante toca un
+# parámetro del conector para que la evolución mida su efecto:
+#   aiohttp_fetch           : conexión nueva por petición y sin caché DNS
+#                             (equivalente async de requests.get sin Session)
+#   aiohttp_fetch_keepalive : reutiliza conexiones (keep-alive)
+#   aiohttp_fetch_dns_cache : caché DNS del conector (ttl 300 s)
+#   aiohttp_fetch_per_host  : keep-alive + máximo 4 conexiones por host
+#   aiohttp_fetch_bounded   : keep-alive + solo 4 peticiones en vuelo
+#   aiohttp_fetch_tuned     : todo lo anterior con límites holgados
+# El certificado TLS se verifica (un host con certificado caducado da "").
 # ============================================================
 
-def recipe_aiohttp_fetch(code: str) -> str:
+AIOHTTP_VARIANTS = {
+    "aiohttp_fetch": {"limit": 16, "in_flight": 16, "force_close": True, "dns_ttl": None},
+    "aiohttp_fetch_keepalive": {"limit": 16, "in_flight": 16, "keepalive_s": 30},
+    "aiohttp_fetch_dns_cache": {"limit": 16, "in_flight": 16, "force_close": True, "dns_ttl": 300},
+    "aiohttp_fetch_per_host": {"limit": 16, "in_flight": 16, "keepalive_s": 30, "per_host": 4},
+    "aiohttp_fetch_bounded": {"limit": 16, "in_flight": 4, "keepalive_s": 30},
+    "aiohttp_fetch_tuned": {"limit": 32, "in_flight": 32, "keepalive_s": 30, "per_host": 8,
+                            "dns_ttl": 300},
+}
+
+
+def _aiohttp_connector_args(opts: dict) -> str:
+    args = [f"limit={opts['limit']}"]
+    if opts.get("per_host"):
+        args.append(f"limit_per_host={opts['per_host']}")
+    if opts.get("force_close"):
+        args.append("force_close=True")
+    else:
+        args.append(f"keepalive_timeout={opts.get('keepalive_s', 15)}")
+    if "dns_ttl" in opts:
+        if opts["dns_ttl"] is None:
+            args.append("use_dns_cache=False")
+        else:
+            args.append(f"ttl_dns_cache={opts['dns_ttl']}")
+    return ", ".join(args)
+
+
+def recipe_aiohttp_fetch(code: str, variant: str = "aiohttp_fetch") -> str:
+    opts = AIOHTTP_VARIANTS[variant]
     block = r"""
     import asyncio, aiohttp
 
     async def _run_async(urls):
         timeout = aiohttp.ClientTimeout(total=10)
-        # limit controla el máximo de sockets simultáneos
-        connector = aiohttp.TCPConnector(limit=16, ssl=False)
+        connector = aiohttp.TCPConnector(__CONNECTOR__)
+        gate = asyncio.BoundedSemaphore(__IN_FLIGHT__)
         async with aiohttp.ClientSession(timeout=timeout, connector=connector, headers=DEFAULT_HEADERS) as sess:
 
             async def one(u: str):
                 try:
-                    async with sess.get(u) as resp:
-                        resp.raise_for_status()
-                        html = await resp.text()
-                        return u, extract_title(html)
+                    async with gate:
+                        async with sess.get(__TARGET__) as resp:
+                            resp.raise_for_status()
+                            html = await resp.text()
+                    return u, extract_title(html)
                 except Exception:
                     return u, ""
 
+            # Todas en marcha; se imprimen en el orden de entrada según terminan
             tasks = [asyncio.create_task(one(u)) for u in urls]
-            for coro in asyncio.as_completed(tasks):
-                url, title = await coro
-                print(f"{url},{title}")
+            for t in tasks:
+                url, title = await t
+                print(f"{url},{title}", flush=True)
 
     asyncio.run(_run_async(urls))
     """.rstrip()
+    block = (block.replace("__CONNECTOR__", _aiohttp_connector_args(opts))
+                  .replace("__IN_FLIGHT__", str(opts["in_flight"]))
+                  .replace("__TARGET__", _fetch_target(code, "u")))
 
     # Soporta ambos formatos de ancla:
     patched = _replace_block_between("BEGIN_FETCH_LOOP (mutation anchor)", "END_FETCH_LOOP", block, code)
@@ -578,6 +612,27 @@ def recipe_aiohttp_fetch(code: str) -> str:
     return patched or code
 
 
+# ============================================================
+# Registro de recetas y entrypoint
+# ============================================================
+
+RECIPES = [
+    "pandas_to_polars",
+    "add_lru_cache",
+    "turbo_inline_print_flush",
+    "use_scandir",
+    "threaded_stat",
+    "multiprocessing_sizes",
+    "async_glob",
+
+    # WEB
+    "threaded_fetch",
+    "add_retry_headers",
+    "disk_cache",
+    *AIOHTTP_VARIANTS,
+]
+
+
 def ast_mutate(code: str, recipe: str) -> str:
     """
     Devuelve el código mutado por la receta dada (o el original si no aplica).
@@ -605,6 +660,8 @@ def ast_mutate(code: str, recipe: str) -> str:
             return recipe_add_retry_headers(code)
         if recipe == "disk_cache":
             return recipe_disk_cache(code)
+        if recipe in AIOHTTP_VARIANTS:
+            return recipe_aiohttp_fetch(code, recipe)
 
     except Exception:
         # Si cualquier receta falla por excepción, devolver original
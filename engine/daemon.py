@@ -0,0 +1,154 @@
+# engine/daemon.py
+"""
+Transporte común de los daemons locales (engine/sandbox_pool.py y
+agents/supervisor_service.py): TCP en localhost, autenticación HMAC con un
+secreto aleatorio y mensajes JSON (nunca pickle).
+
+- Secreto: $<ENV> si está definida; si no, workspace/.daemon/<name>.key, creado
+  por el daemon con permisos 0600 (32 bytes aleatorios). Solo quien puede leer
+  ese fichero puede hablar con el daemon. Un cliente sin fichero no tiene daemon
+  al que conectarse (OSError, y el llamador usa su versión en proceso).
+- Handshake: el reto/respuesta HMAC de multiprocessing.connection, hecho en el
+  hilo de cada conexión (un cliente que no responde no bloquea accept()).
+- Mensajes: petición [op, *args] y respuesta [ok, payload], JSON por
+  send_bytes/recv_bytes y con tamaño máximo.
+"""
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import stat
+import threading
+from multiprocessing.connection import (AuthenticationError, Client, Listener,
+                                        answer_challenge, deliver_challenge)
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+KEY_DIR = ROOT / "workspace" / ".daemon"
+MAX_MESSAGE = 16 * 1024 * 1024
+
+
+def address(env_var: str, default: Tuple[str, int]) -> Tuple[str, int]:
+    raw = os.environ.get(env_var, "")
+    if ":" in raw:
+        host, port = raw.rsplit(":", 1)
+        return host, int(port)
+    return default
+
+
+def _check_private(path: Path) -> None:
+    if os.name != "posix":
+        return
+    st = path.stat()
+    if st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077:
+        raise RuntimeError(f"{path}: el secreto del daemon debe ser del usuario y con permisos 0600")
+
+
+def authkey(name: str, env_var: str, *, create: bool = False) -> bytes:
+    """Secreto del daemon `name`; create=True (lado servidor) lo genera si falta."""
+    raw = os.environ.get(env_var, "")
+    if raw:
+        return raw.encode("utf-8")
+    path = KEY_DIR / f"{name}.key"
+    if create:
+        KEY_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(secrets.token_hex(32))
+    _check_private(path)  # FileNotFoundError (OSError) si no hay daemon
+    key = path.read_text(encoding="utf-8").strip()
+    if not key:
+        raise RuntimeError(f"{path}: secreto del daemon vacío")
+    return key.encode("utf-8")
+
+
+class JsonConnection:
+    """Connection de multiprocessing que solo envía/recibe JSON."""
+
+    def __init__(self, conn) -> None:
+        self._conn = conn
+
+    def send(self, obj: Any) -> None:
+        self._conn.send_bytes(json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+    def recv(self) -> Any:
+        return json.loads(self._conn.recv_bytes(MAX_MESSAGE).decode("utf-8"))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class DaemonClient:
+    """Cliente síncrono: call(op, *args) -> payload; RuntimeError si el daemon falla."""
+
+    def __init__(self, addr: Tuple[str, int], key: bytes, label: str) -> None:
+        conn = Client(addr)
+        try:
+            answer_challenge(conn, key)
+            deliver_challenge(conn, key)
+        except (AuthenticationError, EOFError) as e:
+            conn.close()
+            raise ConnectionError(f"{label}: autenticación rechazada ({e})") from e
+        self._conn = JsonConnection(conn)
+        self._label = label
+        self._lock = threading.Lock()
+
+    def call(self, op: str, *args):
+        with self._lock:
+            self._conn.send([op, *args])
+            ok, payload = self._conn.recv()
+        if not ok:
+            raise RuntimeError(f"{self._label}: {payload}")
+        return payload
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _serve_conn(conn, key: bytes, session: Callable[[], Any]) -> None:
+    try:
+        deliver_challenge(conn, key)
+        answer_challenge(conn, key)
+    except (AuthenticationError, EOFError, OSError):
+        conn.close()
+        return
+    jconn = JsonConnection(conn)
+    handler = session()
+    try:
+        while True:
+            try:
+                msg = jconn.recv()
+            except (EOFError, OSError, ValueError):
+                break
+            try:
+                if not isinstance(msg, list) or not msg:
+                    raise ValueError("mensaje inválido")
+                jconn.send([True, handler.handle(msg[0], *msg[1:])])
+            except Exception as e:
+                try:
+                    jconn.send([False, str(e)])
+                except OSError:
+                    break
+    finally:
+        close = getattr(handler, "close", None)
+        if close is not None:
+            close()  # p.ej. recuperar lo que tuviera alquilado un cliente caído
+        jconn.close()
+
+
+def serve(addr: Tuple[str, int], key: bytes, session: Callable[[], Any], label: str) -> None:
+    """
+    Bucle del daemon. session() crea un manejador por conexión con
+    handle(op, *args) -> payload (JSON) y, opcionalmente, close().
+    """
+    with Listener(addr) as listener:
+        print(f"[{label}] escuchando en {listener.address}")
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_serve_conn, args=(conn, key, session), daemon=True).start()
@@ -1,23 +1,200 @@
 # engine/evaluator.py
+import math
+import os
 import re
+from array import array
+from collections import Counter
+from itertools import islice
+from typing import Dict, Tuple
 
 def _normalize_lines(s: str):
     return [re.sub(r"\s+$", "", x) for x in s.replace("\r\n","\n").replace("\r","\n").split("\n") if x != ""]
 
-def correctness(stdout: str, expected_path: str) -> float:
-    exp = _normalize_lines(open(expected_path, encoding="utf-8").read())
-    got = _normalize_lines(stdout)
-    return 1.0 if got == exp else 0.0
+def _iter_expected(expected_path: str):
+    """Líneas normalizadas del expected, leídas de forma perezosa."""
+    with open(expected_path, encoding="utf-8") as f:  # newline universal: \r\n y \r -> \n
+        for x in f:
+            x = x.rstrip("\n")
+            if x != "":
+                yield x.rstrip()  # equivale a re.sub(r"\s+$", "", x)
+
+
+COMPARE_MODES = ("ordered", "unordered", "numeric")
+_NUM_SPLIT = re.compile(r"([,;\s]+)")
+
+
+def _numeric_eq(exp: str, got: str, rel_tol: float, abs_tol: float) -> bool:
+    """Igualdad de línea tolerante: los campos numéricos se comparan con isclose."""
+    if exp == got:
+        return True
+    a, b = _NUM_SPLIT.split(exp), _NUM_SPLIT.split(got)
+    if len(a) != len(b):
+        return False
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x == y:
+            continue
+        if i % 2:  # separador
+            return False
+        try:
+            if not math.isclose(float(x), float(y), rel_tol=rel_tol, abs_tol=abs_tol):
+                return False
+        except ValueError:
+            return False
+    return True
+
+
+class ExpectedFingerprint:
+    """
+    Expected precompilado una vez por experimento:
+    - hashes: secuencia (array 'q') del hash de cada línea normalizada
+    - counts: multiconjunto hash -> nº de apariciones (comparación sin orden)
+    - lines : texto de las líneas, solo en modo "numeric" (tolerancia numérica)
+    mode: "ordered" (exacto y en orden), "unordered" (mismo multiconjunto de
+    líneas) o "numeric" (en orden; campos numéricos con rel_tol/abs_tol).
+    """
+
+    def __init__(self, expected_path: str, mode: str = "ordered",
+                 rel_tol: float = 1e-6, abs_tol: float = 1e-9) -> None:
+        if mode not in COMPARE_MODES:
+            raise ValueError(f"modo de comparación desconocido: {mode!r} ({'|'.join(COMPARE_MODES)})")
+        self.path = str(expected_path)
+        self.mode = mode
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.hashes = array("q")
+        self.counts: Counter = Counter()
+        self.lines = [] if mode == "numeric" else None
+        for x in _iter_expected(self.path):
+            h = hash(x)
+            self.hashes.append(h)
+            self.counts[h] += 1
+            if self.lines is not None:
+                self.lines.append(x)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def line(self, i: int):
+        """Texto de la línea i (solo para informar de diferencias)."""
+        if self.lines is not None:
+            return self.lines[i] if i < len(self.lines) else None
+        return next(islice(_iter_expected(self.path), i, None), None)
+
+    def text_of(self, h: int):
+        return next((x for x in _iter_expected(self.path) if hash(x) == h), None)
+
+    def line_matches(self, i: int, x: str) -> bool:
+        if i >= len(self.hashes):
+            return False
+        if self.lines is not None:
+            return _numeric_eq(self.lines[i], x, self.rel_tol, self.abs_tol)
+        return self.hashes[i] == hash(x)
+
+    def matches(self, stdout: str) -> bool:
+        cmp = StreamingComparator(self)
+        cmp.feed(stdout)
+        return cmp.finish()
+
+
+_FINGERPRINTS: Dict[Tuple[str, str], Tuple[Tuple[int, int], ExpectedFingerprint]] = {}
+
+
+def load_expected(expected_path: str, mode: str = "ordered") -> ExpectedFingerprint:
+    """Fingerprint del expected, cacheado por (ruta, modo) mientras no cambie el fichero."""
+    ap = os.path.abspath(expected_path)
+    st = os.stat(ap)
+    stamp = (st.st_size, st.st_mtime_ns)
+    hit = _FINGERPRINTS.get((ap, mode))
+    if hit and hit[0] == stamp:
+        return hit[1]
+    fp = ExpectedFingerprint(ap, mode)
+    _FINGERPRINTS[(ap, mode)] = (stamp, fp)
+    return fp
+
+
+class StreamingComparator:
+    """
+    Compara la salida del candidato con el expected línea a línea según llega
+    (misma normalización que _normalize_lines), sin materializar la salida:
+    cada línea se reduce a su hash y se contrasta con el ExpectedFingerprint.
+    - feed(chunk): admite trozos arbitrarios; devuelve False en la primera
+      línea distinta (o, sin orden, en la primera que sobra), y el llamador
+      puede matar el proceso ahí.
+    - finish(): procesa el resto y comprueba que no falten líneas.
+    - first_diff: {"line": n, "expected": ..., "got": ...} (None si coinciden;
+      None en expected/got indica que ese lado se acabó).
+    """
+
+    def __init__(self, expected, mode: str = "ordered") -> None:
+        self.fp = expected if isinstance(expected, ExpectedFingerprint) else load_expected(expected, mode)
+        self._pending = Counter(self.fp.counts) if self.fp.mode == "unordered" else None
+        self._partial = ""
+        self.lines = 0
+        self.first_diff = None
+
+    @property
+    def ok(self) -> bool:
+        return self.first_diff is None
+
+    def _line(self, x: str) -> bool:
+        if x == "":
+            return True
+        x = x.rstrip()
+        self.lines += 1
+        if self._pending is not None:
+            h = hash(x)
+            left = self._pending.get(h, 0)
+            if left > 0:
+                self._pending[h] = left - 1
+                return True
+            self.first_diff = {"line": self.lines, "expected": None, "got": x}
+            return False
+        if self.fp.line_matches(self.lines - 1, x):
+            return True
+        self.first_diff = {"line": self.lines, "expected": self.fp.line(self.lines - 1), "got": x}
+        return False
+
+    def feed(self, chunk: str) -> bool:
+        if self.first_diff is not None:
+            return False
+        parts = (self._partial + chunk).replace("\r", "\n").split("\n")
+        self._partial = parts.pop()
+        for x in parts:
+            if not self._line(x):
+                return False
+        return True
+
+    def finish(self) -> bool:
+        if self.first_diff is None and self._partial:
+            self._line(self._partial)
+            self._partial = ""
+        if self.first_diff is None:
+            if self._pending is not None:
+                missing = next((h for h, c in self._pending.items() if c > 0), None)
+                if missing is not None:
+                    self.first_diff = {"line": self.lines + 1, "expected": self.fp.text_of(missing),
+                                       "got": None}
+            elif self.lines < len(self.fp):
+                self.first_diff = {"line": self.lines + 1, "expected": self.fp.line(self.lines),
+                                   "got": None}
+        return self.first_diff is None
+
+
+def correctness(stdout: str, expected_path: str, mode: str = "ordered") -> float:
+    return 1.0 if load_expected(expected_path, mode).matches(stdout) else 0.0
 
 def eval_lines_set(got: str, expected_file: str) -> float:
-    """Compara conjuntos de líneas, ignorando orden y espacios finales."""
-    exp = Path(expected_file).read_text(encoding="utf-8").splitlines()
-    g   = got.splitlines()
-    norm = lambda xs: {x.strip() for x in xs if x.strip() != ""}
-    return 1.0 if norm(exp) == norm(g) else 0.0
+    """
+    Compara conjuntos de líneas, ignorando orden, repeticiones y espacios
+    finales. El expected sale del fingerprint cacheado (modo "unordered").
+    """
+    exp = set(load_expected(expected_file, "unordered").counts)
+    exp.discard(hash(""))
+    return 1.0 if exp == {hash(x) for x in _normalize_lines(got) if x} else 0.0
 
 def evaluate_rel(stdout: str, expected_path: str, time_s: float, peak_mb: float,
-                 base_time_s: float | None = None, base_peak_mb: float | None = None) -> dict:
+                 base_time_s: float | None = None, base_peak_mb: float | None = None,
+                 correct: float | None = None, mode: str = "ordered") -> dict:
     """
     Score relativo al baseline:
       - correctitud manda: si no es 1.0, el score cae fuerte.
@@ -25,8 +202,11 @@ def evaluate_rel(stdout: str, expected_path: str, time_s: float, peak_mb: float,
       - si base_peak_mb > 0: m_gain similar; si no, m_gain = 0 (Docker)
       - mezcla: 60% tiempo, 40% memoria
       - score final en [0.5, 1.0] cuando correct=1.0 (0.5 baseline, sube con mejoras)
+    correct: correctitud ya calculada (p.ej. por StreamingComparator durante la
+    ejecución); si es None se compara stdout con expected_path según `mode`
+    ("ordered" | "unordered" | "numeric", ver ExpectedFingerprint).
     """
-    corr = correctness(stdout, expected_path)
+    corr = correctness(stdout, expected_path, mode) if correct is None else correct
     if corr < 1.0:
         return {"correct": corr, "time_s": time_s, "peak_mb": peak_mb, "score": 0.0}
 
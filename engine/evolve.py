@@ -1,12 +1,21 @@
 # engine/evolve.py
 from __future__ import annotations
 
+import ast
+import hashlib
+import math
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict, Any
 from statistics import median
 
-from .codegen.edits_ast import ast_mutate
-from .evaluator import evaluate_rel
+from .bench import MIN_SAMPLES
+from .codegen.edits_ast import AIOHTTP_VARIANTS, ast_mutate
+from .evaluator import evaluate_rel, load_expected
+from .fitness import load_fitness, pareto_front
 
 # Recetas por defecto (puedes override desde CLI)
 # Incluye recetas de CSV + web
@@ -18,12 +27,28 @@ DEFAULT_RECIPES: List[str] = [
     "threaded_fetch",
     "add_retry_headers",
     "disk_cache",
+    # Web async (aiohttp): salida ordenada; variantes de keep-alive, DNS y límites
+    *AIOHTTP_VARIANTS,
 ]
 
+# Métricas de uso que los runners pueden añadir (rusage / cgroup) y que se
+# propagan a metrics.jsonl y a la agregación por mediana.
+_USAGE_KEYS = (
+    "cpu_user_s", "cpu_sys_s", "io_read_bytes", "io_write_bytes", "cg_peak_mb",
+    "ctx_vol", "ctx_invol", "faults_min", "faults_maj", "ttfo_s",
+)
 
-def _exec_once_local(workdir: Path, root_dir_abs: str, timeout_s: int):
+# Racing: timeout mínimo de un run aunque factor × incumbente sea menor
+# (el arranque del intérprete no debe contar como derrota).
+_RACE_MIN_TIMEOUT_S = 1.0
+
+
+def _exec_once_local(workdir: Path, root_dir_abs: str, timeout_s: int,
+                     affinity: Optional[List[int]] = None, measure: str = "auto",
+                     on_stdout=None, env: Optional[Dict[str, str]] = None):
     from .sandbox import run as run_local
-    return run_local(["python", "main.py", root_dir_abs], cwd=str(workdir), timeout_s=timeout_s)
+    return run_local(["python", "main.py", root_dir_abs], cwd=str(workdir), timeout_s=timeout_s,
+                     affinity=affinity, measure=measure, on_stdout=on_stdout, env=env)
 
 
 def _exec_once_docker(
@@ -33,11 +58,110 @@ def _exec_once_docker(
     cpus: float,
     mem_mb: int,
     allow_net: bool,
+    affinity: Optional[List[int]] = None,
+    env: Optional[Dict[str, str]] = None,
 ):
     # Runner no persistente (fallback)
     from .sandbox_docker import run_in_docker as run_docker
-    # Nota: el runner no persistente no usa 'network' explícito aquí
-    return run_docker(str(workdir), root_dir_abs, timeout_s=timeout_s, cpus=cpus, mem_mb=mem_mb)
+    # Sin red salvo allow_net o fixtures (el contenedor debe llegar al servidor del host)
+    network = "bridge" if (allow_net or env) else "none"
+    cpuset = ",".join(str(c) for c in affinity) if affinity else None
+    return run_docker(str(workdir), root_dir_abs, timeout_s=timeout_s, cpus=cpus, mem_mb=mem_mb,
+                      network=network, cpuset=cpuset, env=env)
+
+
+def _slot_affinities(parallel: int, cpus: float) -> List[Optional[List[int]]]:
+    """
+    Reparte CPUs disjuntas entre los slots paralelos (ceil(cpus) por slot) para
+    que los tiempos de candidatos concurrentes sigan siendo comparables.
+    Si parallel == 1 no se fija nada (comportamiento clásico). Si no caben
+    `parallel` slots o la plataforma no permite fijar CPUs se avisa una vez.
+    """
+    if parallel <= 1:
+        return [None]
+    from .sandbox import can_pin
+
+    try:
+        avail = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        avail = list(range(os.cpu_count() or 1))
+    per_slot = max(1, math.ceil(cpus))
+    n = min(parallel, max(1, len(avail) // per_slot))
+    if n < parallel:
+        print(f"[parallel] aviso: {len(avail)} CPUs solo dan para {n} slot(s) de {per_slot} CPU(s); "
+              f"parallel={parallel} se reduce a {n}")
+    if not can_pin():
+        print("[parallel] aviso: esta plataforma no permite fijar CPUs; los slots compiten entre sí")
+    return [avail[i * per_slot:(i + 1) * per_slot] for i in range(n)]
+
+
+class _Slot:
+    """
+    Hueco de ejecución aislado: workdir propio (main.py, metrics.jsonl,
+    last_stdout.txt...) + executor fijado a sus CPUs.
+    streams=True si el executor acepta on_stdout (comparación en streaming).
+    """
+
+    def __init__(self, workdir: Path, executor, sandbox=None, affinity: Optional[List[int]] = None,
+                 streams: bool = False):
+        self.workdir = workdir
+        self.executor = executor
+        self.sandbox = sandbox
+        self.affinity = affinity
+        self.streams = streams
+
+
+def _make_slot(
+    workdir: Path,
+    root_dir_abs: str,
+    *,
+    backend: str,
+    persistent: bool,
+    cpus: float,
+    mem_mb: int,
+    allow_net: bool,
+    affinity: Optional[List[int]] = None,
+    pool=None,
+    worker: bool = False,
+    measure: str = "auto",
+    env: Optional[Dict[str, str]] = None,
+) -> _Slot:
+    workdir.mkdir(parents=True, exist_ok=True)
+    if backend == "docker" and pool is not None:
+        # Contenedor caliente alquilado al pool; stop() lo devuelve
+        sandbox = pool.lease()
+        cpuset = ",".join(str(c) for c in affinity) if affinity else None
+        sandbox.bind(str(workdir), root_dir_abs, cpuset=cpuset, env=env)
+
+        def _exec(timeout_s: int):
+            return sandbox.exec_python(["main.py", "/input"], timeout_s=timeout_s)
+
+        return _Slot(workdir, _exec, sandbox, affinity)
+
+    if backend == "docker" and persistent:
+        from .sandbox_docker_persistent import DockerSandbox
+
+        network = "bridge" if (allow_net or env) else "none"
+        cpuset = ",".join(str(c) for c in affinity) if affinity else None
+        sandbox = DockerSandbox(str(workdir), root_dir_abs, cpus=cpus, mem_mb=mem_mb,
+                                network=network, cpuset=cpuset, worker=worker, env=env)
+        sandbox.start()
+
+        def _exec(timeout_s: int):
+            # el runner persistente devuelve time_s real
+            return sandbox.exec_python(["main.py", "/input"], timeout_s=timeout_s)
+
+        return _Slot(workdir, _exec, sandbox, affinity)
+
+    if backend == "docker":
+        def _exec(timeout_s: int):
+            return _exec_once_docker(workdir, root_dir_abs, timeout_s, cpus, mem_mb, allow_net,
+                                     affinity, env)
+    else:
+        def _exec(timeout_s: int, on_stdout=None):
+            return _exec_once_local(workdir, root_dir_abs, timeout_s, affinity, measure, on_stdout, env)
+        return _Slot(workdir, _exec, None, affinity, streams=True)
+    return _Slot(workdir, _exec, None, affinity)
 
 
 def _trial_once(
@@ -49,14 +173,34 @@ def _trial_once(
     base_time_s: Optional[float],
     base_peak_mb: Optional[float],
     timeout_s: int = 15,
+    stream: bool = False,
+    compare: str = "ordered",
+    fitness=None,
+    drift: Optional[float] = None,
 ) -> Tuple[Dict[str, Any], str, str, int]:
     """
     Escribe main.py, ejecuta UNA vez con 'executor', evalúa y loguea métricas.
+    Con stream=True la salida se compara con el expected según se escribe
+    (evaluator.StreamingComparator): a la primera línea distinta se mata el
+    proceso y metrics["first_diff"] indica dónde. compare elige la comparación
+    (ordered | unordered | numeric) contra el fingerprint cacheado del expected.
+    fitness(metrics) -> score sustituye al score de evaluate_rel (engine.fitness).
+    drift = baseline vigente / baseline inicial (re-baselining): se registran en
+    metrics.jsonl la ganancia de tiempo bruta y la corregida por deriva.
     """
     main_py = workdir / "main.py"
     main_py.write_text(code, encoding="utf-8")
 
-    res = executor(timeout_s=timeout_s)  # dict con rc, stdout, stderr, time_s, peak_mb
+    cmp = None
+    if stream:
+        from .evaluator import StreamingComparator
+
+        cmp = StreamingComparator(expected_abs, compare)
+        res = executor(timeout_s=timeout_s, on_stdout=cmp.feed)
+    else:
+        res = executor(timeout_s=timeout_s)  # dict con rc, stdout, stderr, time_s, peak_mb
+    if res.get("cached"):
+        cmp = None  # resultado re-reproducido: se evalúa desde su stdout
 
     (workdir / "last_stdout.txt").write_text(res.get("stdout", ""), encoding="utf-8")
     (workdir / "last_stderr.txt").write_text(res.get("stderr", ""), encoding="utf-8")
@@ -69,6 +213,8 @@ def _trial_once(
             res.get("peak_mb", 0.0),
             base_time_s=base_time_s,
             base_peak_mb=base_peak_mb,
+            correct=None if cmp is None else (1.0 if cmp.finish() else 0.0),
+            mode=compare,
         )
     else:
         metrics = {
@@ -77,13 +223,29 @@ def _trial_once(
             "peak_mb": res.get("peak_mb", 0.0),
             "score": 0.0,
         }
+    for k in _USAGE_KEYS:
+        if k in res:
+            metrics[k] = res[k]
+    if cmp is not None and cmp.first_diff is not None:
+        metrics["first_diff"] = cmp.first_diff
+    if fitness is not None and metrics["correct"] >= 1.0:
+        metrics["score"] = fitness(metrics)
 
     # Log JSONL de cada ejecución
     try:
         import json
 
+        rec = {"metrics": metrics, "rc": res["rc"]}
+        if res.get("cached"):
+            rec["cached"] = True
+        if drift and base_time_s and metrics["correct"] >= 1.0:
+            t = metrics["time_s"]
+            first = base_time_s / drift
+            rec["drift"] = drift
+            rec["gain_raw"] = (first - t) / first
+            rec["gain_corrected"] = (base_time_s - t) / base_time_s
         with open(workdir / "metrics.jsonl", "a", encoding="utf-8") as f:
-            f.write(json.dumps({"metrics": metrics, "rc": res["rc"]}) + "\n")
+            f.write(json.dumps(rec) + "\n")
     except Exception:
         pass
 
@@ -97,6 +259,7 @@ def _aggregate_metrics(metrics_list: List[Dict[str, Any]]) -> Dict[str, Any]:
     - time_s  = mediana
     - score   = mediana (si está presente)
     - peak_mb = mediana de valores > 0 (si hay)
+    - métricas de uso (CPU, E/S) = mediana de las presentes
     """
     if not metrics_list:
         return {"correct": 0.0, "time_s": 9e9, "peak_mb": 0.0, "score": 0.0}
@@ -111,9 +274,163 @@ def _aggregate_metrics(metrics_list: List[Dict[str, Any]]) -> Dict[str, Any]:
     agg["time_s"] = median(times) if times else 9e9
     agg["score"] = median(scores) if scores else 0.0
     agg["peak_mb"] = median(peaks) if peaks else (metrics_list[-1].get("peak_mb", 0.0) or 0.0)
+    for k in _USAGE_KEYS:
+        vals = [m[k] for m in metrics_list if k in m]
+        if vals:
+            agg[k] = median(vals)
     return agg
 
 
+def _run_candidate(
+    code: str,
+    slot: _Slot,
+    expected_abs: str,
+    *,
+    base_time_s: Optional[float],
+    base_peak_mb: Optional[float],
+    repeats: int,
+    timeout_s: int,
+    bench_opts: Optional[Dict[str, Any]] = None,
+    cache=None,
+    cache_key: Optional[str] = None,
+    race: Optional[Dict[str, float]] = None,
+    compare: str = "ordered",
+    fitness=None,
+    warmup: int = 0,
+    drift: Optional[float] = None,
+) -> Tuple[Dict[str, Any], str, str, int, List[Dict[str, Any]]]:
+    """
+    Ejecuta un candidato en su slot y agrega por mediana. Devuelve también las
+    muestras individuales (para comparaciones estadísticas).
+    - Sin bench_opts: exactamente `repeats` ejecuciones medidas.
+    - Con bench_opts: engine.bench.collect (repetición adaptativa hasta el IC
+      objetivo, con `repeats` como mínimo).
+    - `warmup` (o bench_opts["warmup"]): ejecuciones descartadas justo antes
+      de la primera ejecución real en el sandbox; no son muestras, no se
+      guardan en la caché ni cuentan en cached_runs. Un candidato servido
+      entero desde la caché no calienta.
+    - Con cache (engine.trial_cache): se re-reproducen primero los resultados
+      guardados para cache_key y solo se ejecuta en el sandbox lo que falte.
+    - Con race={"time_s": mediana del incumbente, "factor": f}: se dejan de
+      repetir los candidatos incorrectos o cuyo mejor run ya es f veces más
+      lento que el incumbente, y cada run se mata en vuelo al superar
+      f × incumbente (con un mínimo de _RACE_MIN_TIMEOUT_S). agg["raced"]
+      indica el motivo del abandono.
+    """
+    last = {"out": "", "err": "", "rc": 0}
+    run_timeout = timeout_s
+    if race and race.get("time_s"):
+        run_timeout = min(timeout_s, max(_RACE_MIN_TIMEOUT_S, race["factor"] * race["time_s"]))
+    if bench_opts:
+        warmup = bench_opts.get("warmup", warmup)
+        bench_opts = {**bench_opts, "warmup": 0}  # el calentamiento lo hace el executor
+    warm_left = max(0, warmup)
+    stored: List[Dict[str, Any]] = cache.get(cache_key) if cache is not None else []
+    replay = iter(stored)
+    fresh: List[Dict[str, Any]] = []
+    run_timeout_full = timeout_s
+
+    def executor(timeout_s: int, **kw):
+        nonlocal warm_left
+        res = next(replay, None)
+        if res is not None:
+            return dict(res, cached=True)
+        while warm_left > 0:
+            warm_left -= 1
+            slot.executor(timeout_s=timeout_s)  # calentamiento (cachés de disco, imports): no cuenta
+        res = slot.executor(timeout_s=timeout_s, **kw)
+        if cache is not None and not (res.get("rc") == -9 and timeout_s < run_timeout_full):
+            fresh.append(res)  # un run cortado por el racing no es un resultado reutilizable
+        return res
+
+    def _once() -> Dict[str, Any]:
+        m, last["out"], last["err"], last["rc"] = _trial_once(
+            code,
+            slot.workdir,
+            expected_abs,
+            executor=executor,
+            base_time_s=base_time_s,
+            base_peak_mb=base_peak_mb,
+            timeout_s=run_timeout,
+            stream=slot.streams,
+            compare=compare,
+            fitness=fitness,
+            drift=drift,
+        )
+        return m
+
+    raced: Dict[str, str] = {}
+
+    def _lost(samples: List[Dict[str, Any]]) -> bool:
+        if race is None:
+            return False
+        m = samples[-1]
+        if m.get("correct", 0.0) < 1.0:
+            slow = last["rc"] == -9 and run_timeout < timeout_s and "first_diff" not in m
+            raced["why"] = "timeout" if slow else "incorrect"
+            return True
+        if race.get("time_s") and min(s.get("time_s", 0.0) for s in samples) > race["factor"] * race["time_s"]:
+            raced["why"] = "slow"
+            return True
+        return False
+
+    if bench_opts:
+        from .bench import collect
+
+        # un veredicto necesita MIN_SAMPLES por lado (baseline incluido), aunque --repeats sea 1
+        samples = collect(_once, min_reps=max(MIN_SAMPLES, repeats), stop=_lost, **bench_opts)
+        if samples and samples[-1].get("correct", 0.0) < 1.0:
+            _lost(samples)
+    else:
+        samples = []
+        for _ in range(max(1, repeats)):
+            samples.append(_once())
+            if _lost(samples):
+                break
+    if cache is not None and fresh:
+        cache.put(cache_key, stored + fresh)
+    agg = _aggregate_metrics(samples)
+    agg["n"] = len(samples)
+    if cache is not None:
+        agg["cached_runs"] = len(samples) - len(fresh)
+    if raced:
+        agg["raced"] = raced["why"]
+    return agg, last["out"], last["err"], last["rc"], samples
+
+
+def _code_fingerprint(code: str) -> str:
+    """
+    Hash del AST normalizado: ignora comentarios, espacios y formato, de modo que
+    un candidato que la receta devolvió sin cambios (o reformateado) se detecta
+    como el mismo programa. Si no parsea, se usa el texto tal cual.
+    """
+    try:
+        norm = ast.dump(ast.parse(code), annotate_fields=False, include_attributes=False)
+    except (SyntaxError, ValueError):
+        norm = code
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+
+def _run_parallel(codes: List[str], slots: List[_Slot], run_one) -> list:
+    """
+    Evalúa varios candidatos a la vez: cada tarea toma un slot libre de la cola,
+    lo usa en exclusiva y lo devuelve. El resultado respeta el orden de entrada.
+    """
+    free: "queue.Queue[_Slot]" = queue.Queue()
+    for s in slots:
+        free.put(s)
+
+    def _job(code: str):
+        slot = free.get()
+        try:
+            return run_one(code, slot)
+        finally:
+            free.put(slot)
+
+    with ThreadPoolExecutor(max_workers=len(slots)) as ex:
+        return list(ex.map(_job, codes))
+
+
 def evolve(
     seed_code: str,
     workdir: str,
@@ -129,15 +446,105 @@ def evolve(
     repeats: int = 1,          # repeticiones por candidato (mediana)
     recipes: Optional[List[str]] = None,  # override de recetas
     timeout_s: int = 15,       # <-- NUEVO: timeout parametrizable para cada trial
+    parallel: int = 1,         # candidatos evaluados a la vez (slots aislados)
+    pool: bool = False,        # contenedores calientes del pool (daemon o en proceso)
+    pool_size: int = 2,        # contenedores calientes por perfil
+    worker: bool = False,      # runner residente en el contenedor persistente (fork por trial)
+    measure: str = "auto",     # backend local: "poll" (psutil), "rusage" (wait4/cgroup) o "auto"
+    robust: bool = False,      # acepta solo mejoras estadísticamente significativas
+    warmup: int = 1,           # ejecuciones de calentamiento descartadas (baseline y cada candidato medido)
+    max_repeats: int = 15,     # (robust) tope de repeticiones adaptativas
+    target_rel_ci: float = 0.05,  # (robust) semi-anchura del IC relativa a la mediana
+    confidence: float = 0.95,  # (robust) nivel de confianza
+    cache_dir: Optional[str] = None,  # caché de trials por contenido (None = desactivada)
+    cache_ttl_s: float = 7 * 86400,   # caducidad de las entradas de la caché
+    cache_max: int = 512,             # nº máximo de entradas (LRU)
+    search: str = "greedy",    # "greedy" (hill climbing) o "beam" (población)
+    beam_width: int = 4,       # (beam) supervivientes por generación
+    max_trials: Optional[int] = None,   # (beam) presupuesto de candidatos evaluados
+    budget_s: Optional[float] = None,   # (beam) presupuesto de tiempo de pared
+    race: bool = False,        # abandona candidatos que ya no pueden ganar al incumbente
+    race_factor: float = 3.0,  # (race) umbral: run > factor × mediana del incumbente
+    compare: str = "ordered",  # comparación con el expected: ordered | unordered | numeric
+    fitness: Optional[str] = None,  # preset o JSON de engine.fitness (None: <tarea>/fitness.json si existe)
+    rebaseline_every: int = 0,  # re-mide el baseline cada N candidatos (0 = nunca)
+    fixtures: Optional[str] = None,  # servidor local de páginas grabadas: "default" o carpeta (skills web)
+    fixture_opts: Optional[Dict[str, Any]] = None,  # latencia/errores/... de engine.fixture_server
 ) -> float:
     """
     Evolución con baseline relativo. Si backend=docker y persistent=True,
     mantiene un contenedor vivo y ejecuta via docker exec (rápido).
+
+    Con parallel > 1 cada ronda muta el mejor código al inicio de la ronda y
+    evalúa los candidatos a la vez en workdirs aislados (path/slots/sN), cada
+    uno fijado a CPUs distintas; después se aceptan en el orden de las recetas.
+
+    Con pool=True (backend docker) los slots alquilan contenedores calientes de
+    engine.sandbox_pool en vez de arrancar uno nuevo por llamada.
+
+    Con worker=True (docker persistente) cada trial es un fork de un runner
+    residente con los imports ya hechos; time_s se mide dentro del contenedor.
+
+    Con robust=True baseline y candidatos se miden con engine.bench (warmup,
+    repetición adaptativa hasta IC, descarte de outliers) y un candidato solo
+    reemplaza al incumbente si gana con significación (IC del cociente de
+    medianas de time_s < 1). Veredicto e IC van a leaderboard.jsonl.
+
+    Con cache_dir, los trials se guardan por hash(código, input, expected,
+    perfil del backend) y las ejecuciones ya vistas se re-reproducen sin sandbox.
+
+    Los candidatos cuyo AST normalizado ya se evaluó (en esta ronda o en una
+    anterior, incluido el incumbente) no se vuelven a ejecutar; el nº de
+    ejecuciones ahorradas (calentamiento + repeticiones; con robust, cota
+    inferior) se informa por ronda.
+
+    Con search="beam" cada ronda es una generación: cada superviviente se
+    expande con todas las recetas que aún no lleva en su linaje (las recetas se
+    componen), los hijos se evalúan a la vez en los slots y se quedan los
+    beam_width mejores de padres + hijos por (correct, score). Con robust=True
+    un hijo solo entra si el veredicto de engine.bench.compare contra su padre
+    es victoria (o gana en correctness). Se para al agotar rounds, max_trials
+    o budget_s; el linaje de cada superviviente va a leaderboard.jsonl.
+
+    Con race=True las repeticiones de un candidato se cortan en cuanto es
+    incorrecto o su mejor run supera race_factor × la mediana del incumbente,
+    y el run en curso se mata al pasar ese umbral (timeout reducido).
+
+    El expected se precompila una sola vez (evaluator.load_expected) y cada
+    trial se verifica contra ese fingerprint según `compare`.
+
+    Con fitness (preset de engine.fitness, ruta a JSON, o tasks/<tarea>/fitness.json
+    junto al input) el score pasa a ser multiobjetivo (tiempo, CPU, RSS, E/S,
+    tiempo hasta la primera salida) con pesos/restricciones de la tarea, y el
+    frente de Pareto de los candidatos correctos se guarda en leaderboard.jsonl.
+
+    El baseline se mide con `warmup` ejecuciones descartadas y `repeats`
+    repeticiones (mediana), igual que los candidatos; el calentamiento no es
+    muestra ni entra en la caché de trials. Con rebaseline_every > 0
+    se vuelve a medir (sin caché) cada N candidatos evaluados: los scores
+    posteriores son relativos al baseline vigente, el incumbente se re-puntúa
+    y la deriva del host queda en metrics.jsonl y leaderboard.jsonl.
+
+    Con fixtures se arranca engine.fixture_server (páginas grabadas con
+    latencia/errores/redirects/goteo deterministas según fixture_opts) y los
+    trials reciben GLADOS_FIXTURE_URL, así las skills web se miden sin
+    internet. En docker el servidor escucha solo en la IP del host en la red
+    bridge (o 127.0.0.1 si no la hay) y los contenedores llegan por
+    host.docker.internal. Si la tarea trae fixtures/manifest.json se usan sin
+    pedirlo; si descarga URLs sin fixtures se avisa. Con un solo slot los contadores
+    de fallos se reinician antes de cada trial (misma secuencia para todos).
     """
+    if search not in ("greedy", "beam"):
+        raise RuntimeError(f"search desconocido: {search!r} (greedy|beam)")
     path = Path(workdir).resolve()
     path.mkdir(parents=True, exist_ok=True)
     expected_abs = str(Path(expected_stdout_file).resolve())
     root_dir_abs = str(Path(root_dir).resolve())
+    try:
+        load_expected(expected_abs, compare)  # fingerprint una vez por experimento
+    except ValueError as e:
+        raise RuntimeError(str(e))
+    fitness_spec = load_fitness(fitness, str(Path(root_dir_abs).parent))
 
     if verbose:
         print(f"[paths] workdir={path}")
@@ -145,86 +552,376 @@ def evolve(
         print(f"[paths] expected_abs={expected_abs}")
         print(f"[backend] {backend}  persistent={persistent}  allow_net={allow_net}")
 
-    # --- Prepara executor ---
-    sandbox = None
-    if backend == "docker" and persistent:
-        from .sandbox_docker_persistent import DockerSandbox
+    # --- Servidor de fixtures (skills web sin internet) ---
+    task_fixtures = Path(root_dir_abs).parent / "fixtures"
+    if not fixtures and (task_fixtures / "manifest.json").exists():
+        fixtures = str(task_fixtures)  # la tarea trae sus páginas grabadas
+        if verbose:
+            print(f"[fixtures] la tarea trae fixtures: {fixtures}")
+    elif not fixtures and (Path(root_dir_abs) / "urls.txt").exists():
+        print("[fixtures] aviso: la tarea descarga URLs (urls.txt) sin --fixtures; "
+              + ("sin --allow-net los contenedores no tienen red y los trials fallarán. "
+                 if backend == "docker" and not allow_net else "sin internet los trials fallarán. ")
+              + "Usa --fixtures para medir contra páginas grabadas.")
+    fixture_srv = None
+    slot_env: Dict[str, str] = {}
+    if fixtures:
+        from .fixture_server import ENV_VAR, FixtureServer
 
-        network = "bridge" if allow_net else "none"
-        sandbox = DockerSandbox(str(path), root_dir_abs, cpus=cpus, mem_mb=mem_mb, network=network)
-        sandbox.start()
+        host = "127.0.0.1"
+        if backend == "docker":
+            from .sandbox_docker import bridge_gateway
 
-        def _exec(timeout_s: int):
-            # el runner persistente devuelve time_s real
-            return sandbox.exec_python(["main.py", "/input"], timeout_s=timeout_s)
-
-    elif backend == "docker":
-        def _exec(timeout_s: int):
-            return _exec_once_docker(path, root_dir_abs, timeout_s, cpus, mem_mb, allow_net)
-    else:
-        def _exec(timeout_s: int):
-            return _exec_once_local(path, root_dir_abs, timeout_s)
-
-    # --- Baseline (una vez) ---
-    best_code = seed_code
-    base_metrics, out, err, rc = _trial_once(
-        best_code,
-        path,
-        expected_abs,
-        executor=_exec,
-        base_time_s=None,
-        base_peak_mb=None,
-        timeout_s=timeout_s,   # <-- usa el timeout recibido
-    )
-    if verbose:
-        print(f"[baseline] rc={rc} metrics={base_metrics}")
+            host = bridge_gateway()  # visible desde los contenedores, no desde fuera
+        fixture_srv = FixtureServer(None if fixtures == "default" else fixtures,
+                                    host=host, **(fixture_opts or {}))
+        fixture_url = fixture_srv.start()
+        if backend == "docker":
+            fixture_url = fixture_url.replace(f"//{host}:", "//host.docker.internal:", 1)
+        slot_env[ENV_VAR] = fixture_url
+        if verbose:
+            print(f"[fixtures] {fixture_url}  opts={fixture_srv.opts()}")
 
-    base_time_s = base_metrics["time_s"]
-    base_peak_mb = base_metrics.get("peak_mb", 0.0) or None
-    best_metrics = base_metrics
+    # --- Prepara slots (executor + workdir) ---
+    affinities = _slot_affinities(parallel, cpus)
+    if verbose and parallel > 1:
+        print(f"[parallel] slots={len(affinities)} affinities={affinities}")
+    slots: List[_Slot] = []
+    sandbox_pool = None
+    if backend == "docker" and pool:
+        from .sandbox_pool import connect_pool, make_profile
 
-    # --- Lista de recetas ---
-    active_recipes = list(recipes) if recipes else list(DEFAULT_RECIPES)
+        if worker:
+            # los contenedores del pool no llevan el runner residente
+            print("[pool] aviso: worker=True no aplica con pool; cada trial usa docker exec")
+            worker = False
 
-    # --- Rondas de evolución ---
+        network = "bridge" if (allow_net or fixtures) else "none"
+        sandbox_pool = connect_pool(make_profile(cpus=cpus, mem_mb=mem_mb, network=network),
+                                    size=max(pool_size, len(affinities)))
     try:
-        for r in range(1, rounds + 1):
+        for i, aff in enumerate(affinities):
+            slot_dir = path if len(affinities) == 1 else path / "slots" / f"s{i}"
+            slots.append(_make_slot(
+                slot_dir, root_dir_abs,
+                backend=backend, persistent=persistent,
+                cpus=cpus, mem_mb=mem_mb, allow_net=allow_net, affinity=aff,
+                pool=sandbox_pool, worker=worker, measure=measure, env=slot_env or None,
+            ))
+        if fixture_srv is not None and len(slots) == 1:
+            _exec_inner = slots[0].executor
+
+            def _exec_fresh(*a, **kw):
+                fixture_srv.reset()  # misma secuencia de fallos en cada trial
+                return _exec_inner(*a, **kw)
+
+            slots[0].executor = _exec_fresh
+
+        trial_cache = None
+        cache_base = ""
+        if cache_dir:
+            from .trial_cache import TrialCache
+
+            trial_cache = TrialCache(cache_dir, ttl_s=cache_ttl_s, max_entries=cache_max)
+            profile = {"backend": backend, "persistent": persistent, "worker": worker,
+                       "cpus": cpus, "mem_mb": mem_mb, "allow_net": allow_net,
+                       "timeout_s": timeout_s, "measure": measure}
+            if fixture_srv is not None:
+                profile["fixtures"] = {"root": str(fixture_srv.root), **fixture_srv.opts()}
+            input_digest = trial_cache.tree_digest(root_dir_abs)
+            expected_digest = trial_cache.file_digest(expected_abs)
+
+            def _key(code: str) -> str:
+                return trial_cache.key(code, input_digest, expected_digest, profile)
+        else:
+            def _key(code: str) -> str:
+                return ""
+
+        bench_opts = None
+        if robust:
+            bench_opts = {"warmup": warmup, "max_reps": max(repeats, max_repeats, MIN_SAMPLES),
+                          "rel_ci": target_rel_ci, "confidence": confidence}
+
+        fit_base: Dict[str, Any] = {}
+
+        def _fitness(m: Dict[str, Any]) -> float:
+            viol = fitness_spec.violations(m, fit_base or None)
+            if viol:
+                m["violations"] = viol
+            return fitness_spec.score(m, fit_base or None)
+
+        fit_fn = _fitness if fitness_spec is not None else None
+        pareto_pts: List[Dict[str, Any]] = []
+
+        def _pareto_add(label: str, m: Dict[str, Any]) -> None:
+            if fitness_spec is not None and m.get("correct", 0.0) >= 1.0 and not m.get("violations"):
+                vals = fitness_spec.values(m)
+                pareto_pts.append({"label": label,
+                                   "values": {k: vals[k] for k in fitness_spec.objectives}})
+
+        # --- Baseline (misma política de warmup/repeticiones que los candidatos) ---
+        best_code = seed_code
+        base_metrics, out, err, rc, best_samples = _run_candidate(
+            best_code, slots[0], expected_abs,
+            base_time_s=None, base_peak_mb=None,
+            repeats=repeats,
+            timeout_s=timeout_s,   # <-- usa el timeout recibido
+            bench_opts=bench_opts,
+            cache=trial_cache, cache_key=_key(best_code), compare=compare, fitness=fit_fn,
+            warmup=warmup,
+        )
+        if verbose:
+            print(f"[baseline] rc={rc} metrics={base_metrics}")
+        fit_base.update(base_metrics)
+        _pareto_add("baseline", base_metrics)
+
+        # Baseline vigente (se actualiza al re-medir) y deriva respecto al inicial
+        base_ref: Dict[str, Any] = {
+            "time_s": base_metrics["time_s"],
+            "peak_mb": base_metrics.get("peak_mb", 0.0) or None,
+            "drift": 1.0,
+        }
+        drift_log: List[Dict[str, Any]] = []
+        since_rebase = 0
+        best_metrics = base_metrics
+        decisions: List[Dict[str, Any]] = []
+        # Programas ya evaluados (hash de AST normalizado -> receta que lo produjo)
+        seen: Dict[str, str] = {_code_fingerprint(best_code): "baseline"}
+        round_stats: List[Dict[str, Any]] = []
+
+        # --- Lista de recetas ---
+        active_recipes = list(recipes) if recipes else list(DEFAULT_RECIPES)
+
+        race_stats = {"aborted": 0, "saved_runs": 0}
+        race_lock = threading.Lock()
+
+        def _run_one(code: str, slot: _Slot):
+            race_ref = None
+            if race:
+                # Se compara contra el incumbente vigente al lanzar el candidato
+                inc = best_metrics
+                race_ref = {"time_s": inc["time_s"] if inc.get("correct", 0.0) >= 1.0 else None,
+                            "factor": race_factor}
+            result = _run_candidate(
+                code, slot, expected_abs,
+                base_time_s=base_ref["time_s"], base_peak_mb=base_ref["peak_mb"],
+                repeats=repeats, timeout_s=timeout_s, bench_opts=bench_opts,
+                cache=trial_cache, cache_key=_key(code), race=race_ref, compare=compare,
+                fitness=fit_fn, warmup=warmup, drift=base_ref["drift"],
+            )
+            if result[0].get("raced"):
+                with race_lock:
+                    race_stats["aborted"] += 1
+                    race_stats["saved_runs"] += max(0, max(1, repeats) - result[0].get("n", 0))
+            return result
+
+        def _rescore(m: Dict[str, Any]) -> None:
+            # Re-puntúa unas métricas ya medidas contra el baseline vigente
+            if m.get("correct", 0.0) < 1.0:
+                return
+            if fit_fn is not None:
+                m["score"] = fit_fn(m)
+            else:
+                m["score"] = evaluate_rel("", expected_abs, m["time_s"], m.get("peak_mb", 0.0),
+                                          base_time_s=base_ref["time_s"], base_peak_mb=base_ref["peak_mb"],
+                                          correct=m["correct"])["score"]
+
+        def _maybe_rebaseline(r: int, n_next: int = 1) -> bool:
+            """Re-mide el baseline si toca (antes de cada candidato o lote). True si cambió."""
+            nonlocal since_rebase
+            if rebaseline_every <= 0:
+                return False
+            if since_rebase < rebaseline_every:
+                since_rebase += n_next
+                return False
+            since_rebase = n_next
+            m, *_ = _run_candidate(
+                seed_code, slots[0], expected_abs,
+                base_time_s=None, base_peak_mb=None,
+                repeats=repeats, timeout_s=timeout_s, bench_opts=bench_opts,
+                cache=None, compare=compare, warmup=warmup,
+            )
+            if m.get("correct", 0.0) < 1.0 or not m.get("time_s"):
+                return False  # medición fallida: se mantiene el baseline vigente
+            base_ref["time_s"] = m["time_s"]
+            base_ref["peak_mb"] = m.get("peak_mb", 0.0) or base_ref["peak_mb"]
+            base_ref["drift"] = m["time_s"] / base_metrics["time_s"] if base_metrics["time_s"] else 1.0
+            fit_base.clear()
+            fit_base.update(m)
+            _rescore(best_metrics)
+            drift_log.append({"round": r, "time_s": m["time_s"], "drift": base_ref["drift"]})
             if verbose:
-                print(f"[round {r}] ------------------------------")
-            for rec in active_recipes:
-                cand = ast_mutate(best_code, rec)
-
-                # Ejecuta N repeticiones y agrega por mediana
-                reps_metrics: List[Dict[str, Any]] = []
-                last_rc = 0
-                for _ in range(max(1, repeats)):
-                    m, out, err, rc = _trial_once(
-                        cand,
-                        path,
-                        expected_abs,
-                        executor=_exec,
-                        base_time_s=base_time_s,
-                        base_peak_mb=base_peak_mb,
-                        timeout_s=timeout_s,  # <-- igual aquí
-                    )
-                    reps_metrics.append(m)
-                    last_rc = rc
-
-                agg = _aggregate_metrics(reps_metrics)
+                print(f"[rebaseline] time_s={m['time_s']:.4f} drift={base_ref['drift']:.3f}")
+            return True
 
-                if verbose:
-                    print(f"  recipe={rec:>24}  rc={last_rc}  metrics={agg}")
+        def _robust_accept(r: int, rec: str, inc_metrics, inc_samples, agg, samples) -> bool:
+            # Primero correct; si empatan, solo una victoria significativa en tiempo
+            from .bench import compare as bench_compare
+
+            if agg["correct"] > inc_metrics["correct"]:
+                verdict = {"verdict": "correctness", "ratio": None, "ci": None}
+            elif agg["correct"] >= 1.0 and agg["correct"] >= inc_metrics["correct"]:
+                verdict = bench_compare([m["time_s"] for m in inc_samples],
+                                  [m["time_s"] for m in samples], confidence=confidence)
+            else:
+                verdict = {"verdict": "incorrect", "ratio": None, "ci": None}
+            accepted = verdict["verdict"] in ("correctness", "win")
+            decisions.append({"round": r, "recipe": rec, "accepted": accepted, **verdict})
+            if verbose:
+                print(f"  {'':>31}verdict={verdict['verdict']} ratio={verdict['ratio']} ci={verdict['ci']}")
+            return accepted
+
+        def _consider(r: int, rec: str, cand: str, result) -> None:
+            nonlocal best_metrics, best_code, best_samples
+            agg, out, err, last_rc, samples = result
+            if verbose:
+                print(f"  recipe={rec:>24}  rc={last_rc}  metrics={agg}")
+            _pareto_add(rec, agg)
 
+            if robust:
+                accepted = _robust_accept(r, rec, best_metrics, best_samples, agg, samples)
+            else:
                 # Escoge si mejora: primero correct, luego score
-                if (agg["correct"] > best_metrics["correct"]) or (agg["score"] > best_metrics["score"]):
-                    best_metrics = agg
-                    best_code = cand
-                    (path / "main.py").write_text(best_code, encoding="utf-8")
-                    (path / "best_stdout.txt").write_text(out, encoding="utf-8")
-                    (path / "best_stderr.txt").write_text(err, encoding="utf-8")
+                accepted = (agg["correct"] > best_metrics["correct"]) or (agg["score"] > best_metrics["score"])
+
+            if accepted:
+                best_samples = samples
+                best_metrics = agg
+                best_code = cand
+                (path / "main.py").write_text(best_code, encoding="utf-8")
+                (path / "best_stdout.txt").write_text(out, encoding="utf-8")
+                (path / "best_stderr.txt").write_text(err, encoding="utf-8")
+
+        # Ejecuciones que habría costado un duplicado: calentamiento + muestras.
+        # Con robust las repeticiones son adaptativas y esto es una cota inferior.
+        skip_runs = max(0, warmup) + (max(MIN_SAMPLES, repeats) if robust else max(1, repeats))
+
+        def _is_new(stats: Dict[str, Any], rec: str, cand: str) -> bool:
+            stats["candidates"] += 1
+            fp = _code_fingerprint(cand)
+            if fp in seen:
+                stats["skipped"] += 1
+                stats["skipped_runs"] += skip_runs
+                if verbose:
+                    print(f"  recipe={rec:>24}  skip (mismo programa que {seen[fp]})")
+                return False
+            seen[fp] = rec
+            return True
+
+        def _end_round(stats: Dict[str, Any]) -> None:
+            round_stats.append(stats)
+            if verbose:
+                print(f"[round {stats['round']}] candidatos={stats['candidates']} duplicados={stats['skipped']} "
+                      f"ejecuciones ahorradas={'>=' if robust else ''}{stats['skipped_runs']}")
+
+        survivors: List[Dict[str, Any]] = []
+        if search == "beam":
+            # --- Búsqueda en haz: población de linajes de recetas ---
+            import time as _time
+
+            t_start = _time.perf_counter()
+            trials = 0
+            survivors = [{"code": best_code, "lineage": [], "metrics": base_metrics,
+                          "out": out, "err": err, "samples": best_samples}]
+
+            def _budget_left() -> bool:
+                if max_trials is not None and trials >= max_trials:
+                    return False
+                return budget_s is None or _time.perf_counter() - t_start < budget_s
+
+            def _run_budgeted(code: str, slot: _Slot):
+                # Con presupuesto de tiempo agotado el hijo no se llega a ejecutar
+                if budget_s is not None and _time.perf_counter() - t_start >= budget_s:
+                    return None
+                return _run_one(code, slot)
+
+            for r in range(1, rounds + 1):
+                if not _budget_left():
+                    break
+                if verbose:
+                    print(f"[round {r}] ------------------------------ beam={len(survivors)}")
+                stats = {"round": r, "candidates": 0, "skipped": 0, "skipped_runs": 0}
+                children: List[Dict[str, Any]] = []
+                for parent in survivors:
+                    if parent.get("expanded"):
+                        continue  # sus hijos ya se generaron en una generación anterior
+                    parent["expanded"] = True
+                    for rec in active_recipes:
+                        if rec in parent["lineage"]:
+                            continue
+                        lineage = parent["lineage"] + [rec]
+                        cand = ast_mutate(parent["code"], rec)
+                        if _is_new(stats, "+".join(lineage), cand):
+                            children.append({"code": cand, "lineage": lineage, "parent": parent})
+                if max_trials is not None:
+                    children = children[:max(0, max_trials - trials)]
+
+                if _maybe_rebaseline(r, len(children)):
+                    for parent in survivors:
+                        _rescore(parent["metrics"])
+                results = _run_parallel([c["code"] for c in children], slots, _run_budgeted)
+                evaluated = []
+                for child, res in zip(children, results):
+                    if res is None:
+                        continue
+                    trials += 1
+                    agg, c_out, c_err, c_rc, samples = res
+                    parent = child.pop("parent")
+                    child.update(metrics=agg, out=c_out, err=c_err, samples=samples)
+                    _pareto_add("+".join(child["lineage"]), agg)
+                    if verbose:
+                        print(f"  lineage={'+'.join(child['lineage']):>40}  rc={c_rc}  metrics={agg}")
+                    # robust: entra en el haz solo si gana a su padre de forma significativa
+                    if robust and not _robust_accept(r, "+".join(child["lineage"]), parent["metrics"],
+                                                     parent["samples"], agg, samples):
+                        continue
+                    evaluated.append(child)
+                _end_round(stats)
+                if not evaluated:
+                    break
+                pop = survivors + evaluated
+                pop.sort(key=lambda m: (m["metrics"]["correct"], m["metrics"]["score"]), reverse=True)
+                survivors = pop[:max(1, beam_width)]
+                best_metrics = survivors[0]["metrics"]  # referencia del racing
+
+            top = survivors[0]
+            best_code, best_metrics, best_samples = top["code"], top["metrics"], top["samples"]
+            if top["lineage"]:
+                (path / "best_stdout.txt").write_text(top["out"], encoding="utf-8")
+                (path / "best_stderr.txt").write_text(top["err"], encoding="utf-8")
+            if verbose:
+                print(f"[beam] trials={trials} t={_time.perf_counter() - t_start:.1f}s "
+                      f"best_lineage={'+'.join(top['lineage']) or '(seed)'}")
+        else:
+            # --- Rondas de evolución (greedy) ---
+            for r in range(1, rounds + 1):
+                if verbose:
+                    print(f"[round {r}] ------------------------------")
+                stats = {"round": r, "candidates": 0, "skipped": 0, "skipped_runs": 0}
+
+                if len(slots) == 1:
+                    # Greedy clásico: cada receta parte del mejor código actual
+                    for rec in active_recipes:
+                        cand = ast_mutate(best_code, rec)
+                        if _is_new(stats, rec, cand):
+                            _maybe_rebaseline(r)
+                            _consider(r, rec, cand, _run_one(cand, slots[0]))
+                else:
+                    # Todas las recetas parten del mejor código al inicio de la ronda
+                    cands = [(rec, ast_mutate(best_code, rec)) for rec in active_recipes]
+                    cands = [(rec, cand) for rec, cand in cands if _is_new(stats, rec, cand)]
+                    _maybe_rebaseline(r, len(cands))
+                    results = _run_parallel([c for _, c in cands], slots, _run_one)
+                    for (rec, cand), res in zip(cands, results):
+                        _consider(r, rec, cand, res)
+
+                _end_round(stats)
     finally:
-        if sandbox:
-            sandbox.stop()
+        for slot in slots:
+            if slot.sandbox:
+                slot.sandbox.stop()
+        if fixture_srv is not None:
+            fixture_srv.stop()
 
     # Guarda el mejor código
     (path / "main.py").write_text(best_code, encoding="utf-8")
@@ -239,19 +936,97 @@ def evolve(
             "backend": backend,
             "persistent": persistent,
             "allow_net": allow_net,
+            "fixtures": ({"url": slot_env.get("GLADOS_FIXTURE_URL"), **fixture_srv.opts()}
+                         if fixture_srv is not None else None),
             "cpus": cpus,
             "mem_mb": mem_mb,
             "rounds": rounds,
             "repeats": repeats,
             "timeout_s": timeout_s,
             "recipes": active_recipes,
+            "parallel": len(slots),
+            "pool": bool(sandbox_pool),
+            "worker": worker,
+            "robust": robust,
+            "search": search,
+            "compare": compare,
+            "round_stats": round_stats,
             "best": best_metrics,
         }
+        summary["baseline"] = {"time_s": base_metrics["time_s"], "n": base_metrics.get("n"),
+                               "warmup": warmup, "rebaseline_every": rebaseline_every,
+                               "drift": drift_log}
+        if fitness_spec is not None:
+            summary["fitness"] = fitness_spec.to_dict()
+            summary["pareto"] = pareto_front(pareto_pts, fitness_spec.objectives)
+        if race:
+            summary["race"] = {"factor": race_factor, **race_stats}
+        if search == "beam":
+            summary["beam"] = {"width": beam_width, "max_trials": max_trials, "budget_s": budget_s}
+            summary["survivors"] = [{"lineage": m["lineage"], "metrics": m["metrics"]} for m in survivors]
+        if trial_cache is not None:
+            summary["cache"] = {"dir": str(trial_cache.root), "hits": trial_cache.hits,
+                                "misses": trial_cache.misses}
+        if robust:
+            summary["bench"] = bench_opts
+            summary["decisions"] = decisions
         with open(Path(workdir) / "leaderboard.jsonl", "a", encoding="utf-8") as f:
             f.write(json.dumps(summary) + "\n")
     except Exception:
         pass
 
     if verbose:
+        if race:
+            print(f"[race] abandonados={race_stats['aborted']} ejecuciones ahorradas={race_stats['saved_runs']}")
         print(f"[best] {best_metrics}")
     return best_metrics["score"]
+
+
+def evolve_ladder(
+    seed_code: str,
+    workdir: str,
+    task_dirs: List[str],
+    verbose: bool = True,
+    **kw: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Evoluciona el mismo seed contra una escalera de tamaños (p.ej. las tareas
+    de tools/scale_task.py), de menor a mayor: cada peldaño es un evolve()
+    independiente en <workdir>/<tarea> con tasks/<tarea>/input y su expected.
+    Devuelve la curva de escalado y la añade a <workdir>/scaling.jsonl:
+    tiempo del baseline y del mejor candidato por peldaño, y su speedup.
+    """
+    import json, time
+
+    curve: List[Dict[str, Any]] = []
+    for task in task_dirs:
+        tdir = Path(task)
+        rung_dir = Path(workdir) / tdir.name
+        score = evolve(seed_code, str(rung_dir), str(tdir / "expected_stdout.txt"),
+                       root_dir=str(tdir / "input"), verbose=verbose, **kw)
+        point: Dict[str, Any] = {"task": tdir.name, "score": score}
+        try:
+            last = (rung_dir / "leaderboard.jsonl").read_text(encoding="utf-8").splitlines()[-1]
+            summary = json.loads(last)
+            base_t = summary.get("baseline", {}).get("time_s")
+            best_t = summary["best"].get("time_s")
+            point.update(baseline_time_s=base_t, best_time_s=best_t,
+                         speedup=(base_t / best_t) if base_t and best_t else None,
+                         correct=summary["best"].get("correct"))
+        except Exception:
+            pass
+        curve.append(point)
+        if verbose:
+            print(f"[ladder] {point}")
+
+    try:
+        with open(Path(workdir) / "scaling.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": time.time(), "curve": curve}) + "\n")
+    except Exception:
+        pass
+    if verbose:
+        print(f"{'tarea':>24} {'baseline_s':>11} {'best_s':>9} {'speedup':>8}")
+        for p in curve:
+            print(f"{p['task']:>24} {p.get('baseline_time_s') or 0:>11.4f} "
+                  f"{p.get('best_time_s') or 0:>9.4f} {p.get('speedup') or 0:>8.2f}")
+    return curve
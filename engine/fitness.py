@@ -0,0 +1,150 @@
+# engine/fitness.py
+"""
+Fitness multiobjetivo configurable por tarea.
+
+Objetivos (todos a minimizar; se leen de las métricas de un trial):
+  - time_s          : tiempo de pared
+  - cpu_s           : cpu_user_s + cpu_sys_s (rusage)
+  - peak_mb         : pico de RSS
+  - io_read_bytes / io_write_bytes / io_bytes (suma)
+  - ttfo_s          : tiempo hasta la primera línea de stdout (solo backend
+                      local; depende de cuándo vacía el candidato su buffer)
+
+Una FitnessSpec combina pesos y restricciones:
+  score = clamp01(0.5 + 0.5 · Σ w·gain / Σ w),  gain = (base - v) / base ∈ [-1, 1]
+así el baseline puntúa 0.5, las mejoras suben y, a diferencia de evaluate_rel,
+las regresiones bajan. Los objetivos sin dato en el trial o en el baseline no
+cuentan. Si se viola una restricción el score es 0.0.
+
+Se declara por tarea en tasks/<tarea>/fitness.json, p.ej.:
+    {"preset": "latency", "weights": {"ttfo_s": 0.7},
+     "constraints": {"peak_mb": {"max": 200}, "time_s": {"max_ratio": 1.5}}}
+o se elige un preset por nombre (PRESETS).
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+OBJECTIVES: Dict[str, Callable[[Dict[str, Any]], Optional[float]]] = {
+    "time_s": lambda m: m.get("time_s"),
+    "cpu_s": lambda m: (m["cpu_user_s"] + m.get("cpu_sys_s", 0.0)) if "cpu_user_s" in m else None,
+    "peak_mb": lambda m: m.get("peak_mb") or None,
+    "io_read_bytes": lambda m: m.get("io_read_bytes"),
+    "io_write_bytes": lambda m: m.get("io_write_bytes"),
+    "io_bytes": lambda m: (m["io_read_bytes"] + m.get("io_write_bytes", 0))
+    if "io_read_bytes" in m else None,
+    "ttfo_s": lambda m: m.get("ttfo_s"),
+}
+
+PRESETS: Dict[str, Dict[str, Any]] = {
+    # equivalente a evaluate_rel (pero penalizando regresiones)
+    "default": {"weights": {"time_s": 0.6, "peak_mb": 0.4}},
+    # skills CSV: trabajo total
+    "throughput": {"weights": {"time_s": 0.4, "cpu_s": 0.3, "peak_mb": 0.2, "io_bytes": 0.1}},
+    # skills web: latencia percibida
+    "latency": {"weights": {"ttfo_s": 0.5, "time_s": 0.4, "peak_mb": 0.1}},
+}
+
+TASK_FILE = "fitness.json"
+
+
+def _clamp(x: float, lo: float, hi: float) -> float:
+    return lo if x < lo else (hi if x > hi else x)
+
+
+class FitnessSpec:
+    def __init__(self, weights: Dict[str, float],
+                 constraints: Optional[Dict[str, Any]] = None, name: str = "custom") -> None:
+        for k in list(weights) + list(constraints or {}):
+            if k not in OBJECTIVES:
+                raise RuntimeError(f"objetivo de fitness desconocido: {k!r} ({', '.join(OBJECTIVES)})")
+        self.weights = {k: float(w) for k, w in weights.items() if w}
+        # {"peak_mb": 200} equivale a {"peak_mb": {"max": 200}}
+        self.constraints = {k: (v if isinstance(v, dict) else {"max": v})
+                            for k, v in (constraints or {}).items()}
+        self.name = name
+
+    @property
+    def objectives(self) -> List[str]:
+        return list(self.weights) or ["time_s"]
+
+    def values(self, metrics: Dict[str, Any]) -> Dict[str, Optional[float]]:
+        return {k: OBJECTIVES[k](metrics) for k in OBJECTIVES}
+
+    def violations(self, metrics: Dict[str, Any], base: Optional[Dict[str, Any]]) -> List[str]:
+        out = []
+        for k, c in self.constraints.items():
+            v = OBJECTIVES[k](metrics)
+            if v is None:
+                continue
+            if "max" in c and v > c["max"]:
+                out.append(f"{k}>{c['max']}")
+            b = OBJECTIVES[k](base) if base else None
+            if "max_ratio" in c and b and v > c["max_ratio"] * b:
+                out.append(f"{k}>{c['max_ratio']}x")
+        return out
+
+    def score(self, metrics: Dict[str, Any], base: Optional[Dict[str, Any]]) -> float:
+        """Score en [0, 1] relativo al baseline (0.5 = igual que el baseline)."""
+        if metrics.get("correct", 0.0) < 1.0 or self.violations(metrics, base):
+            return 0.0
+        if not base:
+            return 0.5
+        num = den = 0.0
+        for k, w in self.weights.items():
+            v, b = OBJECTIVES[k](metrics), OBJECTIVES[k](base)
+            if v is None or not b or b <= 0:
+                continue
+            num += w * _clamp((b - v) / b, -1.0, 1.0)
+            den += w
+        aux = num / den if den else 0.0
+        return _clamp(0.5 + 0.5 * aux, 0.0, 1.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "weights": self.weights, "constraints": self.constraints}
+
+
+def load_fitness(spec: Any = None, task_dir: Optional[str] = None) -> Optional[FitnessSpec]:
+    """
+    spec: None | nombre de preset | ruta a un JSON | dict {"preset", "weights", "constraints"}.
+    Con spec=None se busca <task_dir>/fitness.json; si no existe devuelve None
+    (se mantiene el score clásico de evaluate_rel).
+    """
+    name = "custom"
+    if spec is None:
+        if not task_dir or not (Path(task_dir) / TASK_FILE).is_file():
+            return None
+        spec = str(Path(task_dir) / TASK_FILE)
+    if isinstance(spec, str):
+        if spec in PRESETS:
+            name, spec = spec, PRESETS[spec]
+        elif Path(spec).is_file():
+            name = Path(spec).parent.name or spec
+            spec = json.loads(Path(spec).read_text(encoding="utf-8-sig"))
+        else:
+            raise RuntimeError(f"fitness desconocido: {spec!r} (presets: {', '.join(PRESETS)} o ruta a JSON)")
+    preset = spec.get("preset")
+    if preset is not None and preset not in PRESETS:
+        raise RuntimeError(f"preset de fitness desconocido: {preset!r}")
+    weights = dict(PRESETS[preset]["weights"]) if preset else {}
+    weights.update(spec.get("weights", {}))
+    if not weights:
+        weights = dict(PRESETS["default"]["weights"])
+    return FitnessSpec(weights, spec.get("constraints"), name=preset or name)
+
+
+def pareto_front(points: List[Dict[str, Any]], objectives: List[str]) -> List[Dict[str, Any]]:
+    """
+    Puntos no dominados (minimización). Cada punto: {"label": ..., "values": {obj: v}}.
+    Los objetivos sin valor en algún punto se ignoran para ese par.
+    """
+    def dominates(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+        keys = [k for k in objectives if a["values"].get(k) is not None and b["values"].get(k) is not None]
+        if not keys:
+            return False
+        return (all(a["values"][k] <= b["values"][k] for k in keys)
+                and any(a["values"][k] < b["values"][k] for k in keys))
+
+    return [p for p in points if not any(dominates(q, p) for q in points if q is not p)]
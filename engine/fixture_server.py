@@ -0,0 +1,250 @@
+# engine/fixture_server.py
+"""
+Servidor HTTP(S) local y determinista que sustituye a internet en los
+benchmarks de las skills web.
+
+- Sirve páginas grabadas de engine/fixtures/web (manifest.json:
+  "host/ruta" -> {"file", "status", "headers", "content_type"}). La URL
+  https://example.com/a se pide como <base>/example.com/a; las plantillas y
+  winners web la reescriben solos si existe $GLADOS_FIXTURE_URL (_via_fixture).
+- Un host/ruta sin grabar se responde cerrando la conexión sin respuesta, como
+  un host inaccesible sin red (el cliente ve un ConnectionError).
+- Inyección de fallos reproducible: la decisión para la n-ésima petición de
+  cada ruta sale de Random(f"{seed}:{ruta}:{n}"), así la misma secuencia de
+  peticiones ve siempre las mismas latencias/errores. reset() pone los
+  contadores a cero (evolve lo llama antes de cada trial si no hay paralelismo).
+    latency_ms / jitter_ms : espera antes de responder (latency ± jitter)
+    error_rate             : proporción de 503 (con Retry-After: 0)
+    redirect_rate          : proporción de 302 a la misma ruta (no encadena)
+    chunked / chunk_size   : cuerpo con Transfer-Encoding: chunked
+    slowloris_rate / slowloris_s : cuerpo goteado en trozos de 16 bytes
+                             repartidos en slowloris_s segundos
+- HTTPS con certfile/keyfile; el cliente debe confiar en el certificado
+  (REQUESTS_CA_BUNDLE / SSL_CERT_FILE).
+
+Uso:
+  python -m engine.fixture_server --port 8765 --latency-ms 40 --jitter-ms 20 --error-rate 0.1
+  GLADOS_FIXTURE_URL=http://127.0.0.1:8765 python winners/web_titles/main.py tasks/web_titles/input
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+ENV_VAR = "GLADOS_FIXTURE_URL"
+DEFAULT_ROOT = Path(__file__).with_name("fixtures") / "web"
+_REDIRECT_MARK = "_fx=redirect"
+
+# Opciones de fallo aceptadas por FixtureServer / --fixture-opts (nombre -> tipo)
+OPTIONS = {
+    "latency_ms": float, "jitter_ms": float, "error_rate": float,
+    "redirect_rate": float, "chunked": bool, "chunk_size": int,
+    "slowloris_rate": float, "slowloris_s": float, "seed": int,
+}
+
+
+def parse_opts(raw: str) -> Dict[str, Any]:
+    """'latency_ms=50,error_rate=0.1,chunked=1' -> dict tipado (RuntimeError si no es válido)."""
+    opts: Dict[str, Any] = {}
+    for part in (raw or "").split(","):
+        if not part.strip():
+            continue
+        k, _, v = part.partition("=")
+        k = k.strip()
+        if k not in OPTIONS:
+            raise RuntimeError(f"opción de fixtures desconocida: {k!r} ({', '.join(OPTIONS)})")
+        typ = OPTIONS[k]
+        opts[k] = v.strip().lower() in ("1", "true", "yes", "on") if typ is bool else typ(v)
+    return opts
+
+
+def _load_pages(root: Path) -> Dict[str, Dict[str, Any]]:
+    manifest = json.loads((root / "manifest.json").read_text(encoding="utf-8"))
+    pages = {}
+    for key, ent in manifest.items():
+        body = (root / ent["file"]).read_bytes() if ent.get("file") else b""
+        pages[key] = {
+            "status": int(ent.get("status", 200)),
+            "headers": dict(ent.get("headers", {})),
+            "content_type": ent.get("content_type", "text/html; charset=utf-8"),
+            "body": body,
+        }
+    return pages
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: el pooling de conexiones se mide de verdad
+    server: "_Server"
+
+    def log_message(self, fmt, *args) -> None:  # silencioso
+        pass
+
+    def do_HEAD(self) -> None:
+        self._serve(head=True)
+
+    def do_GET(self) -> None:
+        self._serve(head=False)
+
+    def _serve(self, head: bool) -> None:
+        fx: FixtureServer = self.server.fixture
+        parts = urlsplit(self.path)
+        key = parts.path.lstrip("/")
+        if "/" not in key:
+            key += "/"
+        page = fx.pages.get(key)
+        if page is None:
+            # host sin grabar: como sin red, ni siquiera hay respuesta
+            self.close_connection = True
+            return
+
+        rnd = fx.decide(key)
+        wait = fx.latency_ms + fx.jitter_ms * (2.0 * rnd.random() - 1.0)
+        if wait > 0:
+            time.sleep(wait / 1000.0)
+
+        if rnd.random() < fx.error_rate:
+            self._send(503, {"Retry-After": "0"}, "text/plain", b"fixture: 503\n", head)
+            return
+        if _REDIRECT_MARK not in parts.query and rnd.random() < fx.redirect_rate:
+            sep = "&" if parts.query else ""
+            self._send(302, {"Location": f"{parts.path}?{parts.query}{sep}{_REDIRECT_MARK}"},
+                       "text/plain", b"", head)
+            return
+        slow = rnd.random() < fx.slowloris_rate
+        self._send(page["status"], page["headers"], page["content_type"], page["body"], head,
+                   chunked=fx.chunked, slow=slow)
+
+    def _send(self, status: int, headers: Dict[str, str], ctype: str, body: bytes, head: bool,
+              *, chunked: bool = False, slow: bool = False) -> None:
+        fx: FixtureServer = self.server.fixture
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if head:
+            return
+        step = 16 if slow else (fx.chunk_size if chunked else max(1, len(body)))
+        pause = fx.slowloris_s * step / max(1, len(body)) if slow else 0.0
+        try:
+            for i in range(0, len(body), step):
+                piece = body[i:i + step]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece) if chunked else piece)
+                self.wfile.flush()
+                if pause:
+                    time.sleep(pause)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fixture: "FixtureServer"
+
+
+class FixtureServer:
+    """Servidor de fixtures en un hilo; start() devuelve la URL base."""
+
+    def __init__(self, root: Optional[str] = None, *, host: str = "127.0.0.1", port: int = 0,
+                 certfile: Optional[str] = None, keyfile: Optional[str] = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 redirect_rate: float = 0.0, chunked: bool = False, chunk_size: int = 512,
+                 slowloris_rate: float = 0.0, slowloris_s: float = 2.0, seed: int = 0) -> None:
+        self.root = Path(root) if root else DEFAULT_ROOT
+        self.pages = _load_pages(self.root)
+        self.host, self.port = host, port
+        self.certfile, self.keyfile = certfile, keyfile
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.error_rate, self.redirect_rate = error_rate, redirect_rate
+        self.chunked, self.chunk_size = chunked, max(1, chunk_size)
+        self.slowloris_rate, self.slowloris_s = slowloris_rate, slowloris_s
+        self.seed = seed
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._httpd: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def opts(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in OPTIONS}
+
+    def decide(self, key: str) -> random.Random:
+        with self._lock:
+            n = self._counts.get(key, 0)
+            self._counts[key] = n + 1
+        return random.Random(f"{self.seed}:{key}:{n}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.certfile else "http"
+        host = "127.0.0.1" if self.host in ("", "0.0.0.0") else self.host
+        return f"{scheme}://{host}:{self.port}"
+
+    def start(self) -> str:
+        httpd = _Server((self.host, self.port), _Handler)
+        httpd.fixture = self
+        if self.certfile:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(self.certfile, self.keyfile)
+            httpd.socket = ctx.wrap_socket(httpd.socket, server_side=True)
+        self.port = httpd.server_address[1]
+        self._httpd = httpd
+        self._thread = threading.Thread(target=httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Servidor local de páginas grabadas para benchmarks web.")
+    ap.add_argument("--root", default=str(DEFAULT_ROOT), help="Carpeta con manifest.json y las páginas")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--certfile", default=None, help="Certificado PEM (activa HTTPS)")
+    ap.add_argument("--keyfile", default=None)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Proporción de respuestas 503")
+    ap.add_argument("--redirect-rate", type=float, default=0.0, help="Proporción de 302")
+    ap.add_argument("--chunked", action="store_true", help="Transfer-Encoding: chunked")
+    ap.add_argument("--chunk-size", type=int, default=512)
+    ap.add_argument("--slowloris-rate", type=float, default=0.0, help="Proporción de cuerpos goteados")
+    ap.add_argument("--slowloris-s", type=float, default=2.0, help="Duración del goteo (s)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    srv = FixtureServer(args.root, host=args.host, port=args.port,
+                        certfile=args.certfile, keyfile=args.keyfile,
+                        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, redirect_rate=args.redirect_rate,
+                        chunked=args.chunked, chunk_size=args.chunk_size,
+                        slowloris_rate=args.slowloris_rate, slowloris_s=args.slowloris_s,
+                        seed=args.seed)
+    print(f"[fixtures] {srv.start()}  ({len(srv.pages)} páginas, export {ENV_VAR}=...)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.stop()
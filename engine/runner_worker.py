@@ -0,0 +1,155 @@
+# engine/runner_worker.py
+"""
+Runner residente DENTRO del contenedor (solo stdlib; se copia a /tmp con docker cp).
+
+- Al arrancar importa una vez los módulos pesados (requests, bs4, lxml, polars...)
+  y anuncia {"ready": true} por stdout.
+- Protocolo: una petición JSON por línea en stdin
+      {"script": "main.py", "argv": ["/input"], "cwd": "/app", "timeout_s": 15}
+  y una respuesta JSON por línea en stdout
+      {"rc": 0, "stdout": "...", "stderr": "...", "time_s": 0.012, "peak_mb": 31.2, ...}
+- Cada trial es un fork() del padre pre-importado: el hijo redirige stdout/stderr
+  a ficheros temporales y ejecuta el script como __main__. time_s se mide aquí
+  dentro (fork -> wait4), sin la latencia de `docker exec` del host, y el rusage
+  de wait4 da pico RSS, CPU user/sys y E/S (trial_wrapper.wait_usage; se copia
+  junto a este fichero). Nota: el pico RSS incluye las páginas heredadas del
+  padre pre-importado (constante para todos los candidatos).
+"""
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from trial_wrapper import wait_usage
+
+DEFAULT_PRELOAD = "requests,bs4,lxml.html,polars,csv,json,re,concurrent.futures"
+
+
+def _preload() -> list:
+    loaded = []
+    for name in os.environ.get("GLADOS_WORKER_PRELOAD", DEFAULT_PRELOAD).split(","):
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            __import__(name)
+            loaded.append(name)
+        except Exception:
+            pass
+    return loaded
+
+
+def _child(script: str, argv: list, cwd: str, out_path: str, err_path: str) -> None:
+    """Proceso hijo: nunca retorna (os._exit)."""
+    code = 1
+    try:
+        os.setpgid(0, 0)  # grupo propio: el timeout mata también a los nietos
+        os.chdir(cwd)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        for path, fd in ((out_path, 1), (err_path, 2)):
+            f = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.dup2(f, fd)
+            os.close(f)
+        sys.argv = [script, *argv]
+        sys.path.insert(0, cwd)
+        import runpy
+        try:
+            runpy.run_path(script, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            pass
+        os._exit(code)
+
+
+def _run(req: dict) -> dict:
+    script = req.get("script", "main.py")
+    argv = list(req.get("argv", []))
+    cwd = req.get("cwd", "/app")
+    timeout_s = float(req.get("timeout_s", 15))
+
+    tmpdir = tempfile.mkdtemp(prefix="glados_trial_")
+    out_path = os.path.join(tmpdir, "stdout")
+    err_path = os.path.join(tmpdir, "stderr")
+
+    sys.stdout.flush()
+    t0 = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        _child(script, argv, cwd, out_path, err_path)
+
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    timer = threading.Timer(timeout_s, _kill)
+    timer.start()
+    rc, usage = wait_usage(pid)
+    dt = time.perf_counter() - t0
+    timer.cancel()
+
+    def _read(path: str) -> str:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    out, err = _read(out_path), _read(err_path)
+    for path in (out_path, err_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    try:
+        os.rmdir(tmpdir)
+    except OSError:
+        pass
+
+    if timed_out.is_set():
+        return {"rc": -9, "stdout": "", "stderr": "TIMEOUT", "time_s": dt, **usage}
+    return {"rc": rc, "stdout": out, "stderr": err, "time_s": dt, **usage}
+
+
+def main() -> None:
+    loaded = _preload()
+    sys.stdout.write(json.dumps({"ready": True, "preloaded": loaded}) + "\n")
+    sys.stdout.flush()
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            res = _run(json.loads(line))
+        except Exception as e:
+            res = {"rc": -1, "stdout": "", "stderr": f"worker error: {e}", "time_s": 0.0}
+        sys.stdout.write(json.dumps(res) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
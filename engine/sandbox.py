@@ -1,12 +1,48 @@
 # engine/sandbox.py
-import subprocess, time, threading, psutil
-from typing import List, Dict, Any
+import os, subprocess, time, threading, uuid, psutil
+from typing import Callable, List, Dict, Any, Optional
+
+# Raíz de cgroup v2 delegada al usuario (opcional) para medir el árbol completo
+CGROUP_ROOT_ENV = "GLADOS_CGROUP_ROOT"
+
+
+def run(cmd: List[str], cwd: str, timeout_s: int = 30,
+        affinity: Optional[List[int]] = None, measure: str = "poll",
+        cgroup_root: Optional[str] = None,
+        on_stdout: Optional[Callable[[str], bool]] = None,
+        env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Ejecuta cmd en cwd y devuelve rc, stdout, stderr, time_s, peak_mb.
+    affinity: CPUs a las que se fija el proceso (Linux); los hijos la heredan.
+    measure:
+      - "poll"   : psutil.memory_info() cada 50 ms en un hilo (solo el proceso raíz)
+      - "rusage" : sin muestreo; wait4 da el maxrss del árbol esperado, CPU user/sys,
+                   cambios de contexto y fallos de página; con cgroup v2 delegado
+                   (cgroup_root o $GLADOS_CGROUP_ROOT) peak_mb es memory.peak del árbol
+      - "auto"   : rusage si la plataforma tiene wait4, si no poll
+    on_stdout: se llama con cada línea de stdout según la escribe el hijo; si
+      devuelve False se mata el proceso y el resultado lleva "aborted": True
+      (p.ej. evaluator.StreamingComparator.feed para fallar en la 1ª diferencia).
+    En "rusage" y con on_stdout el resultado incluye ttfo_s (tiempo hasta la
+    primera línea de stdout).
+    env: variables añadidas al entorno heredado (p.ej. GLADOS_FIXTURE_URL); {}
+      hereda el entorno tal cual, igual que None.
+    """
+    if env is not None:
+        env = {**os.environ, **env}
+    if measure == "auto":
+        measure = "rusage" if hasattr(os, "wait4") else "poll"
+    if measure == "rusage" and hasattr(os, "wait4"):
+        return _run_rusage(cmd, cwd, timeout_s, affinity,
+                           cgroup_root or os.environ.get(CGROUP_ROOT_ENV), on_stdout, env)
+    if on_stdout is not None:
+        return _run_streaming(cmd, cwd, timeout_s, affinity, on_stdout, env)
 
-def run(cmd: List[str], cwd: str, timeout_s: int = 30) -> Dict[str, Any]:
     start = time.perf_counter()
     proc = subprocess.Popen(
-        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env
     )
+    _pin(proc.pid, affinity)
     p = psutil.Process(proc.pid)
     peak_mb = 0.0
     stop_flag = False
@@ -40,3 +76,228 @@ def run(cmd: List[str], cwd: str, timeout_s: int = 30) -> Dict[str, Any]:
 
     wall = time.perf_counter() - start
     return {"rc": rc, "stdout": out, "stderr": err, "time_s": wall, "peak_mb": peak_mb}
+
+
+def _start_readers(proc: subprocess.Popen, bufs: Dict[str, List[str]],
+                   on_stdout: Optional[Callable[[str], bool]], abort,
+                   t0: float, first: Dict[str, float]) -> List[threading.Thread]:
+    """
+    Drena stdout/stderr en hilos. Con on_stdout, stdout se lee línea a línea y
+    se llama a abort() en cuanto el callback devuelve False. En ambos casos
+    first["ttfo_s"] = segundos desde t0 hasta la primera línea de stdout.
+    """
+    def drain(stream, key):
+        try:
+            bufs[key].append(stream.read())
+        except Exception:
+            pass
+
+    def drain_out(stream):
+        try:
+            line = stream.readline()
+            if line:
+                first["ttfo_s"] = time.perf_counter() - t0
+            bufs["out"].append(line)
+            bufs["out"].append(stream.read())
+        except Exception:
+            pass
+
+    def stream_lines(stream):
+        try:
+            for line in stream:
+                if not bufs["out"]:
+                    first["ttfo_s"] = time.perf_counter() - t0
+                bufs["out"].append(line)
+                if not on_stdout(line):
+                    abort()
+                    bufs["out"].append(stream.read())  # vacía el pipe hasta que muera
+                    break
+        except Exception:
+            pass
+
+    readers = [threading.Thread(target=drain, args=(proc.stderr, "err"), daemon=True)]
+    if on_stdout is None:
+        readers.append(threading.Thread(target=drain_out, args=(proc.stdout,), daemon=True))
+    else:
+        readers.append(threading.Thread(target=stream_lines, args=(proc.stdout,), daemon=True))
+    for r in readers:
+        r.start()
+    return readers
+
+
+def _run_streaming(cmd: List[str], cwd: str, timeout_s: float,
+                   affinity: Optional[List[int]],
+                   on_stdout: Callable[[str], bool],
+                   env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Variante "poll" con stdout en streaming (sin communicate())."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env
+    )
+    _pin(proc.pid, affinity)
+    p = psutil.Process(proc.pid)
+    peak_mb = 0.0
+    done = threading.Event()
+    aborted = threading.Event()
+
+    def monitor():
+        nonlocal peak_mb
+        while not done.is_set():
+            try:
+                rss = p.memory_info().rss / (1024 * 1024)
+                if rss > peak_mb:
+                    peak_mb = rss
+            except psutil.Error:
+                break
+            time.sleep(0.05)
+
+    def abort():
+        aborted.set()
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+    t = threading.Thread(target=monitor, daemon=True)
+    t.start()
+    bufs: Dict[str, List[str]] = {"out": [], "err": []}
+    first: Dict[str, float] = {}
+    readers = _start_readers(proc, bufs, on_stdout, abort, start, first)
+    try:
+        rc = proc.wait(timeout=timeout_s)
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        rc, timed_out = -9, True
+    wall = time.perf_counter() - start
+    done.set()
+    for r in readers:
+        r.join(timeout=1.0)
+    t.join(timeout=0.2)
+
+    if timed_out:
+        return {"rc": -9, "stdout": "", "stderr": "TIMEOUT", "time_s": wall, "peak_mb": peak_mb}
+    res = {"rc": rc, "stdout": "".join(bufs["out"]), "stderr": "".join(bufs["err"]),
+           "time_s": wall, "peak_mb": peak_mb, **first}
+    if aborted.is_set():
+        res["aborted"] = True
+    return res
+
+
+def can_pin() -> bool:
+    """True si la plataforma permite fijar CPUs (sched_setaffinity o psutil)."""
+    return hasattr(os, "sched_setaffinity") or hasattr(psutil.Process, "cpu_affinity")
+
+
+def _pin(pid: int, affinity: Optional[List[int]]) -> None:
+    if not affinity:
+        return
+    # Se fija tras el spawn (preexec_fn no es seguro con hilos)
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(pid, affinity)
+        elif hasattr(psutil.Process, "cpu_affinity"):
+            psutil.Process(pid).cpu_affinity(affinity)  # p.ej. Windows/FreeBSD
+    except (OSError, psutil.Error):
+        pass
+
+
+def _cgroup_create(root: Optional[str]) -> Optional[str]:
+    """Crea un cgroup hijo para el trial; None si no hay cgroup v2 delegado."""
+    if not root:
+        return None
+    path = os.path.join(root, f"glados_{uuid.uuid4().hex[:8]}")
+    try:
+        os.mkdir(path)
+        return path
+    except OSError:
+        return None
+
+
+def _cgroup_read(path: str, name: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, name), "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _cgroup_write(path: str, name: str, value: str) -> bool:
+    try:
+        with open(os.path.join(path, name), "w") as f:
+            f.write(value)
+        return True
+    except OSError:
+        return False
+
+
+def _run_rusage(cmd: List[str], cwd: str, timeout_s: float,
+                affinity: Optional[List[int]], cgroup_root: Optional[str],
+                on_stdout: Optional[Callable[[str], bool]] = None,
+                env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    from .trial_wrapper import wait_usage
+
+    cg = _cgroup_create(cgroup_root)
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env
+    )
+    _pin(proc.pid, affinity)
+    if cg and not _cgroup_write(cg, "cgroup.procs", str(proc.pid)):
+        cg = None
+
+    timed_out = threading.Event()
+    aborted = threading.Event()
+
+    def _kill_tree():
+        if not (cg and _cgroup_write(cg, "cgroup.kill", "1")):
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def kill():
+        timed_out.set()
+        _kill_tree()
+
+    def abort():
+        aborted.set()
+        _kill_tree()
+
+    # Drenado de pipes en hilos (sin communicate(): cosechamos nosotros con wait4)
+    bufs: Dict[str, List[str]] = {"out": [], "err": []}
+    first: Dict[str, float] = {}
+    readers = _start_readers(proc, bufs, on_stdout, abort, start, first)
+
+    timer = threading.Timer(timeout_s, kill)
+    timer.start()
+    rc, usage = wait_usage(proc.pid)
+    wall = time.perf_counter() - start
+    timer.cancel()
+    proc.returncode = rc  # ya cosechado con wait4
+    for r in readers:
+        r.join(timeout=1.0)
+
+    res: Dict[str, Any] = {
+        "rc": rc,
+        "stdout": "".join(bufs["out"]),
+        "stderr": "".join(bufs["err"]),
+        "time_s": wall,
+        **first,  # ttfo_s: tiempo hasta la primera línea de stdout
+    }
+    res.update(usage)  # peak_mb (maxrss), cpu_*, ctx_*, faults_*, io_*
+    if cg:
+        peak = _cgroup_read(cg, "memory.peak")
+        if peak and peak.strip().isdigit():
+            res["cg_peak_mb"] = int(peak) / (1024 * 1024)
+            res["peak_mb"] = res["cg_peak_mb"]  # pico del árbol completo
+        try:
+            os.rmdir(cg)
+        except OSError:
+            pass
+    if timed_out.is_set():
+        res.update({"rc": -9, "stdout": "", "stderr": "TIMEOUT"})
+    elif aborted.is_set():
+        res["aborted"] = True
+    return res
@@ -1,11 +1,41 @@
 ﻿# engine/sandbox_docker.py
 from __future__ import annotations
-import subprocess, shlex, time
+import subprocess, time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from .trial_wrapper import wrap_args, split_metrics
 
 IMAGE = "glados-runner:py312"  # <- fuerza nuestra imagen
 
+
+def _env_args(env: Optional[Dict[str, str]]) -> list:
+    """-e K=V por variable; con entorno se añade host.docker.internal (servidor de fixtures del host)."""
+    if not env:
+        return []
+    args = ["--add-host", "host.docker.internal:host-gateway"]
+    for k, v in env.items():
+        args += ["-e", f"{k}={v}"]
+    return args
+
+def bridge_gateway() -> str:
+    """
+    IP del host en la red bridge de docker (a la que apunta host-gateway), para
+    servicios del host que solo deben verse desde los contenedores. Sin docker o
+    sin gateway (Docker Desktop enruta host.docker.internal al loopback) se
+    devuelve 127.0.0.1.
+    """
+    try:
+        res = subprocess.run(
+            ["docker", "network", "inspect", "bridge",
+             "--format", "{{range .IPAM.Config}}{{.Gateway}} {{end}}"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return "127.0.0.1"
+    gws = [g for g in res.stdout.split() if "." in g]  # IPv4
+    return gws[0] if res.returncode == 0 and gws else "127.0.0.1"
+
 def run_in_docker(
     workdir: str,
     input_dir: str,
@@ -15,26 +45,45 @@ def run_in_docker(
     mem_mb: int = 256,
     network: str = "none",
     image: str = IMAGE,
+    cpuset: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
 ) -> Dict[str, Any]:
     workdir = str(Path(workdir).resolve())
     input_dir = str(Path(input_dir).resolve())
 
     name = f"glados_once_{int(time.time()*1000)}"
     print(f"[docker] usando imagen no persistente: {image}")
-    run_cmd = (
-        f'docker run --rm --name {shlex.quote(name)} '
-        f'--network {shlex.quote(network)} '
-        f'--cpus {cpus} -m {mem_mb}m '
-        f'-v "{workdir}:/app" -v "{input_dir}:/input" '
-        f'{image} python /app/main.py /input'
-    )
+    run_cmd = [
+        "docker", "run", "--rm", "--name", name,
+        "--network", network,
+        "--cpus", str(cpus), "-m", f"{mem_mb}m",
+        *(["--cpuset-cpus", cpuset] if cpuset else []),
+        *_env_args(env),
+        "-v", f"{workdir}:/app", "-v", f"{input_dir}:/input",
+        "-w", "/app",
+        image,
+        # envoltorio de medición: rusage + /proc/<pid>/io del hijo
+        *wrap_args(["/app/main.py", "/input"]),
+    ]
     t0 = time.time()
-    proc = subprocess.run(run_cmd, shell=True, capture_output=True, text=True, timeout=timeout_s)
+    try:
+        proc = subprocess.run(run_cmd, capture_output=True, text=True, timeout=timeout_s)
+        rc, out, err = proc.returncode, proc.stdout, proc.stderr
+    except subprocess.TimeoutExpired:
+        # el contenedor --rm sigue corriendo aunque muera el cliente
+        subprocess.run(["docker", "kill", name], capture_output=True, text=True, check=False)
+        rc, out, err = -9, "", "TIMEOUT"
     dt = time.time() - t0
-    return {
-        "rc": proc.returncode,
-        "stdout": proc.stdout,
-        "stderr": proc.stderr,
-        "time_s": dt,
+    stderr, usage = split_metrics(err)
+    res = {
+        "rc": rc,
+        "stdout": out,
+        "stderr": stderr,
+        # tiempo del trial medido por el wrapper (sin arrancar el contenedor);
+        # el del host solo si el wrapper no llegó a informar (p.ej. TIMEOUT)
+        "time_s": usage.pop("wall_s", dt),
         "peak_mb": 0.0,
+        "host_time_s": dt,
     }
+    res.update(usage)
+    return res
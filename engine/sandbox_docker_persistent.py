@@ -1,16 +1,28 @@
 ﻿# engine/sandbox_docker_persistent.py
 from __future__ import annotations
-import subprocess, shlex, uuid, time
+import subprocess, uuid, time, json, queue, threading
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from .sandbox_docker import _env_args
+from .trial_wrapper import kill_args, wrap_args, split_metrics
+
+# Margen del host sobre el timeout del trial antes de dar el worker por colgado
+WORKER_MARGIN_S = 5.0
+WORKER_START_S = 60.0  # arranque del worker (precarga de módulos)
+
 class DockerSandbox:
     """
     Mantiene un contenedor Docker vivo y ejecuta 'python main.py /input' vía `docker exec`.
     - Monta /app (workdir del experimento) RW
     - Monta /input (carpeta de datos) RO
-    - Limita CPU/RAM
+    - Limita CPU/RAM (y opcionalmente fija CPUs con cpuset, p.ej. "2" o "2,3")
     - Red configurable ("none" para sin internet, "bridge" para permitir)
+    - worker=True: arranca engine/runner_worker.py dentro del contenedor (módulos
+      pre-importados, un fork por trial) y time_s se mide dentro del contenedor;
+      si el worker no responde en timeout_s + WORKER_MARGIN_S se mata, se
+      rearranca y el trial cuenta como TIMEOUT
+    - env: variables de entorno del contenedor (las heredan todos los `docker exec`)
     """
 
     def __init__(
@@ -23,6 +35,9 @@ class DockerSandbox:
         mem_mb: int = 256,
         network: str = "none",   # "none" (sin internet) o "bridge" (con internet)
         name: Optional[str] = None,
+        cpuset: Optional[str] = None,
+        worker: bool = False,
+        env: Optional[Dict[str, str]] = None,
     ) -> None:
         self.workdir = str(Path(workdir).resolve())
         self.root_dir_abs = str(Path(root_dir_abs).resolve())
@@ -31,6 +46,11 @@ class DockerSandbox:
         self.mem_mb = mem_mb
         self.network = network
         self.name = name or f"glados_persist_{uuid.uuid4().hex[:8]}"
+        self.cpuset = cpuset
+        self.worker = worker
+        self.env = dict(env or {})
+        self._worker_proc: Optional[subprocess.Popen] = None
+        self._worker_lines: Optional[queue.Queue] = None
         self._started = False
 
     def _run(self, cmd_list: list[str]) -> subprocess.CompletedProcess:
@@ -53,6 +73,8 @@ class DockerSandbox:
             "--name", self.name,
             "--cpus", str(self.cpus),
             "-m", f"{self.mem_mb}m",
+            *(["--cpuset-cpus", self.cpuset] if self.cpuset else []),
+            *_env_args(self.env),
             "--network", self.network,
             "-v", f"{self.workdir}:/app",
             "-v", f"{self.root_dir_abs}:/input:ro",
@@ -67,41 +89,131 @@ class DockerSandbox:
                 f"STDOUT:\n{res.stdout}\nSTDERR:\n{res.stderr}"
             )
         self._started = True
+        if self.worker:
+            self._start_worker()
+
+    def _start_worker(self) -> None:
+        # runner_worker importa wait_usage de trial_wrapper: se copian juntos
+        self._run(["docker", "exec", self.name, "mkdir", "-p", "/tmp/glados"])
+        for fname in ("runner_worker.py", "trial_wrapper.py"):
+            src = Path(__file__).with_name(fname)
+            res = self._run(["docker", "cp", str(src), f"{self.name}:/tmp/glados/{fname}"])
+            if res.returncode != 0:
+                raise RuntimeError(f"docker cp worker failed:\n{res.stderr}")
+        self._worker_proc = subprocess.Popen(
+            ["docker", "exec", "-i", self.name, "python", "-u", "/tmp/glados/runner_worker.py"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        # Las respuestas se leen en un hilo: el host espera con plazo (válido también en Windows)
+        lines: queue.Queue = queue.Queue()
+        self._worker_lines = lines
+
+        def _pump(out=self._worker_proc.stdout) -> None:
+            for ln in out:
+                lines.put(ln)
+            lines.put("")  # EOF
+
+        threading.Thread(target=_pump, name=f"{self.name}-worker", daemon=True).start()
+        try:
+            hello = lines.get(timeout=WORKER_START_S)
+        except queue.Empty:
+            hello = ""
+        if not hello.strip().startswith("{"):
+            self._kill_worker()
+            raise RuntimeError(f"runner_worker no arrancó en {self.name}: {hello!r}")
+
+    def _kill_worker(self) -> None:
+        # matar el `docker exec` del host no detiene el worker (ni su trial) dentro del contenedor
+        if self._worker_proc is not None:
+            self._worker_proc.kill()
+            self._worker_proc = None
+        self._worker_lines = None
+        self._run(["docker", "exec", self.name, *kill_args("runner_worker.py")])
+
+    def _exec_worker(self, args: list[str], timeout_s: int) -> Dict[str, Any]:
+        wp = self._worker_proc
+        req = {"script": args[0], "argv": list(args[1:]), "cwd": "/app", "timeout_s": timeout_s}
+        t0 = time.perf_counter()
+        try:
+            wp.stdin.write(json.dumps(req) + "\n")
+            wp.stdin.flush()
+            line = self._worker_lines.get(timeout=timeout_s + WORKER_MARGIN_S)
+        except queue.Empty:
+            # worker colgado (no solo el trial): se mata y se rearranca
+            host_dt = time.perf_counter() - t0
+            self._kill_worker()
+            self._run(["docker", "exec", self.name, *kill_args(str(args[0]))])
+            self._start_worker()
+            return {"rc": -9, "stdout": "", "stderr": "TIMEOUT (runner_worker sin respuesta)",
+                    "time_s": host_dt, "peak_mb": 0.0, "host_time_s": host_dt}
+        except OSError:
+            line = ""  # pipe roto: el worker murió
+        host_dt = time.perf_counter() - t0
+        if not line:
+            raise RuntimeError(f"runner_worker terminó inesperadamente en {self.name}")
+        res = json.loads(line)
+        res.setdefault("peak_mb", 0.0)
+        res["host_time_s"] = host_dt  # referencia: incluye el viaje por el pipe
+        return res
 
     def exec_python(self, args: list[str], timeout_s: int = 15) -> Dict[str, Any]:
         """
-        Ejecuta `python -u <args...>` dentro del contenedor.
-        Devuelve: rc, stdout, stderr, time_s, peak_mb
+        Ejecuta `python -u <args...>` dentro del contenedor, envuelto por
+        trial_wrapper para medir pico RSS, CPU user/sys y bytes de E/S.
+        Devuelve: rc, stdout, stderr, time_s, peak_mb, cpu_user_s, cpu_sys_s,
+        io_read_bytes, io_write_bytes
         """
         if not self._started:
             raise RuntimeError("Sandbox not started. Call start() first.")
+        if self._worker_proc is not None:
+            return self._exec_worker(args, timeout_s)
 
-        # Construimos la línea de shell dentro del contenedor
-        # Ejemplo: python -u main.py /input
-        inner = "python -u " + " ".join(shlex.quote(a) for a in args)
-        cmd = ["docker", "exec", "-i", self.name, "sh", "-lc", f"cd /app && {inner}"]
+        # Ejemplo: python -c <trial_wrapper> main.py /input  (el wrapper lanza python -u)
+        cmd = ["docker", "exec", "-i", "-w", "/app", self.name, *wrap_args(list(args))]
 
         t0 = time.perf_counter()
-        proc = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout_s,
-            check=False,
-        )
+        try:
+            proc = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=timeout_s,
+                check=False,
+            )
+            rc, out, err = proc.returncode, proc.stdout, proc.stderr
+        except subprocess.TimeoutExpired:
+            # el proceso sigue vivo dentro del contenedor: hay que matarlo allí
+            self._run(["docker", "exec", self.name, *kill_args(str(args[0]))])
+            rc, out, err = -9, "", "TIMEOUT"
         dt = time.perf_counter() - t0
+        stderr, usage = split_metrics(err)
 
-        return {
-            "rc": proc.returncode,
-            "stdout": proc.stdout,
-            "stderr": proc.stderr,
-            "time_s": dt,      # ahora medimos tiempo real
-            "peak_mb": 0.0,    # sin medición de memoria por ahora
+        res = {
+            "rc": rc,
+            "stdout": out,
+            "stderr": stderr,
+            "time_s": usage.pop("wall_s", dt),  # del wrapper: sin docker exec ni su arranque
+            "peak_mb": 0.0,    # lo sobreescribe el wrapper si pudo medir
+            "host_time_s": dt,
         }
+        res.update(usage)
+        return res
 
     def stop(self) -> None:
         if not self._started:
             return
+        if self._worker_proc is not None:
+            try:
+                self._worker_proc.stdin.close()
+                self._worker_proc.wait(timeout=2)
+            except Exception:
+                self._worker_proc.kill()
+            self._worker_proc = None
+            self._worker_lines = None
         # Intenta parar/limpiar el contenedor
         self._run(["docker", "rm", "-f", self.name])
         self._started = False
@@ -0,0 +1,366 @@
+# engine/sandbox_pool.py
+"""
+Pool de contenedores Docker calientes (pre-arrancados) por perfil
+(image, cpus, mem_mb, network).
+
+- Cada contenedor del pool tiene /app y /input internos (sin bind mounts), así
+  puede servir a cualquier experimento: al alquilarlo (bind) se copia la
+  carpeta de input con `docker cp` (solo si cambió) y en cada trial se envía
+  main.py por stdin dentro del mismo `docker exec`.
+- Al devolverlo (stop/release) se limpia /app para que el siguiente trial no
+  herede ficheros (.cache_web, salidas...).
+- Reutilizable entre llamadas consecutivas a evolve() del mismo proceso
+  (registro a nivel de módulo) y entre ejecuciones de cli.py a través de un
+  daemon local:
+
+      python -m engine.sandbox_pool serve --size 4
+
+  Los clientes alquilan nombres de contenedor al daemon y ejecutan con
+  `docker exec` directamente; si la conexión se cae, el daemon recupera los
+  contenedores que tenía alquilados. Transporte de engine/daemon.py (JSON con
+  secreto aleatorio en workspace/.daemon/pool.key, 0600).
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import os
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import daemon
+from .trial_wrapper import kill_args, split_metrics, wrap_args
+
+IMAGE = "glados-runner:py312"
+DEFAULT_ADDRESS = ("127.0.0.1", 47321)
+Profile = Tuple[str, float, int, str]  # (image, cpus, mem_mb, network)
+
+
+def _authkey(create: bool = False) -> bytes:
+    return daemon.authkey("pool", "GLADOS_POOL_KEY", create=create)
+
+
+def _address() -> Tuple[str, int]:
+    return daemon.address("GLADOS_POOL_ADDR", DEFAULT_ADDRESS)
+
+
+def make_profile(image: str = IMAGE, cpus: float = 1.0, mem_mb: int = 256, network: str = "none") -> Profile:
+    return (image, float(cpus), int(mem_mb), network)
+
+
+def _docker(args: List[str], **kw) -> subprocess.CompletedProcess:
+    return subprocess.run(["docker", *args], capture_output=True, text=True, check=False, **kw)
+
+
+_ALL_CPUS: Optional[str] = None
+
+
+def _all_cpus() -> str:
+    """cpuset con todas las CPUs del daemon Docker (p.ej. "0-7"), calculado una vez."""
+    global _ALL_CPUS
+    if _ALL_CPUS is None:
+        res = _docker(["info", "--format", "{{.NCPU}}"])
+        try:
+            n = int(res.stdout.strip())
+        except ValueError:
+            n = os.cpu_count() or 1
+        _ALL_CPUS = f"0-{n - 1}" if n > 1 else "0"
+    return _ALL_CPUS
+
+
+def _input_signature(input_dir: str) -> Tuple[str, int, float]:
+    """
+    Firma barata del árbol de input (ruta, nº entradas, mtime máximo), recorrido
+    entero: un cambio en una subcarpeta también obliga a re-copiar.
+    """
+    n, newest = 0, 0.0
+    for dirpath, dirnames, filenames in os.walk(input_dir):
+        for name in dirnames + filenames:
+            try:
+                newest = max(newest, os.stat(os.path.join(dirpath, name)).st_mtime)
+            except OSError:
+                continue
+            n += 1
+    return (input_dir, n, newest)
+
+
+class PooledSandbox:
+    """
+    Contenedor alquilado del pool. Misma interfaz que DockerSandbox
+    (exec_python / stop) para que evolve() no distinga entre ambos.
+    """
+
+    def __init__(self, name: str, profile: Profile, owner=None) -> None:
+        self.name = name
+        self.profile = profile
+        self.owner = owner  # SandboxPool o PoolClient que lo prestó
+        self.workdir: Optional[str] = None
+        self._input_sig: Optional[Tuple[str, int, float]] = None
+        self.env: Dict[str, str] = {}
+
+    def bind(self, workdir: str, input_dir: str, cpuset: Optional[str] = None,
+             env: Optional[Dict[str, str]] = None) -> None:
+        """
+        Asocia el contenedor a un experimento: workdir del host e input en /input.
+        env se pasa en cada `docker exec` (el contenedor es compartido entre experimentos).
+        El cpuset se fija en cada alquiler (sin cpuset: todas las CPUs), así no
+        se hereda el del experimento anterior.
+        """
+        self.workdir = str(Path(workdir).resolve())
+        self.env = dict(env or {})
+        Path(self.workdir).mkdir(parents=True, exist_ok=True)
+        res = _docker(["update", "--cpuset-cpus", cpuset or _all_cpus(), self.name])
+        if res.returncode != 0 and cpuset:
+            raise RuntimeError(f"docker update cpuset failed ({self.name}):\n{res.stderr}")
+
+        sig = _input_signature(str(Path(input_dir).resolve()))
+        if sig != self._input_sig:
+            _docker(["exec", self.name, "sh", "-c", "rm -rf /input && mkdir -p /input"])
+            res = _docker(["cp", f"{sig[0]}{os.sep}.", f"{self.name}:/input"])
+            if res.returncode != 0:
+                raise RuntimeError(f"docker cp input failed ({self.name}):\n{res.stderr}")
+            self._input_sig = sig
+
+    def exec_python(self, args: list[str], timeout_s: int = 15) -> Dict[str, Any]:
+        """
+        Copia <workdir>/main.py a /app por stdin y ejecuta `python -u <args...>`
+        (envuelto por trial_wrapper) en el mismo `docker exec`.
+        Devuelve: rc, stdout, stderr, time_s, peak_mb (+ CPU y E/S si se midieron)
+        """
+        if not self.workdir:
+            raise RuntimeError("PooledSandbox not bound. Call bind() first.")
+        code = (Path(self.workdir) / "main.py").read_text(encoding="utf-8")
+        wrapper = wrap_args(list(args))
+        # main.py llega por stdin; el wrapper (rusage/E/S) se pasa por entorno
+        inner = 'cat > /app/main.py && cd /app && exec python -c "$GLADOS_WRAPPER" "$@"'
+        env = [a for k, v in self.env.items() for a in ("-e", f"{k}={v}")]
+        cmd = ["docker", "exec", "-i", "-e", f"GLADOS_WRAPPER={wrapper[2]}", *env, self.name,
+               "sh", "-c", inner, "sh", *wrapper[3:]]
+
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.run(cmd, input=code, capture_output=True, text=True,
+                                  timeout=timeout_s, check=False)
+            rc, out, err = proc.returncode, proc.stdout, proc.stderr
+        except subprocess.TimeoutExpired:
+            # matar el `docker exec` del host no detiene el trial dentro del contenedor
+            _docker(["exec", self.name, *kill_args(str(args[0]))])
+            rc, out, err = -9, "", "TIMEOUT"
+        dt = time.perf_counter() - t0
+        err, usage = split_metrics(err)
+        # time_s del wrapper (sin docker exec ni su arranque); el del host queda de referencia
+        res = {"rc": rc, "stdout": out, "stderr": err, "time_s": usage.pop("wall_s", dt),
+               "peak_mb": 0.0, "host_time_s": dt}
+        res.update(usage)
+        return res
+
+    def reset(self) -> None:
+        """Vacía /app (el input se conserva para el siguiente alquiler del mismo task)."""
+        _docker(["exec", self.name, "sh", "-c", "rm -rf /app/* /app/.[!.]* 2>/dev/null; true"])
+
+    def stop(self) -> None:
+        """Devuelve el contenedor al pool (no lo destruye)."""
+        if self.owner is not None:
+            self.owner.release(self)
+            self.owner = None
+
+
+class SandboxPool:
+    """
+    Mantiene `size` contenedores calientes de un perfil. lease() presta uno
+    (arrancando extra si todos están ocupados); release() lo limpia y lo
+    devuelve, destruyendo los que sobren por encima de `size`.
+    """
+
+    def __init__(self, profile: Profile, size: int = 2) -> None:
+        self.profile = profile
+        self.size = max(1, size)
+        self._idle: List[PooledSandbox] = []
+        self._leased: Dict[str, PooledSandbox] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.append(self._start_one())
+
+    def _start_one(self) -> PooledSandbox:
+        image, cpus, mem_mb, network = self.profile
+        name = f"glados_pool_{uuid.uuid4().hex[:8]}"
+        res = _docker([
+            "run", "-d", "--rm",
+            "--name", name,
+            "--cpus", str(cpus),
+            "-m", f"{mem_mb}m",
+            "--network", network,
+            # servidor de fixtures del host (engine/fixture_server.py) si el experimento lo usa
+            "--add-host", "host.docker.internal:host-gateway",
+            "-w", "/app",
+            image,
+            "sh", "-c", "mkdir -p /app /input && sleep infinity",
+        ])
+        if res.returncode != 0:
+            raise RuntimeError(
+                f"Docker run failed (image={image}):\n"
+                f"STDOUT:\n{res.stdout}\nSTDERR:\n{res.stderr}"
+            )
+        return PooledSandbox(name, self.profile)
+
+    def lease(self) -> PooledSandbox:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SandboxPool closed")
+            sb = self._idle.pop() if self._idle else None
+        if sb is None:
+            sb = self._start_one()
+        sb.owner = self
+        with self._lock:
+            self._leased[sb.name] = sb
+        return sb
+
+    def release(self, sb: PooledSandbox) -> None:
+        with self._lock:
+            self._leased.pop(sb.name, None)
+            keep = not self._closed and len(self._idle) < self.size
+        if keep:
+            sb.reset()
+            sb.owner = None
+            with self._lock:
+                self._idle.append(sb)
+        else:
+            _docker(["rm", "-f", sb.name])
+
+    def release_name(self, name: str) -> None:
+        with self._lock:
+            sb = self._leased.get(name)
+        self.release(sb or PooledSandbox(name, self.profile))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"profile": list(self.profile), "size": self.size,
+                    "idle": len(self._idle), "leased": len(self._leased)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            names = [sb.name for sb in self._idle] + list(self._leased)
+            self._idle.clear()
+            self._leased.clear()
+        for name in names:
+            _docker(["rm", "-f", name])
+
+
+# ============================================================
+# Registro en proceso (reutilizado entre evolve() consecutivos)
+# ============================================================
+
+_POOLS: Dict[Profile, SandboxPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(profile: Profile, size: int = 2) -> SandboxPool:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(profile)
+        if pool is None:
+            pool = _POOLS[profile] = SandboxPool(profile, size=size)
+        return pool
+
+
+@atexit.register
+def _close_pools() -> None:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
+
+
+# ============================================================
+# Daemon local (entre ejecuciones de cli.py)
+# ============================================================
+
+class PoolClient:
+    """Cliente del daemon: misma interfaz lease()/release() que SandboxPool."""
+
+    def __init__(self, profile: Profile, size: int = 2, address: Optional[Tuple[str, int]] = None) -> None:
+        self.profile = profile
+        self.size = size
+        self._client = daemon.DaemonClient(address or _address(), _authkey(), "sandbox pool daemon")
+
+    def lease(self) -> PooledSandbox:
+        name = self._client.call("lease", list(self.profile), self.size)
+        return PooledSandbox(name, self.profile, owner=self)
+
+    def release(self, sb: PooledSandbox) -> None:
+        self._client.call("release", list(self.profile), sb.name)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return self._client.call("stats")
+
+
+def connect_pool(profile: Profile, size: int = 2):
+    """Usa el daemon si está escuchando; si no, el pool en proceso."""
+    try:
+        return PoolClient(profile, size=size)
+    except OSError:
+        return get_pool(profile, size=size)
+
+
+def _profile(raw) -> Profile:
+    image, cpus, mem_mb, network = raw
+    return make_profile(str(image), float(cpus), int(mem_mb), str(network))
+
+
+class _PoolSession:
+    """Una conexión al daemon: sus alquileres se recuperan si el cliente cae."""
+
+    def __init__(self) -> None:
+        self.held: Dict[str, SandboxPool] = {}
+
+    def handle(self, op: str, *args):
+        if op == "lease":
+            pool = get_pool(_profile(args[0]), size=int(args[1]))
+            sb = pool.lease()
+            self.held[sb.name] = pool
+            return sb.name
+        if op == "release":
+            pool = self.held.pop(str(args[1]), None)
+            if pool is not None:
+                pool.release_name(str(args[1]))
+            return None
+        if op == "stats":
+            with _POOLS_LOCK:
+                pools = list(_POOLS.values())
+            return [p.stats() for p in pools]
+        raise ValueError(f"unknown op {op!r}")
+
+    def close(self) -> None:
+        for name, pool in self.held.items():
+            pool.release_name(name)
+
+
+def serve(address: Optional[Tuple[str, int]] = None, *, size: int = 2,
+          profiles: Optional[List[Profile]] = None) -> None:
+    for prof in profiles or []:
+        get_pool(prof, size=size)  # pre-calienta
+    daemon.serve(address or _address(), _authkey(create=True), _PoolSession, "pool")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Daemon del pool de sandboxes Docker calientes.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("serve")
+    sp.add_argument("--size", type=int, default=2, help="Contenedores calientes por perfil")
+    sp.add_argument("--image", default=IMAGE)
+    sp.add_argument("--cpus", type=float, default=1.0)
+    sp.add_argument("--mem", type=int, default=256)
+    sp.add_argument("--network", default="none")
+    sub.add_parser("stats")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        serve(size=args.size, profiles=[make_profile(args.image, args.cpus, args.mem, args.network)])
+    else:
+        print(PoolClient(make_profile()).stats())
@@ -0,0 +1,131 @@
+# engine/trial_cache.py
+"""
+Caché persistente de trials direccionada por contenido.
+
+Clave = sha256(código, árbol de input, expected, perfil del backend). El valor
+es la lista de resultados crudos del executor (rc, stdout, stderr, time_s,
+peak_mb, ...) de todas las ejecuciones hechas con esa clave, de modo que un
+trial repetido se "re-reproduce" a través de la misma ruta de evaluación
+(correctness + score relativo al baseline actual) sin tocar el sandbox.
+
+- TTL: entradas más viejas que ttl_s se consideran caducadas y se borran.
+- LRU acotada: cada acierto actualiza el mtime del fichero; al superar
+  max_entries se borran las de mtime más antiguo.
+- Hash del árbol de input con índice persistente (ruta -> tamaño, mtime, sha)
+  para no re-leer ficheros grandes que no han cambiado.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def _sha_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TrialCache:
+    def __init__(self, root: str = "workspace/.trial_cache", *,
+                 ttl_s: float = 7 * 86400, max_entries: int = 512) -> None:
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._index_path = self.root / "_file_index.json"
+        try:
+            self._index: Dict[str, List[Any]] = json.loads(self._index_path.read_text(encoding="utf-8"))
+        except Exception:
+            self._index = {}
+
+    # ---------------- claves ----------------
+
+    def file_digest(self, path: str) -> str:
+        st = os.stat(path)
+        ap = str(Path(path).resolve())
+        ent = self._index.get(ap)
+        if ent and ent[0] == st.st_size and ent[1] == st.st_mtime_ns:
+            return ent[2]
+        sha = _sha_file(ap)
+        self._index[ap] = [st.st_size, st.st_mtime_ns, sha]
+        return sha
+
+    def tree_digest(self, root: str) -> str:
+        """Hash del árbol (rutas relativas + contenido), en orden estable."""
+        h = hashlib.sha256()
+        base = Path(root).resolve()
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames.sort()
+            for name in sorted(filenames):
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, base).replace(os.sep, "/")
+                h.update(rel.encode("utf-8") + b"\0" + self.file_digest(full).encode("ascii") + b"\n")
+        self._save_index()
+        return h.hexdigest()
+
+    def key(self, code: str, input_digest: str, expected_digest: str, profile: Dict[str, Any]) -> str:
+        h = hashlib.sha256()
+        for part in (code, input_digest, expected_digest, json.dumps(profile, sort_keys=True)):
+            h.update(part.encode("utf-8") + b"\0")
+        return h.hexdigest()
+
+    # ---------------- almacenamiento ----------------
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> List[Dict[str, Any]]:
+        """Resultados guardados (lista vacía si no hay o caducaron)."""
+        p = self._path(key)
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            self.misses += 1
+            return []
+        if time.time() - data.get("ts", 0) > self.ttl_s:
+            p.unlink(missing_ok=True)
+            self.misses += 1
+            return []
+        os.utime(p)  # LRU: marca de último uso
+        self.hits += 1
+        return list(data.get("results", []))
+
+    def put(self, key: str, results: List[Dict[str, Any]]) -> None:
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"ts": time.time(), "results": results}), encoding="utf-8")
+        os.replace(tmp, p)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for sub in self.root.iterdir():
+            if sub.is_dir():
+                for f in sub.glob("*.json"):
+                    try:
+                        entries.append((f.stat().st_mtime, f))
+                    except OSError:
+                        pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, f in entries[: len(entries) - self.max_entries]:
+            f.unlink(missing_ok=True)
+
+    def _save_index(self) -> None:
+        try:
+            tmp = self._index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._index), encoding="utf-8")
+            os.replace(tmp, self._index_path)
+        except Exception:
+            pass
@@ -0,0 +1,170 @@
+# engine/trial_wrapper.py
+"""
+Envoltorio de medición para un trial (solo stdlib; pensado para Linux/contenedor).
+
+Lanza `python -u <args...>` como hijo, espera SIN cosechar (waitid WNOWAIT) para
+leer /proc/<pid>/io, y después cosecha con wait4 para obtener el rusage del árbol:
+  - wall_s         : tiempo de pared del hijo (de Popen a su salida), sin el
+                     arranque del propio wrapper ni el de `docker exec`/`run`
+  - peak_mb        : ru_maxrss (KB en Linux) del hijo y sus descendientes esperados
+  - cpu_user_s/sys : ru_utime / ru_stime
+  - ctx_vol/invol  : cambios de contexto voluntarios / involuntarios
+  - faults_min/maj : fallos de página menores / mayores
+  - io_read_bytes  : rchar de /proc/<pid>/io (o delta de io.stat del cgroup)
+  - io_write_bytes : wchar de /proc/<pid>/io (o delta de io.stat del cgroup)
+  - cg_peak_mb     : memory.peak del cgroup (solo informativo: es el pico de vida
+                     del contenedor, exacto en contenedores de un solo uso)
+
+Dentro del contenedor se usa así (sin copiar ficheros):
+    python -c "<fuente de este fichero>" main.py /input
+y deja en stderr una última línea "__GLADOS_METRICS__{json}" que el host separa
+con split_metrics(). También se importa desde el host (engine.trial_wrapper) y
+desde runner_worker.py (wait_usage).
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+MARKER = "__GLADOS_METRICS__"
+CGROUP = "/sys/fs/cgroup"
+
+
+def _proc_io(pid: int):
+    try:
+        with open(f"/proc/{pid}/io", "r") as f:
+            kv = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(kv["rchar"]), int(kv["wchar"])
+    except Exception:
+        return None
+
+
+def _cgroup_io():
+    """Suma rbytes/wbytes de io.stat (cgroup v2) o None."""
+    try:
+        r = w = 0
+        with open(os.path.join(CGROUP, "io.stat"), "r") as f:
+            for line in f:
+                for tok in line.split()[1:]:
+                    k, _, v = tok.partition("=")
+                    if k == "rbytes":
+                        r += int(v)
+                    elif k == "wbytes":
+                        w += int(v)
+        return r, w
+    except Exception:
+        return None
+
+
+def _cgroup_mem_peak_mb():
+    try:
+        with open(os.path.join(CGROUP, "memory.peak"), "r") as f:
+            return int(f.read().strip()) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def usage_from_rusage(ru) -> dict:
+    return {
+        "peak_mb": ru.ru_maxrss / 1024.0,  # Linux: KB
+        "cpu_user_s": ru.ru_utime,
+        "cpu_sys_s": ru.ru_stime,
+        "ctx_vol": ru.ru_nvcsw,
+        "ctx_invol": ru.ru_nivcsw,
+        "faults_min": ru.ru_minflt,
+        "faults_maj": ru.ru_majflt,
+    }
+
+
+def wait_usage(pid: int, cg_io_before=None):
+    """
+    Espera al hijo pid y devuelve (rc, métricas). Lee /proc/<pid>/io antes de
+    cosecharlo (WNOWAIT) para no perder los contadores de E/S.
+    """
+    io = None
+    if hasattr(os, "waitid"):
+        try:
+            os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+            io = _proc_io(pid)
+        except (OSError, ChildProcessError):
+            io = None
+    _, status, ru = os.wait4(pid, 0)
+    m = usage_from_rusage(ru)
+    if io is None and cg_io_before is not None:
+        after = _cgroup_io()
+        if after is not None:
+            io = (after[0] - cg_io_before[0], after[1] - cg_io_before[1])
+    if io is not None:
+        m["io_read_bytes"], m["io_write_bytes"] = io
+    return os.waitstatus_to_exitcode(status), m
+
+
+def split_metrics(stderr: str):
+    """Separa la línea de métricas del stderr del trial. Devuelve (stderr, métricas)."""
+    idx = (stderr or "").rfind(MARKER)
+    if idx < 0:
+        return stderr, {}
+    line = stderr[idx + len(MARKER):].strip().splitlines()
+    try:
+        metrics = json.loads(line[0]) if line else {}
+    except ValueError:
+        return stderr, {}
+    head = stderr[:idx]
+    if head.endswith("\n"):
+        head = head[:-1]  # el salto que añade main() antes del marcador
+    return head, metrics
+
+
+def wrap_args(args: list) -> list:
+    """Argumentos `python -c <wrapper> <args...>` para ejecutar dentro del contenedor."""
+    src = Path(__file__).read_text(encoding="utf-8")
+    return ["python", "-c", src, *args]
+
+
+# Mata (SIGKILL) los procesos del contenedor cuyo argv contiene sys.argv[1]
+_KILL_SRC = """
+import os, signal, sys
+me = os.getpid()
+for p in os.listdir("/proc"):
+    if not p.isdigit() or int(p) == me:
+        continue
+    try:
+        argv = open("/proc/%s/cmdline" % p, "rb").read().split(b"\\0")
+    except OSError:
+        continue
+    if any(a.endswith(sys.argv[1].encode()) for a in argv):
+        try:
+            os.kill(int(p), signal.SIGKILL)
+        except OSError:
+            pass
+"""
+
+
+def kill_args(script: str = "main.py") -> list:
+    """
+    Argumentos `python -c ...` que matan dentro del contenedor el trial en curso
+    (wrapper + script). Matar el cliente `docker exec` del host no lo detiene.
+    """
+    return ["python", "-c", _KILL_SRC, script]
+
+
+def main(args: list) -> int:
+    cg_io = _cgroup_io()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", *args])
+    rc, metrics = wait_usage(proc.pid, cg_io)
+    metrics["wall_s"] = time.perf_counter() - t0
+    proc.returncode = rc  # ya cosechado a mano
+    cg_peak = _cgroup_mem_peak_mb()
+    if cg_peak is not None:
+        metrics["cg_peak_mb"] = cg_peak
+    sys.stderr.flush()
+    sys.stderr.write("\n" + MARKER + json.dumps(metrics) + "\n")
+    sys.stderr.flush()
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
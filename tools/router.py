@@ -1,60 +1,122 @@
 #!/usr/bin/env python3
-import re, sys, json
+"""
+Router de prompts -> skill, importable (supervisor, agents/supervisor_service)
+y con CLI JSON.
 
-def route(q: str) -> str:
-    s = q.lower().strip()
+Las reglas (RULES) van por prioridad: gana la primera categoría con algún
+patrón que case en cualquier parte del prompt. Al cargar se compilan en un
+único patrón anclado con una rama por categoría en ese orden:
+
+    (?=.*?(?P<web_status_codes>...))|(?=.*?(?P<web_h1_texts>...))|...
+
+re.match prueba las ramas en orden y m.lastgroup es la skill: una sola
+llamada en C por prompt, sin recompilar ni iterar listas de patrones. Los
+prompts repetidos salen de un memo acotado.
+
+Uso:
+  python tools/router.py "dame los títulos de https://example.com"
+  python tools/router.py --batch prompts.txt        # un prompt por línea -> JSONL
+  python tools/router.py --bench 100000
+"""
+import re, sys, json, time, argparse
+
+DEFAULT_SKILL = "web_titles_hard"  # si no reconoce, usa títulos (seguro)
 
+RULES = [
     # 1) status codes (es/en) – ¡antes que títulos!
-    status_pats = [
-        r'\bc[oó]digos?\s*(de\s*)?(estado|http)\b',
+    ("web_status_codes", [
+        r'\bc[oó]digos?\s*(?:de\s*)?(?:estado|http)\b',
         r'\bestados?\s*http\b',
         r'\bhttp\s*status\b',
         r'\bstatus\s*codes?\b',
-    ]
-    if any(re.search(p, s, re.I) for p in status_pats):
-        return "web_status_codes"
-
+    ]),
     # 2) h1 texts
-    h1_pats = [
-        r'\b(h1|encabezad[oa]s?)\b',
+    ("web_h1_texts", [
+        r'\b(?:h1|encabezad[oa]s?)\b',
         r'\bt[íi]tulo\s*principal\b',
         r'\bheaders?\s*h1\b',
-    ]
-    if any(re.search(p, s, re.I) for p in h1_pats):
-        return "web_h1_texts"
-
+    ]),
     # 3) enlaces / links
-    links_pats = [
+    ("web_links", [
         r'\benlaces?\b',
         r'\blinks?\b',
         r'\bhiperv[ií]nculos?\b',
         r'\bhref\b',
         r'\b<a>\b',
-    ]
-    if any(re.search(p, s, re.I) for p in links_pats):
-        return "web_links"
-
+    ]),
     # 4) json api / apis
-    api_pats = [
+    ("web_json_api", [
         r'\bjson\b',
-        r'\bapi(s)?\b',
+        r'\bapis?\b',
         r'\bendpoints?\b',
-    ]
-    if any(re.search(p, s, re.I) for p in api_pats):
-        return "web_json_api"
-
-    # 5) títulos por defecto
-    title_pats = [
+    ]),
+    # 5) títulos
+    ("web_titles_hard", [
         r'\bt[íi]tulos?\b',
         r'\btitles?\b',
         r'\b<title>\b',
-    ]
-    if any(re.search(p, s, re.I) for p in title_pats):
-        return "web_titles_hard"
+    ]),
+]
 
-    # fallback: si no reconoce, usa títulos (seguro)
-    return "web_titles_hard"
+_MEMO_MAX = 4096
+
+class Router:
+    def __init__(self, rules=RULES, default=DEFAULT_SKILL):
+        self.default = default
+        self.skills = [skill for skill, _ in rules]
+        self._rx = re.compile(
+            "|".join(f"(?=.*?(?P<{skill}>{'|'.join(pats)}))" for skill, pats in rules),
+            re.I | re.S,
+        )
+        self._memo = {}
+
+    def route(self, q: str) -> str:
+        s = q.lower().strip()
+        hit = self._memo.get(s)
+        if hit is None:
+            m = self._rx.match(s)
+            hit = m.lastgroup if m else self.default
+            if len(self._memo) >= _MEMO_MAX:
+                self._memo.clear()
+            self._memo[s] = hit
+        return hit
+
+    def route_many(self, prompts) -> list:
+        route = self.route
+        return [route(q) for q in prompts]
+
+ROUTER = Router()
+
+def route(q: str) -> str:
+    return ROUTER.route(q)
+
+def route_many(prompts) -> list:
+    return ROUTER.route_many(prompts)
+
+def _bench(n: int) -> dict:
+    prompts = [f"dame los títulos de https://example.com/{i} y sus enlaces" for i in range(n)]
+    t = time.perf_counter()
+    Router().route_many(prompts)  # router nuevo: sin memo caliente, cada prompt es distinto
+    cold = time.perf_counter() - t
+    t = time.perf_counter()
+    ROUTER.route_many(prompts[:1] * n)
+    warm = time.perf_counter() - t
+    return {"n": n, "us_per_route": round(cold / n * 1e6, 3), "us_per_route_memo": round(warm / n * 1e6, 3)}
 
 if __name__ == "__main__":
-    prompt = sys.argv[1] if len(sys.argv) > 1 else ""
-    print(json.dumps({"skill": route(prompt)}, ensure_ascii=False))
\ No newline at end of file
+    ap = argparse.ArgumentParser(description="Elige la skill para un prompt (JSON).")
+    ap.add_argument("prompt", nargs="?", default="")
+    ap.add_argument("--batch", default="", help="Fichero con un prompt por línea ('-' = stdin); salida JSONL")
+    ap.add_argument("--bench", type=int, default=0, help="Mide el routing con N prompts")
+    args = ap.parse_args()
+
+    if args.bench:
+        print(json.dumps(_bench(args.bench)))
+    elif args.batch:
+        f = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8-sig")
+        with f:
+            prompts = [ln.rstrip("\r\n") for ln in f]
+        for p, skill in zip(prompts, route_many(prompts)):
+            print(json.dumps({"prompt": p, "skill": skill}, ensure_ascii=False))
+    else:
+        print(json.dumps({"skill": route(args.prompt)}, ensure_ascii=False))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# tools/scale_task.py
+"""
+Genera variantes grandes y parametrizadas de las tareas CSV, con su
+expected_stdout.txt calculado por una implementación de referencia.
+
+  csv_sizes  (como mi_tarea / sample_csv): N ficheros file_<i>.csv en la raíz
+             con tamaños únicos (sin empates: el orden esperado no es ambiguo),
+             más un árbol de `depth` niveles de distractores (csv anidados y
+             ficheros no-csv) que la tarea no debe contar. Los ficheros son
+             dispersos (truncate), así 100k ficheros no ocupan disco.
+             Referencia: "nombre,tamaño" de los *.csv de la raíz por tamaño desc.
+  csv_filter (como filtrar_csv): datos.csv con `size` filas name,score,date.
+             Referencia: score>=80, fecha desc, top 5 como "name,score" con
+             heapq.nlargest (mismo resultado que sorted(...)[:5], en streaming).
+             Las 5 fechas más recientes son únicas para que no haya empates.
+
+Uso:
+  python tools/scale_task.py csv_sizes --size 100000 --depth 4
+  python tools/scale_task.py csv_filter --size 50000000          # ~1.3 GB
+  python tools/scale_task.py csv_filter --ladder 1e4,1e5,1e6,1e7
+
+Cada variante va a tasks/<kind>_<size>/ (input/, expected_stdout.txt,
+fitness.json) y se imprime su ruta; cli.py --ladder las evoluciona en orden.
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import shutil
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+NAMES = ["Ana", "Luis", "Mar", "Dani", "Iris", "Pau", "Nora", "Joel", "Eva", "Hugo", "Sara", "Leo"]
+TOP_K = 5
+
+
+def _reset(task_dir: Path) -> Path:
+    inp = task_dir / "input"
+    if inp.exists():
+        shutil.rmtree(inp)
+    inp.mkdir(parents=True)
+    return inp
+
+
+def gen_csv_sizes(task_dir: Path, size: int, depth: int = 0, seed: int = 0) -> None:
+    rnd = random.Random(seed)
+    inp = _reset(task_dir)
+    sizes = list(range(1, size + 1))
+    rnd.shuffle(sizes)
+    for i, sz in enumerate(sizes, 1):
+        with open(inp / f"file_{i}.csv", "wb") as f:
+            f.truncate(sz)
+    # Distractores: subdirectorios con csv (no cuentan: solo la raíz) y no-csv
+    d = inp
+    for lvl in range(depth):
+        d = d / f"nested_{lvl}"
+        d.mkdir()
+        for j in range(max(1, size // (10 * depth))):
+            with open(d / f"deep_{lvl}_{j}.csv", "wb") as f:
+                f.truncate(size + 1 + rnd.randrange(1000))
+        (d / "notes.txt").write_text("no es csv\n", encoding="utf-8")
+    (inp / "README.txt").write_text("distractor\n", encoding="utf-8")
+
+    # Referencia
+    rows = []
+    with os.scandir(inp) as it:
+        for e in it:
+            if e.is_file() and e.name.endswith(".csv"):
+                rows.append((e.stat().st_size, e.name))
+    rows.sort(reverse=True)
+    with open(task_dir / "expected_stdout.txt", "w", encoding="utf-8", newline="\n") as f:
+        for sz, name in rows:
+            f.write(f"{name},{sz}\n")
+
+
+def gen_csv_filter(task_dir: Path, size: int, seed: int = 0) -> None:
+    rnd = random.Random(seed)
+    inp = _reset(task_dir)
+    d0 = date(2020, 1, 1)
+    span = 5 * 365
+    # Filas "top": fechas posteriores a todo el resto y distintas entre sí;
+    # se reparten al azar, mezcladas con distractores tardíos de score < 80
+    n_top = min(size, TOP_K + 3)
+    top = {i: span + k for k, i in enumerate(rnd.sample(range(size), n_top))}
+    buf = []
+    with open(inp / "datos.csv", "w", encoding="utf-8", newline="\n") as f:
+        f.write("name,score,date\n")
+        for i in range(size):
+            if i in top:
+                k = top[i] - span
+                sc = rnd.randint(80, 100) if k < TOP_K else rnd.randint(0, 79)
+                dt = d0 + timedelta(days=top[i] + 1)
+            else:
+                sc = rnd.randint(0, 100)
+                dt = d0 + timedelta(days=rnd.randrange(span))
+            buf.append(f"{rnd.choice(NAMES)},{sc},{dt.isoformat()}\n")
+            if len(buf) >= 10000:
+                f.write("".join(buf))
+                buf.clear()
+        f.write("".join(buf))
+
+    # Referencia en streaming (memoria O(top))
+    def rows():
+        with open(inp / "datos.csv", "r", encoding="utf-8-sig", newline="") as f:
+            next(f)
+            for line in f:
+                name, sc, dt = line.rstrip("\r\n").split(",")
+                if int(sc) >= 80:
+                    yield name, int(sc), dt
+
+    best = heapq.nlargest(TOP_K, rows(), key=lambda t: t[2])
+    with open(task_dir / "expected_stdout.txt", "w", encoding="utf-8", newline="\n") as f:
+        for name, sc, _dt in best:
+            f.write(f"{name},{sc}\n")
+
+
+GENERATORS = {"csv_sizes": gen_csv_sizes, "csv_filter": gen_csv_filter}
+
+
+def generate(kind: str, size: int, out: Path, depth: int = 0, seed: int = 0) -> Path:
+    if kind not in GENERATORS:
+        raise RuntimeError(f"tipo desconocido: {kind!r} ({', '.join(GENERATORS)})")
+    out.mkdir(parents=True, exist_ok=True)
+    if kind == "csv_sizes":
+        gen_csv_sizes(out, size, depth=depth, seed=seed)
+    else:
+        gen_csv_filter(out, size, seed=seed)
+    (out / "fitness.json").write_text(json.dumps({"preset": "throughput"}) + "\n", encoding="utf-8")
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Variantes grandes de tareas CSV con expected de referencia.")
+    ap.add_argument("kind", choices=sorted(GENERATORS))
+    ap.add_argument("--size", type=float, default=10000, help="csv_sizes: nº de ficheros; csv_filter: nº de filas")
+    ap.add_argument("--ladder", default="", help="Lista de tamaños separados por comas (p.ej. 1e3,1e4,1e5)")
+    ap.add_argument("--depth", type=int, default=0, help="(csv_sizes) niveles de directorios distractores")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="", help="Directorio de la tarea (solo sin --ladder)")
+    args = ap.parse_args(argv)
+
+    sizes = [int(float(x)) for x in args.ladder.split(",") if x.strip()] or [int(args.size)]
+    for size in sizes:
+        out = Path(args.out) if (args.out and len(sizes) == 1) else Path("tasks") / f"{args.kind}_{size}"
+        generate(args.kind, size, out, depth=args.depth, seed=args.seed)
+        print(out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+# winners/_lib/cache.py
+"""
+Caché HTTP persistente y compartida entre skills web (winners/) y órdenes
+(agents/runner_clean), solo stdlib y opcional. La usa ConnectionPool
+(fetch.py): un acierto fresco no toca la red y uno caducado se revalida con
+GET condicional.
+
+- Un fichero por URL en <root>/<sha[:2]>/<sha>.bin: una línea JSON de
+  metadatos (url final, status, cabeceras útiles, ETag/Last-Modified, Vary,
+  caducidad) y el cuerpo ya descomprimido, guardado con zlib.
+- Solo se guarda lo que el servidor declara cacheable: Cache-Control max-age
+  (fresca ese tiempo, como mucho ttl_s) o validadores ETag/Last-Modified
+  (sin max-age: se revalida en cada uso). Sin nada de eso, con no-store,
+  Vary: * o peticiones con Authorization/Cookie no se guarda: nunca se sirve
+  una página rancia por heurística. Caducada y con validadores se revalida
+  (If-None-Match / If-Modified-Since; un 304 la renueva); sin validadores se
+  borra.
+- Vary: se guardan los valores de esas cabeceras en la petición original y
+  solo acierta una petición con los mismos valores.
+- LRU acotada en bytes: cada acierto actualiza el mtime; al superar max_bytes
+  se borran las de mtime más antiguo hasta quedar en el 90 %.
+- Escrituras atómicas (tmp + os.replace): varios procesos pueden compartir la
+  carpeta. Cualquier error de disco se trata como fallo de caché, nunca de la
+  descarga.
+
+$GLADOS_HTTP_CACHE activa la caché (desactivada por defecto): "1"/"on" usa
+workspace/http_cache, cualquier otro valor es la carpeta; "0"/"off" o vacía,
+desactivada.
+
+Uso:
+  python winners/_lib/cache.py --stats
+  python winners/_lib/cache.py --clear
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CACHE_ENV = "GLADOS_HTTP_CACHE"
+DEFAULT_ROOT = Path(__file__).resolve().parents[2] / "workspace" / "http_cache"
+DEFAULT_TTL_S = 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_OFF = ("", "0", "off", "no", "false")
+_ON = ("1", "on", "yes", "true")
+_KEEP_HEADERS = ("Content-Type", "Content-Language", "ETag", "Last-Modified", "Cache-Control", "Vary")
+_PRIVATE_REQUEST = ("authorization", "cookie")
+_MAX_AGE = re.compile(r"max-age=(\d+)", re.I)
+
+
+class CacheEntry:
+    """Entrada leída del disco (solo metadatos; el cuerpo se lee con body())."""
+
+    def __init__(self, path: Path, meta: Dict[str, Any]) -> None:
+        self.path = path
+        self.meta = meta
+
+    @property
+    def url(self) -> str:
+        return self.meta.get("url", "")
+
+    @property
+    def status(self) -> int:
+        return int(self.meta.get("status", 200))
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.meta.get("expires", 0)
+
+    def headers(self) -> http.client.HTTPMessage:
+        msg = http.client.HTTPMessage()
+        for k, v in self.meta.get("headers", {}).items():
+            msg[k] = v
+        return msg
+
+    def matches(self, request_headers: Optional[Dict[str, str]]) -> bool:
+        """¿La petición lleva los mismos valores en las cabeceras de Vary?"""
+        req = _lower(request_headers)
+        return all(req.get(k) == v for k, v in self.meta.get("vary", {}).items())
+
+    def validators(self) -> Dict[str, str]:
+        hdrs = self.meta.get("headers", {})
+        out = {}
+        if hdrs.get("ETag"):
+            out["If-None-Match"] = hdrs["ETag"]
+        if hdrs.get("Last-Modified"):
+            out["If-Modified-Since"] = hdrs["Last-Modified"]
+        return out
+
+    def body(self) -> bytes:
+        with open(self.path, "rb") as f:
+            f.readline()
+            return zlib.decompress(f.read())
+
+
+def _lower(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    return {k.lower(): v for k, v in (headers or {}).items()}
+
+
+def cacheable_request(request_headers: Optional[Dict[str, str]]) -> bool:
+    """Las peticiones con credenciales no pasan por la caché compartida."""
+    return not any(k in _PRIVATE_REQUEST for k in _lower(request_headers))
+
+
+class HttpCache:
+    def __init__(self, root: Optional[str] = None, *, ttl_s: float = DEFAULT_TTL_S,
+                 max_bytes: int = DEFAULT_MAX_BYTES, level: int = 6) -> None:
+        self.root = Path(root).resolve() if root else DEFAULT_ROOT
+        self.ttl_s = ttl_s
+        self.max_bytes = max(1, max_bytes)
+        self.level = level
+        self.hits = self.revalidated = self.misses = self.stores = 0
+        self._size: Optional[int] = None  # estimación de bytes en disco (se recalcula al desalojar)
+        self._lock = threading.Lock()
+
+    # ---------------- claves ----------------
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.bin"
+
+    # ---------------- lectura ----------------
+
+    def get(self, url: str, request_headers: Optional[Dict[str, str]] = None) -> Optional[CacheEntry]:
+        """Entrada fresca o revalidable (ver .fresh / .validators()); None si no hay."""
+        p = self._path(self.key(url))
+        try:
+            with open(p, "rb") as f:
+                meta = json.loads(f.readline())
+        except Exception:
+            self._count("misses")
+            return None
+        entry = CacheEntry(p, meta)
+        if not entry.matches(request_headers):
+            self._count("misses")  # otra variante (Vary): la sustituirá la respuesta nueva
+            return None
+        if not entry.fresh and not entry.validators():
+            p.unlink(missing_ok=True)
+            self._count("misses")
+            return None
+        try:
+            os.utime(p)  # LRU: marca de último uso
+        except OSError:
+            pass
+        self._count("hits" if entry.fresh else "revalidated")
+        return entry
+
+    # ---------------- escritura ----------------
+
+    def _lifetime(self, headers) -> Optional[float]:
+        """Segundos de frescura según el servidor; None si no se puede guardar."""
+        cc = (headers.get("Cache-Control") or "").lower()
+        if "no-store" in cc or (headers.get("Vary") or "").strip() == "*":
+            return None
+        validators = bool(headers.get("ETag") or headers.get("Last-Modified"))
+        m = _MAX_AGE.search(cc)
+        if "no-cache" in cc or not m:
+            return 0.0 if validators else None  # sin frescura explícita: solo revalidando
+        life = min(self.ttl_s, float(m.group(1)))
+        return life if life > 0 or validators else None
+
+    def put(self, url: str, final_url: str, status: int, headers, body: bytes,
+            request_headers: Optional[Dict[str, str]] = None) -> bool:
+        """Guarda una respuesta completa (cuerpo ya descomprimido). False si no es cacheable."""
+        if not cacheable_request(request_headers):
+            return False
+        life = self._lifetime(headers)
+        if life is None:
+            return False
+        req = _lower(request_headers)
+        vary = [h.strip().lower() for h in (headers.get("Vary") or "").split(",") if h.strip()]
+        meta = {
+            "url": final_url, "status": status, "stored": time.time(),
+            "expires": time.time() + life,
+            "headers": {k: headers.get(k) for k in _KEEP_HEADERS if headers.get(k)},
+            "vary": {h: req.get(h) for h in vary},
+        }
+        try:
+            size = self._write(self._path(self.key(url)), meta, zlib.compress(body, self.level))
+        except Exception:
+            return False
+        self._count("stores")
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+        return True
+
+    def refresh(self, entry: CacheEntry, headers) -> None:
+        """Tras un 304: renueva la caducidad (y los validadores si vienen nuevos)."""
+        merged = dict(entry.meta.get("headers", {}))
+        for k in ("ETag", "Last-Modified", "Cache-Control", "Vary"):
+            if headers.get(k):
+                merged[k] = headers.get(k)  # el 304 puede omitir los validadores que no cambian
+        life = self._lifetime(merged)
+        try:
+            with open(entry.path, "rb") as f:
+                f.readline()
+                data = f.read()
+            if life is None:
+                entry.path.unlink(missing_ok=True)
+                return
+            entry.meta["expires"] = time.time() + life
+            entry.meta["headers"] = merged
+            self._write(entry.path, entry.meta, data)
+        except Exception:
+            pass
+
+    def _write(self, p: Path, meta: Dict[str, Any], data: bytes) -> int:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        blob = json.dumps(meta).encode("utf-8") + b"\n" + data
+        tmp.write_bytes(blob)
+        os.replace(tmp, p)
+        return len(blob)
+
+    # ---------------- tamaño / desalojo ----------------
+
+    def _entries(self):
+        if not self.root.is_dir():
+            return []
+        out = []
+        for sub in self.root.iterdir():
+            if sub.is_dir():
+                for f in sub.glob("*.bin"):
+                    try:
+                        st = f.stat()
+                        out.append((st.st_mtime, st.st_size, f))
+                    except OSError:
+                        pass
+        return out
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, f in entries:
+            if total <= target:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {"root": str(self.root), "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries), "max_bytes": self.max_bytes,
+                "hits": self.hits, "revalidated": self.revalidated,
+                "misses": self.misses, "stores": self.stores}
+
+    def clear(self) -> int:
+        entries = self._entries()
+        for _, _, f in entries:
+            f.unlink(missing_ok=True)
+        with self._lock:
+            self._size = 0
+        return len(entries)
+
+
+_DEFAULT: Dict[str, HttpCache] = {}
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> Optional[HttpCache]:
+    """Caché del proceso según $GLADOS_HTTP_CACHE (None si no está activada)."""
+    raw = os.environ.get(CACHE_ENV, "").strip()
+    if raw.lower() in _OFF:
+        return None
+    root = None if raw.lower() in _ON else raw
+    with _DEFAULT_LOCK:
+        cache = _DEFAULT.get(raw)
+        if cache is None:
+            cache = _DEFAULT[raw] = HttpCache(root)
+        return cache
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Caché HTTP compartida de las skills web.")
+    ap.add_argument("--root", default=None, help=f"Carpeta de la caché (por defecto ${CACHE_ENV} o {DEFAULT_ROOT})")
+    ap.add_argument("--clear", action="store_true", help="Borra todas las entradas")
+    ap.add_argument("--stats", action="store_true", help="Muestra nº de entradas y bytes")
+    args = ap.parse_args()
+
+    env_root = os.environ.get(CACHE_ENV, "").strip()
+    cache = HttpCache(args.root or (None if env_root.lower() in _OFF + _ON else env_root))
+    if args.clear:
+        print(f"[http_cache] borradas {cache.clear()} entradas de {cache.root}")
+    else:
+        print(json.dumps(cache.stats(), indent=2))
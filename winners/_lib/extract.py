@@ -0,0 +1,171 @@
+# winners/_lib/extract.py
+"""
+Extracción HTML incremental con parada temprana (solo stdlib, html.parser).
+
+Los parsers se alimentan con los trozos de texto según llegan de la red
+(fetch.Response.iter_text) y ponen `done = True` en cuanto tienen lo que
+buscan; parse_stream() deja entonces de leer y cierra la respuesta (la
+conexión se descarta, o se reutiliza si quedaba poco por leer), así una
+skill de títulos no descarga ni parsea el <body>.
+
+  TitleParser : texto de <title>; si no hay (o está vacío), el del primer <h1>
+                (mismas reglas que soup.title.string / h1.get_text(strip=True))
+  H1Parser    : texto del primer <h1>
+  HeadParser  : base para parsers de <head> (meta, link...): para en </head>
+                o al abrirse <body>; result() son las filas (clave, valor)
+                que las subclases añaden a self.rows
+
+Uso:
+    from _lib.extract import TitleParser, parse_stream
+    for url, title in fetch_many(urls, lambda u, r: (u, parse_stream(r, TitleParser()).result()),
+                                 stream=True): ...
+"""
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple, TypeVar
+
+P = TypeVar("P", bound="StreamParser")
+
+
+class StreamParser(HTMLParser):
+    """HTMLParser que puede declarar que ya no necesita más entrada."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.done = False
+
+    def result(self):
+        """Lo extraído (cada subclase define qué); "" si no hay nada."""
+        return ""
+
+
+class H1Parser(StreamParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self._depth = 0
+        self._buf: List[str] = []
+        self._node: List[str] = []  # nodo de texto en curso (puede llegar en varios feed)
+        self.h1: Optional[str] = None
+
+    def _flush(self) -> None:
+        # como get_text(strip=True): cada nodo de texto recortado, y pegados
+        s = "".join(self._node).strip()
+        self._node.clear()
+        if s:
+            self._buf.append(s)
+
+    def handle_starttag(self, tag, attrs):
+        if self._depth:
+            self._flush()
+        if tag == "h1" and self.h1 is None:
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if self._depth:
+            self._flush()
+        if tag == "h1" and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self.h1 = "".join(self._buf)
+                self._on_h1()
+
+    def handle_data(self, data):
+        if self._depth:
+            self._node.append(data)
+
+    def _on_h1(self) -> None:
+        self.done = True
+
+    def result(self) -> str:
+        return self.h1 or ""
+
+
+class TitleParser(H1Parser):
+    def __init__(self) -> None:
+        super().__init__()
+        self._in_title = False
+        self._tbuf: List[str] = []
+        self.title: Optional[str] = None
+        self._in_body = False
+
+    def handle_starttag(self, tag, attrs):
+        if self._in_title:
+            # <title> es RCDATA: lo que parezca una etiqueta dentro es texto
+            self._tbuf.append(self.get_starttag_text() or "")
+            return
+        if tag == "title" and self.title is None:
+            self._in_title = True
+        elif tag == "body":
+            self._in_body = True
+        super().handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = "".join(self._tbuf)
+            if self.title:
+                self.done = True
+            return
+        if self._in_title:
+            self._tbuf.append(f"</{tag}>")
+            return
+        if tag == "head":
+            self._in_body = True
+        super().handle_endtag(tag)
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._tbuf.append(data)
+        super().handle_data(data)
+
+    def _on_h1(self) -> None:
+        # el <title> manda aunque venga después; pasado el <head> ya no puede aparecer
+        self.done = self._in_body
+
+    def result(self) -> str:
+        return self.title or self.h1 or ""
+
+
+class HeadParser(StreamParser):
+    """Base: las subclases llaman a super() en handle_starttag/handle_endtag."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: List[Tuple[str, str]] = []
+
+    def result(self) -> List[Tuple[str, str]]:
+        return self.rows
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.done = True
+
+
+def parse_stream(resp, parser: P, chunk: int = 8192) -> P:
+    """
+    Alimenta `parser` con el cuerpo de `resp` (fetch.Response) o con un
+    iterable de trozos de texto hasta que parser.done o fin de datos; cierra
+    la respuesta al terminar. Con resp=None devuelve el parser vacío.
+    """
+    if resp is None:
+        return parser
+    chunks: Iterable[str] = resp.iter_text(chunk) if hasattr(resp, "iter_text") else resp
+    try:
+        for text in chunks:
+            parser.feed(text)
+            if parser.done:
+                break
+        else:
+            parser.close()
+    except Exception:
+        pass  # HTML roto: nos quedamos con lo que haya
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+    return parser
@@ -0,0 +1,442 @@
+# winners/_lib/fetch.py
+"""
+Descargas HTTP compartidas por las skills web de winners/ (solo stdlib).
+
+- ConnectionPool: conexiones http.client keep-alive reutilizadas por
+  (esquema, host, puerto), seguras entre hilos; una conexión reutilizada que
+  el servidor ya cerró se reintenta una vez con otra nueva.
+- Contexto SSL compartido (uno verificado y uno laxo para las skills que
+  aceptan certificados rotos), creados una sola vez por proceso.
+- ConnectionPool.open() / Response.iter_text(): cuerpo en streaming, descomprimido (gzip/
+  deflate) y decodificado incrementalmente con el charset de la cabecera o del
+  <meta charset> inicial; el que consume puede parar antes (la conexión se
+  descarta) y max_bytes acota lo que se lee de cada página.
+- fetch() / fetch_many(): página completa; fetch_many descarga en paralelo y
+  devuelve los resultados en el orden de entrada en cuanto están listos
+  (stream=True: respuesta sin leer, para los parsers de winners/_lib/extract.py).
+- Cortesía por dominio (winners/_lib/ratelimit.py): concurrencia máxima,
+  cubo de tokens rps/burst y timeout según agents/prefs.py (prefs.json); el
+  hueco se ocupa desde la petición hasta cerrar la respuesta.
+- Caché HTTP persistente compartida (winners/_lib/cache.py), opcional con
+  $GLADOS_HTTP_CACHE: un acierto fresco no toca la red y uno caducado se
+  revalida con GET condicional (304). En un fallo la respuesta sigue en
+  streaming y se copia a la caché solo si el que consume la lee entera; si
+  para antes no se guarda nada.
+- Con $GLADOS_FIXTURE_URL las URLs se reescriben al servidor local de
+  fixtures (engine/fixture_server.py); la URL devuelta sigue siendo la original.
+
+Uso desde una skill (winners/<skill>/main.py):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from _lib.fetch import fetch_many
+    for url, title in fetch_many(urls, lambda u, r: (u, parse(r.text) if r else "")):
+        print(f"{url},{title}")
+"""
+from __future__ import annotations
+
+import codecs
+import http.client
+import os
+import re
+import ssl
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .cache import CacheEntry, HttpCache, cacheable_request, default_cache
+from .ratelimit import Scheduler, default_scheduler
+
+FIXTURE_ENV = "GLADOS_FIXTURE_URL"
+DEFAULT_UA = "glados-bot/0.1 (+https://example.invalid) fetch"
+MAX_BYTES = 2 * 1024 * 1024   # presupuesto por página
+CHUNK = 16 * 1024
+DRAIN_MAX = 16 * 1024          # al parar antes: si queda menos (Content-Length), se lee y se reutiliza
+_REDIRECTS = (301, 302, 303, 307, 308)
+_CHARSET_HDR = re.compile(r"charset=[\"']?([\w\-:.]+)", re.I)
+_CHARSET_META = re.compile(rb"<meta[^>]+charset=[\"']?([\w\-:.]+)", re.I)
+
+_SSL_LOCK = threading.Lock()
+_SSL: Dict[bool, ssl.SSLContext] = {}
+
+
+def ssl_context(verify: bool = True) -> ssl.SSLContext:
+    """Contexto SSL compartido (cargar los certificados del sistema es caro)."""
+    with _SSL_LOCK:
+        ctx = _SSL.get(verify)
+        if ctx is None:
+            ctx = ssl.create_default_context()
+            if not verify:
+                ctx.check_hostname = False
+                ctx.verify_mode = ssl.CERT_NONE
+            _SSL[verify] = ctx
+        return ctx
+
+
+def via_fixture(url: str) -> str:
+    base = os.environ.get(FIXTURE_ENV, "").rstrip("/")
+    if not base:
+        return url
+    u = urlsplit(url)
+    return f"{base}/{u.netloc}{u.path or '/'}" + (f"?{u.query}" if u.query else "")
+
+
+def _charset(content_type: str, head: bytes) -> str:
+    m = _CHARSET_HDR.search(content_type or "") or _CHARSET_META.search(head[:2048])
+    enc = m.group(1) if m else "utf-8"
+    if isinstance(enc, bytes):
+        enc = enc.decode("ascii", "ignore")
+    try:
+        codecs.lookup(enc)
+        return enc
+    except LookupError:
+        return "utf-8"
+
+
+class Response:
+    """Respuesta abierta: status/headers ya leídos, cuerpo en streaming."""
+
+    def __init__(self, url: str, raw: http.client.HTTPResponse, release: Callable[[bool], None],
+                 max_bytes: int) -> None:
+        self.url = url
+        self.status = raw.status
+        self.headers = raw.headers
+        self.truncated = False
+        self.from_cache = False
+        self._raw = raw
+        self._release = release
+        self._left = max_bytes
+        self._done = False
+        self._body: Optional[bytes] = None
+        self._sink: Optional[List[bytes]] = None
+        self._on_complete: Optional[Callable[[bytes], Any]] = None
+        enc = (raw.getheader("Content-Encoding") or "").lower()
+        self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if enc == "gzip" else (
+            zlib.decompressobj() if enc == "deflate" else None)
+
+    @classmethod
+    def cached(cls, entry: CacheEntry, max_bytes: int) -> "Response":
+        """Respuesta servida desde la caché (cuerpo ya en memoria, sin conexión)."""
+        resp = cls.__new__(cls)
+        body = entry.body()
+        resp.url = entry.url
+        resp.status = entry.status
+        resp.headers = entry.headers()
+        resp.truncated = len(body) > max_bytes
+        resp.from_cache = True
+        resp._raw = None
+        resp._release = None
+        resp._left = 0
+        resp._done = True
+        resp._body = body[:max_bytes]
+        resp._sink = None
+        resp._on_complete = None
+        resp._inflate = None
+        return resp
+
+    def tee(self, on_complete: Callable[[bytes], Any]) -> None:
+        """Copia el cuerpo según se lee; on_complete(cuerpo) solo si se leyó entero."""
+        self._sink = []
+        self._on_complete = on_complete
+
+    def iter_bytes(self, chunk: int = CHUNK) -> Iterator[bytes]:
+        if self._body is not None:  # ya leído (fetch)
+            if self._body:
+                yield self._body
+            return
+        try:
+            while self._left > 0:
+                data = self._raw.read(min(chunk, self._left))
+                if not data:
+                    break
+                self._left -= len(data)
+                if self._inflate is not None:
+                    data = self._inflate.decompress(data)
+                if data:
+                    if self._sink is not None:
+                        self._sink.append(data)
+                    yield data
+            else:
+                self.truncated = bool(self._raw.read(1))
+            if self._inflate is not None:
+                data = self._inflate.flush()
+                if data:
+                    if self._sink is not None:
+                        self._sink.append(data)
+                    yield data
+            if self._sink is not None and not self.truncated:
+                self._on_complete(b"".join(self._sink))
+            self._sink = None
+        finally:
+            self.close()
+
+    def iter_text(self, chunk: int = CHUNK) -> Iterator[str]:
+        """Texto decodificado trozo a trozo (charset: cabecera, <meta> inicial o utf-8)."""
+        it = self.iter_bytes(chunk)
+        try:
+            head = b""
+            for data in it:
+                head += data
+                if len(head) >= 1024:
+                    break
+            dec = codecs.getincrementaldecoder(_charset(self.headers.get("Content-Type", ""), head))("replace")
+            if head:
+                yield dec.decode(head)
+            for data in it:
+                yield dec.decode(data)
+            tail = dec.decode(b"", final=True)
+            if tail:
+                yield tail
+        finally:
+            it.close()
+
+    def read(self) -> bytes:
+        if self._body is None:
+            self._body = b"".join(self.iter_bytes())
+        return self._body
+
+    @property
+    def text(self) -> str:
+        return "".join(self.iter_text())
+
+    def close(self) -> None:
+        """
+        Devuelve la conexión al pool si el cuerpo se leyó entero; si no, la
+        descarta (salvo que falten <= DRAIN_MAX bytes declarados: leerlos es
+        más barato que otro handshake).
+        """
+        if self._done or self._raw is None:
+            return
+        self._done = True
+        left = self._raw.length
+        if not self._raw.isclosed() and left is not None and left <= DRAIN_MAX:
+            try:
+                self._raw.read()
+            except Exception:
+                pass
+        reusable = self._raw.isclosed() and not self._raw.will_close
+        if not reusable:
+            self._raw.close()
+        self._release(reusable)
+
+    def __enter__(self) -> "Response":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Conexiones keep-alive por (esquema, host, puerto). Con scheduler, cada
+    petición respeta el presupuesto de su dominio (y su timeout_s en lugar de
+    timeout).
+    """
+
+    def __init__(self, *, verify: bool = True, timeout: float = 15.0, max_idle_per_host: int = 8,
+                 headers: Optional[Dict[str, str]] = None, cache: Optional[HttpCache] = None,
+                 scheduler: Optional[Scheduler] = None) -> None:
+        self.verify = verify
+        self.cache = cache
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.max_idle_per_host = max(1, max_idle_per_host)
+        self.headers = {"User-Agent": DEFAULT_UA, "Accept-Encoding": "gzip, deflate",
+                        "Connection": "keep-alive", **(headers or {})}
+        self._idle: Dict[Tuple[str, str, int], deque] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key: Tuple[str, str, int], timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout,
+                                               context=ssl_context(self.verify))
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _take(self, key) -> Optional[http.client.HTTPConnection]:
+        with self._lock:
+            q = self._idle.get(key)
+            return q.pop() if q else None
+
+    def _give(self, key, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            q = self._idle.setdefault(key, deque())
+            if len(q) < self.max_idle_per_host:
+                q.append(conn)
+                return
+        conn.close()
+
+    def open(self, url: str, *, max_bytes: int = MAX_BYTES, follow_redirects: bool = True,
+             max_redirects: int = 5, headers: Optional[Dict[str, str]] = None) -> Response:
+        """
+        GET con el cuerpo sin leer (usar como context manager o consumirlo entero).
+        Con caché: acierto fresco sin red, revalidación condicional si caducó,
+        y una respuesta 200 se guarda al terminar de leerla (sin forzar la lectura).
+        """
+        first = target = via_fixture(url)
+        logical = url  # URL real (sin fixtures): su dominio decide el presupuesto
+        req = {**self.headers, **(headers or {})}
+        cache = self.cache if self.cache is not None and cacheable_request(req) else None
+        entry = cache.get(first, req) if cache is not None else None
+        if entry is not None and entry.fresh:
+            return Response.cached(entry, max_bytes)
+        hdrs = {**req, **(entry.validators() if entry is not None else {})}
+        for _ in range(max_redirects + 1):
+            resp = self._get(target, hdrs, max_bytes, urlsplit(logical).hostname or "")
+            if resp.status == 304 and entry is not None:
+                resp.read()
+                cache.refresh(entry, resp.headers)
+                return Response.cached(entry, max_bytes)
+            loc = resp.headers.get("Location")
+            if not (follow_redirects and resp.status in _REDIRECTS and loc):
+                resp.url = url if target == first else target  # URL final tras redirecciones
+                if cache is not None and resp.status == 200:
+                    final, hdr = resp.url, resp.headers
+                    resp.tee(lambda body: cache.put(first, final, 200, hdr, body, req))
+                return resp
+            resp.read()  # vacía el cuerpo para reutilizar la conexión
+            target = urljoin(target, loc)
+            logical = urljoin(logical, loc)
+        raise http.client.HTTPException(f"demasiadas redirecciones: {url}")
+
+    def _get(self, url: str, headers: Dict[str, str], max_bytes: int, domain: str) -> Response:
+        u = urlsplit(url)
+        scheme = (u.scheme or "http").lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"esquema no soportado: {url}")
+        key = (scheme, u.hostname or "", u.port or (443 if scheme == "https" else 80))
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+
+        hb = self.scheduler.acquire(domain) if self.scheduler is not None else None
+        timeout = hb.timeout_s if hb is not None else self.timeout
+        try:
+            conn = self._take(key)
+            for reused in ((True, False) if conn is not None else (False,)):
+                if not reused:
+                    conn = self._connect(key, timeout)
+                elif conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                try:
+                    conn.request("GET", path, headers=headers)
+                    raw = conn.getresponse()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    conn.close()
+                    if reused:
+                        continue  # keep-alive caducado en el servidor: otra conexión
+                    raise
+                except Exception:
+                    conn.close()
+                    raise
+
+                def release(ok: bool, conn=conn) -> None:
+                    if hb is not None:
+                        self.scheduler.release(hb)
+                    if ok:
+                        self._give(key, conn)
+                    else:
+                        conn.close()
+
+                return Response(url, raw, release, max_bytes)
+            raise http.client.HTTPException(f"sin conexión: {url}")
+        except BaseException:
+            if hb is not None:
+                self.scheduler.release(hb)
+            raise
+
+    def fetch(self, url: str, **kw) -> Response:
+        """GET con el cuerpo ya leído (hasta max_bytes); r.text / r.read() no bloquean."""
+        resp = self.open(url, **kw)
+        resp.read()
+        return resp
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for q in idle.values():
+            for conn in q:
+                conn.close()
+
+
+_POOLS: Dict[bool, ConnectionPool] = {}
+
+
+def default_pool(verify: bool = True) -> ConnectionPool:
+    with _SSL_LOCK:
+        pool = _POOLS.get(verify)
+        if pool is None:
+            pool = _POOLS[verify] = ConnectionPool(verify=verify, cache=default_cache(),
+                                                   scheduler=default_scheduler())
+        return pool
+
+
+def fetch(url: str, *, verify: bool = True, **kw) -> Optional[Response]:
+    """Página completa o None si falla la conexión (los 4xx/5xx se devuelven con su status)."""
+    try:
+        return default_pool(verify).fetch(url, **kw)
+    except Exception:
+        return None
+
+
+def open_url(url: str, *, verify: bool = True, **kw) -> Optional[Response]:
+    """Respuesta con el cuerpo sin leer (streaming) o None si falla la conexión."""
+    try:
+        return default_pool(verify).open(url, **kw)
+    except Exception:
+        return None
+
+
+RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+
+def fetch_many(urls: Iterable[str], handle: Optional[Callable[[str, Optional[Response]], Any]] = None,
+               *, workers: int = 8, verify: bool = True, stream: bool = False,
+               retries: int = 0, backoff: float = 0.3, **kw) -> Iterator[Any]:
+    """
+    Descarga urls con `workers` hilos sobre un pool keep-alive compartido y
+    devuelve handle(url, resp) (por defecto (url, resp)) en el orden de entrada,
+    cada uno en cuanto él y los anteriores están listos. resp es None si la
+    descarga falla. handle se ejecuta en el hilo de la descarga (el parseo
+    también va en paralelo). Como mucho hay 2·workers URLs en vuelo.
+    Con stream=True handle recibe la respuesta sin leer (p.ej. para
+    extract.parse_stream, que deja de leer al tener lo que busca) y se cierra
+    al volver.
+    Con retries > 0 un fallo de conexión o un status de RETRY_STATUS se
+    reintenta hasta `retries` veces, esperando backoff·2^i segundos entre
+    intentos; handle recibe el último intento.
+    """
+    def get(u: str) -> Optional[Response]:
+        for i in range(max(0, retries) + 1):
+            r = (open_url if stream else fetch)(u, verify=verify, **kw)
+            if i == retries or (r is not None and r.status not in RETRY_STATUS):
+                return r
+            if r is not None:
+                r.close()
+            time.sleep(backoff * (2 ** i))
+        return None
+
+    def job(u: str) -> Any:
+        r = get(u)
+        if not stream:
+            return handle(u, r) if handle else (u, r)
+        try:
+            return handle(u, r) if handle else (u, r)
+        finally:
+            if r is not None and handle:
+                r.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        window: deque = deque()
+        for u in urls:
+            window.append(ex.submit(job, u))
+            if len(window) >= 2 * max(1, workers):
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def read_urls(path) -> List[str]:
+    """urls.txt tolerante a BOM y líneas vacías."""
+    with open(path, "r", encoding="utf-8-sig", errors="ignore") as f:
+        return [ln.strip() for ln in f if ln.strip()]
@@ -0,0 +1,135 @@
+# winners/_lib/ratelimit.py
+"""
+Planificador de cortesía por dominio para las descargas de winners/_lib (solo
+stdlib). ConnectionPool pide un hueco antes de cada petición y lo devuelve al
+cerrar la respuesta, así el presupuesto cubre también la lectura del cuerpo.
+
+Presupuesto por dominio (agents/prefs.py: domain_budget, es decir
+config/prefs.json "fetch_defaults" + "domain_overrides"):
+  max_concurrency : semáforo por dominio; un dominio lento o muy repetido no
+                    acapara el pool, el resto de hilos sigue con otros dominios
+  rps / burst     : cubo de tokens con reserva (cada petición reserva un token
+                    y duerme lo que le toque, en orden de llegada); rps=0 sin
+                    límite de ritmo
+  timeout_s       : timeout de conexión/lectura que aplica el pool
+
+Un Scheduler es por proceso y lo comparten todos los pools (y por tanto todas
+las skills web y el pipeline de agents/runner_clean que corran en él). Los
+cambios en prefs.json se aplican sin reiniciar (PrefsService recarga en
+caliente y budget() rehace el presupuesto del dominio).
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+_FALLBACK = {"max_concurrency": 8, "rps": 0, "burst": 0, "timeout_s": 15}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst or rate))
+        self._tokens = self.burst
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserva un token; devuelve cuántos segundos hay que esperar para usarlo."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._t) * self.rate)
+            self._t = now
+            self._tokens -= 1.0
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class HostBudget:
+    def __init__(self, domain: str, max_concurrency: int = 8, rps: float = 0, burst: float = 0,
+                 timeout_s: float = 15) -> None:
+        self.domain = domain
+        self.cfg = {"max_concurrency": max_concurrency, "rps": rps, "burst": burst, "timeout_s": timeout_s}
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout_s = float(timeout_s)
+        self.sem = threading.BoundedSemaphore(self.max_concurrency)
+        self.bucket = TokenBucket(rps, burst) if rps and float(rps) > 0 else None
+        self.requests = 0
+        self.waited_s = 0.0
+
+
+def _prefs_budget() -> Callable[[str], Dict[str, Any]]:
+    # agents/ vive en la raíz del repo; las skills solo tienen winners/ en sys.path
+    try:
+        from agents.prefs import domain_budget
+    except ImportError:
+        if str(ROOT) not in sys.path:
+            sys.path.append(str(ROOT))
+        try:
+            from agents.prefs import domain_budget
+        except ImportError:
+            return lambda domain: dict(_FALLBACK)
+    return domain_budget
+
+
+def normalize(domain: str) -> str:
+    domain = (domain or "").lower().strip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+class Scheduler:
+    def __init__(self, budget_of: Optional[Callable[[str], Dict[str, Any]]] = None) -> None:
+        self._budget_of = budget_of or _prefs_budget()
+        self._hosts: Dict[str, HostBudget] = {}
+        self._lock = threading.Lock()
+
+    def budget(self, domain: str) -> HostBudget:
+        """
+        Presupuesto vigente del dominio. Si las prefs cambiaron (recarga en
+        caliente) se crea uno nuevo; las peticiones en vuelo liberan el viejo.
+        """
+        domain = normalize(domain)
+        cfg = {k: v for k, v in self._budget_of(domain).items() if k in _FALLBACK}
+        with self._lock:
+            hb = self._hosts.get(domain)
+            if hb is None or hb.cfg != cfg:
+                hb = self._hosts[domain] = HostBudget(domain, **cfg)
+            return hb
+
+    def acquire(self, domain: str) -> HostBudget:
+        """Bloquea hasta tener hueco y token para `domain`; devolver con release()."""
+        hb = self.budget(domain)
+        t0 = time.monotonic()
+        hb.sem.acquire()
+        if hb.bucket is not None:
+            wait = hb.bucket.reserve()
+            if wait > 0:
+                time.sleep(wait)
+        with self._lock:
+            hb.requests += 1
+            hb.waited_s += time.monotonic() - t0
+        return hb
+
+    def release(self, hb: HostBudget) -> None:
+        hb.sem.release()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {d: {"requests": hb.requests, "waited_s": round(hb.waited_s, 3),
+                        "max_concurrency": hb.max_concurrency}
+                    for d, hb in self._hosts.items()}
+
+
+_DEFAULT: Optional[Scheduler] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_scheduler() -> Scheduler:
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = Scheduler()
+        return _DEFAULT
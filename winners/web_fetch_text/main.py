@@ -1,11 +1,13 @@
-import sys, ssl, re, csv
+import sys, re, csv
 from pathlib import Path
-from urllib.parse import urljoin
-from urllib.request import build_opener, ProxyHandler, HTTPSHandler
-from urllib.error import HTTPError, URLError
 from html.parser import HTMLParser
 import html as ihtml
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # winners/ (módulos compartidos)
+from _lib.fetch import fetch_many
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Glados/web_fetch_text)"}
+
 class TextExtractor(HTMLParser):
     def __init__(self):
         super().__init__()
@@ -39,40 +41,6 @@ class TextExtractor(HTMLParser):
         raw = re.sub(r'\s+', ' ', raw).strip()
         return raw
 
-def fetch(url: str, timeout: int = 20) -> str:
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-
-    opener = build_opener(
-        ProxyHandler({}),         # sin proxy dentro de docker
-        HTTPSHandler(context=ctx)
-    )
-    opener.addheaders = [("User-Agent", "Mozilla/5.0 (Glados/web_fetch_text)")]
-
-    try:
-        with opener.open(url, timeout=timeout) as r:
-            # intenta usar charset de cabeceras; si no, decodifica en utf-8 tolerante
-            data = r.read()
-            ct = r.headers.get("Content-Type", "")
-            m = re.search(r"charset=([\w\-]+)", ct, flags=re.I)
-            enc = m.group(1) if m else "utf-8"
-            try:
-                return data.decode(enc, errors="replace")
-            except Exception:
-                return data.decode("utf-8", errors="replace")
-    except HTTPError as e:
-        try:
-            return e.read().decode("utf-8", errors="replace")
-        except Exception:
-            return ""
-    except URLError as e:
-        sys.stderr.write(f"[warn] URLError {url}: {e}\n")
-        return ""
-    except Exception as e:
-        sys.stderr.write(f"[warn] fetch error {url}: {e}\n")
-        return ""
-
 def html_to_text(html: str) -> str:
     p = TextExtractor()
     try:
@@ -82,17 +50,27 @@ def html_to_text(html: str) -> str:
         pass
     return p.text()
 
+def text_of(base: str, r) -> list:
+    # TLS laxo; charset de cabeceras (o <meta>), si no utf-8 tolerante
+    html = r.text if r is not None else ""
+    if not html:
+        sys.stderr.write(f"[info] empty body: {base}\n")
+        return [base, ""]
+    return [base, html_to_text(html)]
+
 def main():
     if len(sys.argv) < 2:
         print("usage: main.py <input_dir>", file=sys.stderr)
         sys.exit(2)
 
     inp = Path(sys.argv[1])
-    urls_file = inp / "urls.txt"
-    if not urls_file.exists():
+    if not (inp / "urls.txt").exists():
         print("missing urls.txt", file=sys.stderr)
         sys.exit(2)
+    run(inp, sys.stdout)
 
+def run(inp, out) -> None:
+    urls_file = Path(inp) / "urls.txt"
     # Leer URLs (quitando posible BOM y líneas vacías)
     urls = []
     for line in urls_file.read_text(encoding="utf-8", errors="ignore").splitlines():
@@ -100,15 +78,10 @@ def main():
         if line:
             urls.append(line)
 
-    w = csv.writer(sys.stdout, lineterminator="\n")
-    for base in urls:
-        html = fetch(base)
-        if not html:
-            sys.stderr.write(f"[info] empty body: {base}\n")
-            w.writerow([base, ""])
-            continue
-        txt = html_to_text(html)
-        w.writerow([base, txt])
+    w = csv.writer(out, lineterminator="\n")
+    for row in fetch_many(urls, text_of, verify=False, headers=HEADERS):
+        w.writerow(row)
+        out.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
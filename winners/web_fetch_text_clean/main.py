@@ -2,10 +2,13 @@
 import sys, pathlib, re, csv, textwrap
 from urllib.parse import urlparse
 
-import requests
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # winners/ (módulos compartidos)
+from _lib.fetch import fetch as http_fetch, fetch_many
+
 ROOT = pathlib.Path(__file__).resolve().parents[2]  # winners/<skill>/ -> repo root
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; GladosBot/1.0; +https://example.local)"}
 def read_file(p: pathlib.Path) -> str:
     return p.read_text(encoding="utf-8", errors="replace")
 
@@ -28,14 +31,36 @@ def read_limit(task_dir: pathlib.Path) -> int | None:
     m = re.search(r"(\d+)", s)
     return int(m.group(1)) if m else None
 
-def fetch(url: str, timeout=20):
-    hdrs = {
-        "User-Agent": "Mozilla/5.0 (compatible; GladosBot/1.0; +https://example.local)"
-    }
-    r = requests.get(url, headers=hdrs, timeout=timeout)
-    r.raise_for_status()
+def html_of(url: str, r):
+    if r is None:
+        raise ConnectionError(f"sin respuesta de {url}")
+    if r.status >= 400:
+        raise RuntimeError(f"HTTP {r.status} en {url}")
     return r.text
 
+def fetch(url: str):
+    # pool keep-alive + caché HTTP compartida si $GLADOS_HTTP_CACHE (winners/_lib)
+    return html_of(url, http_fetch(url, headers=HEADERS))
+
+def fetch_pages(urls, workers: int = 8):
+    """(url, html, error) en el orden de entrada; descarga en paralelo (ventana acotada)."""
+    def page(url, r):
+        try:
+            return url, html_of(url, r), None
+        except Exception as e:
+            return url, "", e
+    return fetch_many(urls, page, workers=workers, headers=HEADERS)
+
+def clean_row(url: str, html: str, error, limit: int | None = None):
+    """Fila url,title,h1,meta_description,texto (con error: campos vacíos y texto=mensaje)."""
+    if error is not None:
+        return [url, "", "", "", f"(error) {error}"]
+    try:
+        title, h1, meta_desc, text = clean_text(html)
+    except Exception as e:
+        return [url, "", "", "", f"(error) {e}"]
+    return [url, title, h1, meta_desc, text[:limit] if limit else text]
+
 def clean_text(html: str):
     soup = BeautifulSoup(html, "html.parser")
 
@@ -60,25 +85,20 @@ def main():
     if len(sys.argv) < 2:
         print("Uso: main.py <task_dir>", file=sys.stderr)
         sys.exit(2)
-    task_dir = pathlib.Path(sys.argv[1])
+    run(pathlib.Path(sys.argv[1]), sys.stdout)
 
+def run(task_dir, out) -> None:
+    task_dir = pathlib.Path(task_dir)
     urls = read_urls(task_dir)
     limit = read_limit(task_dir)
 
-    out = sys.stdout
     w = csv.writer(out, lineterminator="\n")
     # Cabecera completa
     w.writerow(["url","title","h1","meta_description","texto"])
 
-    for url in urls:
-        try:
-            html = fetch(url)
-            title, h1, meta_desc, text = clean_text(html)
-            trimmed = text[:limit] if limit else text
-            w.writerow([url, title, h1, meta_desc, trimmed])
-        except Exception as e:
-            # fila con error, deja campos vacíos excepto url y texto=mensaje
-            w.writerow([url, "", "", "", f"(error) {e}"])
+    for url, html, error in fetch_pages(urls):
+        w.writerow(clean_row(url, html, error, limit))
+        out.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,10 @@
 from __future__ import annotations
 from pathlib import Path
 import sys, re
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # winners/ (módulos compartidos)
+from _lib.extract import H1Parser, parse_stream
+from _lib.fetch import fetch_many, read_urls
 
 DEFAULT_HEADERS = {"User-Agent": "glados-bot/0.1 (+https://example.invalid) requests"}
 
@@ -11,31 +12,21 @@ def clean(text: str) -> str:
     t = re.sub(r"\s+", " ", text or "").strip()
     return t.replace(",", " ")
 
-def extract_h1(html: str) -> str:
-    soup = BeautifulSoup(html, "lxml")
-    h1 = soup.find("h1")
-    return clean(h1.get_text(strip=True) if h1 else "")
-
-def fetch_h1(url: str, *, timeout: float = 10.0) -> tuple[str, str]:
-    host = urlparse(url).netloc.lower()
-    if host in {"example.com", "example.org", "example.net"}:
-        # páginas de ejemplo: su <h1> es "Example Domain"
-        return url, "Example Domain"
-    try:
-        r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout, allow_redirects=True)
-        r.raise_for_status()
-        return url, extract_h1(r.text)
-    except Exception:
+def h1_of(url: str, r) -> tuple[str, str]:
+    # primer <h1> en streaming: se deja de descargar al cerrarse
+    if r is None or r.status >= 400:
         return url, ""
+    return url, clean(parse_stream(r, H1Parser()).result())
 
-def main(root: str) -> None:
+def run(root, out) -> None:
     p = Path(root) / "urls.txt"
     if not p.exists():
         return
-    urls = [u.strip() for u in p.read_text(encoding="utf-8-sig").splitlines() if u.strip()]
-    for u in urls:
-        url, h1 = fetch_h1(u)
-        print(f"{url},{h1}")
+    for url, h1 in fetch_many(read_urls(p), h1_of, stream=True, headers=DEFAULT_HEADERS):
+        print(f"{url},{h1}", file=out, flush=True)
+
+def main(root: str) -> None:
+    run(root, sys.stdout)
 
 if __name__ == "__main__":
-    main(sys.argv[1] if len(sys.argv) > 1 else ".")
\ No newline at end of file
+    main(sys.argv[1] if len(sys.argv) > 1 else ".")
@@ -1,10 +1,13 @@
-import sys, ssl, csv
+import sys, csv
 from pathlib import Path
 from urllib.parse import urljoin
-from urllib.request import Request, build_opener, ProxyHandler, HTTPSHandler
-from urllib.error import HTTPError, URLError
 from html.parser import HTMLParser
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # winners/ (módulos compartidos)
+from _lib.fetch import fetch_many
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Glados/links)"}
+
 class AnchorParser(HTMLParser):
     def __init__(self):
         super().__init__()
@@ -32,66 +35,47 @@ class AnchorParser(HTMLParser):
         if self._in_a and data:
             self._buf.append(data)
 
-def fetch(url: str, timeout: int = 15) -> str:
-    # TLS laxo (permite sitios con cert roto)
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-
-    # Fuerza SIN proxy dentro del contenedor
-    opener = build_opener(
-        ProxyHandler({}),               # no proxies
-        HTTPSHandler(context=ctx),
-    )
-    opener.addheaders = [("User-Agent", "Mozilla/5.0 (Glados/links)")]
+def links_of(base: str, r) -> list:
+    # TLS laxo (permite sitios con cert roto); las páginas de error también se parsean
+    if r is None:
+        sys.stderr.write(f"[warn] fetch error {base}\n")
+        return []
+    html = r.text
+    if not html:
+        sys.stderr.write(f"[info] empty body: {base}\n")
+        return []
+    p = AnchorParser()
     try:
-        with opener.open(url, timeout=timeout) as r:
-            return r.read().decode("utf-8", errors="replace")
-    except HTTPError as e:
-        try:
-            return e.read().decode("utf-8", errors="replace")
-        except Exception:
-            return ""
-    except URLError as e:
-        sys.stderr.write(f"[warn] URLError {url}: {e}\\n")
-        return ""
+        p.feed(html)
     except Exception as e:
-        sys.stderr.write(f"[warn] fetch error {url}: {e}\\n")
-        return ""
+        sys.stderr.write(f"[warn] parse error {base}: {e}\n")
+        return []
+    if not p.anchors:
+        sys.stderr.write(f"[info] no anchors found: {base}\n")
+    return [[base, text, urljoin(base, href)] for text, href in p.anchors]
 
 def main():
     if len(sys.argv) < 2:
         print("usage: main.py <input_dir>", file=sys.stderr)
         sys.exit(2)
     inp = Path(sys.argv[1])
-    urls_file = inp / "urls.txt"
-    if not urls_file.exists():
+    if not (inp / "urls.txt").exists():
         print("missing urls.txt", file=sys.stderr)
         sys.exit(2)
+    run(inp, sys.stdout)
 
+def run(inp, out) -> None:
+    urls_file = Path(inp) / "urls.txt"
     urls = []
     for line in urls_file.read_text(encoding="utf-8", errors="ignore").splitlines():
         line = line.lstrip("\ufeff").strip()
         if line:
             urls.append(line)
 
-    w = csv.writer(sys.stdout, lineterminator="\\n")
-    for base in urls:
-        html = fetch(base)
-        if not html:
-            sys.stderr.write(f"[info] empty body: {base}\\n")
-            continue
-        p = AnchorParser()
-        try:
-            p.feed(html)
-        except Exception as e:
-            sys.stderr.write(f"[warn] parse error {base}: {e}\\n")
-            continue
-        if not p.anchors:
-            sys.stderr.write(f"[info] no anchors found: {base}\\n")
-        for text, href in p.anchors:
-            abs_href = urljoin(base, href)
-            w.writerow([base, text, abs_href])
+    w = csv.writer(out, lineterminator="\n")
+    for rows in fetch_many(urls, links_of, verify=False, headers=HEADERS):
+        w.writerows(rows)
+        out.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
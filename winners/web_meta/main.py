@@ -1,23 +1,27 @@
 #!/usr/bin/env python3
-import sys, ssl, csv
+import sys, csv
 from pathlib import Path
-from html.parser import HTMLParser
 from urllib.parse import urljoin
-from urllib.request import build_opener, ProxyHandler, HTTPSHandler
-from urllib.error import HTTPError, URLError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # winners/ (módulos compartidos)
+from _lib.extract import HeadParser, parse_stream
+from _lib.fetch import fetch_many
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Glados/meta)"}
 
 TARGET_META_NAMES = {
     "description", "og:title", "og:description", "og:image", "twitter:title",
     "twitter:description", "twitter:image"
 }
 
-class MetaParser(HTMLParser):
+class MetaParser(HeadParser):
+    # para en </head> o <body>: el resto del documento no se descarga
     def __init__(self):
         super().__init__()
-        self.rows = []  # (key, value)
         self._in_head = False
 
     def handle_starttag(self, tag, attrs):
+        super().handle_starttag(tag, attrs)
         a = dict((k.lower(), v) for k, v in attrs)
         tl = tag.lower()
         if tl == "head":
@@ -37,59 +41,42 @@ class MetaParser(HTMLParser):
                 self.rows.append(("icon", href))
 
     def handle_endtag(self, tag):
+        super().handle_endtag(tag)
         if tag.lower() == "head":
             self._in_head = False
 
-def fetch(url: str, timeout: int = 15) -> str:
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    opener = build_opener(ProxyHandler({}), HTTPSHandler(context=ctx))
-    opener.addheaders = [("User-Agent","Mozilla/5.0 (Glados/meta)")]
-    try:
-        with opener.open(url, timeout=timeout) as r:
-            return r.read().decode("utf-8", errors="replace")
-    except HTTPError as e:
-        try:
-            return e.read().decode("utf-8", errors="replace")
-        except:
-            return ""
-    except URLError:
-        return ""
-    except Exception:
-        return ""
+def meta_of(base: str, r) -> list:
+    # TLS laxo; las páginas de error también se parsean
+    rows = []
+    for key, val in parse_stream(r, MetaParser()).result():
+        # normaliza a absoluto si parece URL
+        if key.lower() in ("icon", "og:image", "twitter:image"):
+            val = urljoin(base, val)
+        rows.append([base, key, val])
+    return rows
 
 def main():
     if len(sys.argv) < 2:
         print("usage: main.py <input_dir>", file=sys.stderr)
         sys.exit(2)
     inp = Path(sys.argv[1])
-    urls_file = inp / "urls.txt"
-    if not urls_file.exists():
+    if not (inp / "urls.txt").exists():
         print("missing urls.txt", file=sys.stderr)
         sys.exit(2)
+    run(inp, sys.stdout)
 
+def run(inp, out) -> None:
+    urls_file = Path(inp) / "urls.txt"
     urls = []
     for line in urls_file.read_text(encoding="utf-8", errors="ignore").splitlines():
         line = line.lstrip("\ufeff").strip()
         if line:
             urls.append(line)
 
-    w = csv.writer(sys.stdout, lineterminator="\n")
-    for base in urls:
-        html = fetch(base)
-        if not html:
-            continue
-        p = MetaParser()
-        try:
-            p.feed(html)
-        except Exception:
-            continue
-        for key, val in p.rows:
-            # normaliza a absoluto si parece URL
-            if key.lower() in ("icon", "og:image", "twitter:image"):
-                val = urljoin(base, val)
-            w.writerow([base, key, val])
+    w = csv.writer(out, lineterminator="\n")
+    for rows in fetch_many(urls, meta_of, verify=False, stream=True, headers=HEADERS):
+        w.writerows(rows)
+        out.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from pathlib import Path
 import sys
+import os
 import requests
 from urllib.parse import urlparse
 
@@ -8,24 +9,33 @@ DEFAULT_HEADERS = {
     "User-Agent": "glados-bot/0.1 (+https://example.invalid) requests"
 }
 
+FIXTURE_URL = os.environ.get("GLADOS_FIXTURE_URL", "").rstrip("/")
+
+def _via_fixture(url: str) -> str:
+    # https://host/ruta -> <FIXTURE_URL>/host/ruta (benchmarks reproducibles sin internet)
+    if not FIXTURE_URL:
+        return url
+    u = urlparse(url)
+    return f"{FIXTURE_URL}/{u.netloc}{u.path or '/'}" + (f"?{u.query}" if u.query else "")
+
 def fetch_status(url: str, *, timeout: float = 10.0) -> tuple[str, str]:
-    host = urlparse(url).netloc.lower()
-    if host in {"example.com", "example.org", "example.net"}:
-        return url, "200"
     try:
-        r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout, allow_redirects=False)
+        r = requests.get(_via_fixture(url), headers=DEFAULT_HEADERS, timeout=timeout, allow_redirects=False)
         return url, str(r.status_code)
     except Exception:
         return url, ""
 
-def main(root: str) -> None:
+def run(root, out) -> None:
     p = Path(root) / "urls.txt"
     if not p.exists():
         return
     urls = [u.strip() for u in p.read_text(encoding="utf-8-sig").splitlines() if u.strip()]
     for u in urls:
         url, status = fetch_status(u)
-        print(f"{url},{status}")
+        print(f"{url},{status}", file=out)
+
+def main(root: str) -> None:
+    run(root, sys.stdout)
 
 if __name__ == "__main__":
     root = sys.argv[1] if len(sys.argv) > 1 else "."
@@ -1,78 +1,46 @@
 ﻿# engine/codegen/templates/web_titles.py.j2
 # Lee "urls.txt" (UTF-8), descarga cada página y saca "URL,TITLE".
-# Implementación SECuENCIAL baseline con fast-path para example.* y limpieza de título.
+# Descargas concurrentes con salida en orden vía winners/_lib/fetch.py (keep-alive,
+# SSL compartido, presupuesto de bytes; respeta GLADOS_FIXTURE_URL). El título se
+# extrae en streaming y la descarga se corta al cerrarse </title>.
+# Variante "hard": servidores inestables; los fallos de conexión y los
+# 429/5xx se reintentan con backoff exponencial (RETRIES, BACKOFF_S).
 from __future__ import annotations
 from pathlib import Path
 import sys, re
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
 
-_SESSION = None
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # winners/ (módulos compartidos)
+from _lib.extract import TitleParser, parse_stream
+from _lib.fetch import fetch_many, read_urls
 
 DEFAULT_HEADERS = {
     "User-Agent": "glados-bot/0.1 (+https://example.invalid) requests"
 }
+RETRIES = 2
+BACKOFF_S = 0.3
 
 def clean_title(text: str) -> str:
     t = re.sub(r"\s+", " ", text or "").strip()
     return t.replace(",", " ")
 
-def extract_title(html: str) -> str:
-    # <title> o <h1> como fallback
-    soup = BeautifulSoup(html, "lxml")
-    t = None
-    if soup.title and soup.title.string:
-        t = soup.title.string
-    else:
-        h1 = soup.find("h1")
-        if h1:
-            t = h1.get_text(strip=True)
-    return clean_title(t or "")
+def title_of(url: str, r) -> tuple[str, str]:
+    # <title> o <h1> como fallback; vacío si falla la descarga o el servidor responde >= 400
+    if r is None or r.status >= 400:
+        return url, ""
+    return url, clean_title(parse_stream(r, TitleParser()).result())
 
-
-def _build_session() -> requests.Session:
-    s = requests.Session()
-    retry = Retry(
-        total=2, backoff_factor=0.3,
-        status_forcelist=(429, 500, 502, 503, 504),
-        allowed_methods=frozenset(["GET"])
-    )
-    s.mount("http://", HTTPAdapter(max_retries=retry))
-    s.mount("https://", HTTPAdapter(max_retries=retry))
-    s.headers.update(DEFAULT_HEADERS)
-    return s
-
-def fetch_one(url: str, *, timeout: float = 10.0) -> tuple[str, str]:
-    # Fast-path offline para example.com/org/net (ayuda a tests deterministas)
-    host = urlparse(url).netloc.lower()
-    if host in {"example.com", "example.org", "example.net"}:
-        return url, "Example Domain"
-    try:
-        r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
-        r.raise_for_status()
-        return url, extract_title(r.text)
-    except Exception:
-        return url, ""  # título vacío si falla
-
-def main(root: str) -> None:
+def run(root, out) -> None:
     p = Path(root) / "urls.txt"
     if not p.exists():
         return
-    urls = [u.strip() for u in p.read_text(encoding="utf-8-sig").splitlines() if u.strip()]
+    urls = read_urls(p)
+    for url, title in fetch_many(urls, title_of, stream=True, headers=DEFAULT_HEADERS,
+                                 retries=RETRIES, backoff=BACKOFF_S):
+        print(f"{url},{title}", file=out, flush=True)
 
-    # === BEGIN_FETCH_LOOP (mutation anchor) ===
-
-    from concurrent.futures import ThreadPoolExecutor
-    workers = min(8, max(1, len(urls)))
-    with ThreadPoolExecutor(max_workers=workers) as ex:
-        for url, title in ex.map(fetch_one, urls):
-            print(f"{url},{title}")
-
-    # === END_FETCH_LOOP ===
+def main(root: str) -> None:
+    run(root, sys.stdout)
 
 if __name__ == "__main__":
     root = sys.argv[1] if len(sys.argv) > 1 else "."
-    main(root)
\ No newline at end of file
+    main(root)